@@ -1,11 +1,15 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime
+from datetime import date, datetime
 import random
-import unicodedata
 import time
+import functools
+import os
+import re
+
+import memoria
+from cache_atlas import CacheMultiInquilino
+from formatos import formato_real, format_pct, mes_ano_pt
+from graficos import HOVER_BRL, TEXTO_BRL, compactar_figura
 
 # =========================
 # CONFIG
@@ -31,11 +35,75 @@ FRASES = [
 # =========================
 # PLANILHA
 # =========================
-PLANILHA_URL = (
-    "https://docs.google.com/spreadsheets/d/"
-    "1lI55tMA0GkpZ2D4EF8PPHQ4d5z3NNAKH"
-    "/export?format=xlsx"
+PLANILHA_ID_PADRAO = os.environ.get("ATLAS_PLANILHA_ID", "1lI55tMA0GkpZ2D4EF8PPHQ4d5z3NNAKH")
+PLANILHA_URL_MODELO = os.environ.get(
+    "ATLAS_PLANILHA_URL_MODELO",
+    "https://docs.google.com/spreadsheets/d/{id}/export?format=xlsx",
 )
+MEDIR_TEMPOS = os.environ.get("ATLAS_MEDIR_TEMPOS") == "1"
+MEDIR_MEMORIA = memoria.iniciar()
+USAR_DUCKDB = os.environ.get("ATLAS_DUCKDB") == "1"
+
+CACHE_MB_POR_PLANILHA = float(os.environ.get("ATLAS_CACHE_MB_POR_PLANILHA", "256"))
+CACHE_MB_TOTAL = float(os.environ.get("ATLAS_CACHE_MB_TOTAL", "1024"))
+CACHE_MAX_ENTRADAS = int(os.environ.get("ATLAS_CACHE_MAX_ENTRADAS", "256"))
+CACHE_MAX_PLANILHAS = int(os.environ.get("ATLAS_CACHE_MAX_PLANILHAS", "32"))
+
+
+def resolver_planilha_id():
+    bruto = st.query_params.get("planilha", "") or st.session_state.get("planilha_id", "")
+    bruto = str(bruto).strip()
+    if not re.fullmatch(r"[A-Za-z0-9_-]{10,128}", bruto):
+        bruto = PLANILHA_ID_PADRAO
+    st.session_state.planilha_id = bruto
+    return bruto
+
+
+@st.cache_resource(show_spinner=False)
+def obter_cache_inquilinos():
+    return CacheMultiInquilino(
+        limite_por_inquilino=int(CACHE_MB_POR_PLANILHA * 1024 * 1024),
+        limite_total=int(CACHE_MB_TOTAL * 1024 * 1024),
+        max_entradas=CACHE_MAX_ENTRADAS,
+        max_inquilinos=CACHE_MAX_PLANILHAS,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def obter_buscador():
+    from busca_planilhas import criar_buscador
+
+    return criar_buscador()
+
+
+@st.cache_resource(show_spinner=False)
+def obter_cache_compartilhado():
+    from cache_compartilhado import criar_backend
+
+    return criar_backend()
+
+
+@st.cache_resource(show_spinner=False, max_entries=CACHE_MAX_PLANILHAS)
+def obter_livro(planilha_id):
+    from livro_sqlite import abrir_livro
+
+    return abrir_livro(planilha_id)
+
+
+@st.cache_resource(show_spinner=False)
+def obter_pool_preparo():
+    from preparo_paralelo import criar_pool
+
+    return criar_pool()
+
+
+PLANILHA_ID = resolver_planilha_id()
+PLANILHA_URL = PLANILHA_URL_MODELO.format(id=PLANILHA_ID)
+CACHE = obter_cache_inquilinos()
+
+
+def em_cache(chave, construir, ttl=None):
+    return CACHE.obter(PLANILHA_ID, chave, construir, ttl=ttl)
 
 # =========================
 # TEMA VISUAL GLOBAL
@@ -47,12 +115,6 @@ COR_SALDO = "#72E0B5"
 COR_DESTAQUE = "#B497FF"
 
 
-# =========================
-# CONTROLE DE ATUALIZAÇÃO
-# =========================
-if "refresh_key" not in st.session_state:
-    st.session_state.refresh_key = str(time.time())
-
 # =========================
 # ESTILO
 # =========================
@@ -186,171 +248,35 @@ hr { border:none !important; height:1px !important; background:linear-gradient(9
 # =========================
 # FUNÇÕES
 # =========================
-def limpar_valor(v):
-    if pd.isna(v):
-        return 0.0
-    if isinstance(v, str):
-        v = v.replace("R$", "").replace(".", "").replace(",", ".").strip()
-        try:
-            return float(v)
-        except Exception:
-            return 0.0
-    try:
-        return float(v)
-    except Exception:
-        return 0.0
-
-
-def formato_real(v):
-    try:
-        v = float(v)
-    except Exception:
-        v = 0.0
-    return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-
-def normalizar_texto(txt):
-    txt = str(txt).strip().upper()
-    txt = unicodedata.normalize("NFKD", txt).encode("ascii", errors="ignore").decode("utf-8")
-    return txt
-
-
-def normalizar_colunas(df):
-    df = df.copy()
-    df.columns = [normalizar_texto(c) for c in df.columns]
-    return df
-
-
-MESES_PT = {
-    1: "JAN", 2: "FEV", 3: "MAR", 4: "ABR", 5: "MAI", 6: "JUN",
-    7: "JUL", 8: "AGO", 9: "SET", 10: "OUT", 11: "NOV", 12: "DEZ"
-}
-
-
-def mes_ano_pt(data):
-    if pd.isna(data):
-        return ""
-    return f"{MESES_PT.get(int(data.month), '')}/{data.year}"
-
-
-def classificar_gasto(valor):
-    txt = normalizar_texto(valor)
-    if "INDISP" in txt:
-        return "INDISPENSAVEL"
-    if "DISP" in txt:
-        return "DISPENSAVEL"
-    return "SEM CLASSIFICACAO"
-
-
-def preparar_base(base):
-    base = normalizar_colunas(base)
-
-    col_data = next((c for c in base.columns if "DATA" in c), None)
-    col_valor = next((c for c in base.columns if "VALOR" in c), None)
-    col_desc = next((c for c in base.columns if "NOME" in c or "DESCR" in c), None)
-
-    if not col_data or not col_valor or not col_desc:
-        return pd.DataFrame(columns=["DATA", "DESCRICAO", "VALOR", "ANO", "MES_NUM", "MES"])
-
-    base = base[[col_data, col_desc, col_valor]].copy()
-    base.columns = ["DATA", "DESCRICAO", "VALOR"]
-
-    base["VALOR"] = base["VALOR"].apply(limpar_valor)
-    base["DATA"] = pd.to_datetime(base["DATA"], errors="coerce", dayfirst=True)
-    base = base.dropna(subset=["DATA"])
-
-    base["ANO"] = base["DATA"].dt.year
-    base["MES_NUM"] = base["DATA"].dt.month
-    base["MES"] = base["MES_NUM"].map(MESES_PT)
-
-    return base
-
-
-@st.cache_data(show_spinner=False, ttl=60)
-def carregar_planilhas(url, refresh_key):
-    xls = pd.ExcelFile(url)
-    planilhas = {nome: pd.read_excel(xls, sheet_name=nome) for nome in xls.sheet_names}
-    return planilhas, xls.sheet_names
-
-
-def encontrar_aba_gastos(sheet_names):
-    nomes_normalizados = {normalizar_texto(nome): nome for nome in sheet_names}
-    candidatos = [
-        "GASTOS",
-        "GASTOS_VARIAVEIS",
-        "GASTOS VARIAVEIS",
-        "GASTOS EXTRAS",
-        "VARIAVEIS",
-        "EXTRAS",
-    ]
-    for cand in candidatos:
-        if cand in nomes_normalizados:
-            return nomes_normalizados[cand]
-    return None
-
-
-def preparar_gastos(df):
-    if df is None or df.empty:
-        return pd.DataFrame(columns=[
-            "DATA", "MES", "QUINZENA", "NOME", "FORMA PAGAMENTO", "CLASSIFICACAO", "VALOR"
-        ])
-
-    df = normalizar_colunas(df)
-
-    mapa = {}
-    for c in df.columns:
-        if "DATA" in c and "DATA" not in mapa.values():
-            mapa[c] = "DATA"
-        elif (c == "MES" or "MES" in c) and "MES" not in mapa.values():
-            mapa[c] = "MES"
-        elif "NOME" in c and "NOME" not in mapa.values():
-            mapa[c] = "NOME"
-        elif "FORMA" in c and "PAG" in c and "FORMA PAGAMENTO" not in mapa.values():
-            mapa[c] = "FORMA PAGAMENTO"
-        elif "CLASSIFIC" in c and "CLASSIFICACAO" not in mapa.values():
-            mapa[c] = "CLASSIFICACAO"
-        elif "VALOR" in c and "VALOR" not in mapa.values():
-            mapa[c] = "VALOR"
-
-    df = df.rename(columns=mapa)
-
-    obrigatorias = ["DATA", "NOME", "VALOR"]
-    if any(col not in df.columns for col in obrigatorias):
-        return pd.DataFrame(columns=[
-            "DATA", "MES", "QUINZENA", "NOME", "FORMA PAGAMENTO", "CLASSIFICACAO", "VALOR"
-        ])
-
-    for col in ["FORMA PAGAMENTO", "CLASSIFICACAO", "MES"]:
-        if col not in df.columns:
-            df[col] = ""
-
-    df = df[["DATA", "MES", "NOME", "FORMA PAGAMENTO", "CLASSIFICACAO", "VALOR"]].copy()
-    df["DATA"] = pd.to_datetime(df["DATA"], errors="coerce", dayfirst=True)
-    df["VALOR"] = df["VALOR"].apply(limpar_valor)
-    df = df.dropna(subset=["DATA"])
-    df = df[df["NOME"].astype(str).str.strip() != ""]
-
-    df["CLASSIFICACAO"] = df["CLASSIFICACAO"].apply(classificar_gasto)
-    df["FORMA PAGAMENTO"] = (
-        df["FORMA PAGAMENTO"]
-        .fillna("")
-        .astype(str)
-        .str.strip()
-        .replace({"": "NÃO INFORMADO"})
-    )
-
-    df["QUINZENA"] = df["DATA"].dt.day.apply(lambda x: "1ª quinzena" if x <= 15 else "2ª quinzena")
-    df["ANO"] = df["DATA"].dt.year
-    df["MES_NUM"] = df["DATA"].dt.month
-    df["MES_ABREV"] = df["MES_NUM"].map(MESES_PT)
-    df["MES_ANO"] = df["DATA"].apply(mes_ano_pt)
-
-    mes_limpo = df["MES"].fillna("").astype(str).str.strip().str.upper()
-    df["MES"] = mes_limpo.where(mes_limpo != "", df["MES_ABREV"])
+def carregar_snapshot(url, forcar=False):
+    from cache_compartilhado import baixar_compartilhado
+    from preparo_paralelo import preparar_workbook
+
+    etapas = st.session_state.setdefault("memoria_etapas", {})
+    pool = obter_pool_preparo()
+    with memoria.etapa("snapshot", etapas):
+        with memoria.etapa("download", etapas):
+            conteudo = baixar_compartilhado(obter_buscador(), url, obter_cache_compartilhado(), forcar)
+        with memoria.etapa("preparo", etapas):
+            snapshot = preparar_workbook(
+                conteudo,
+                pool,
+                cache=CACHE.inquilino(PLANILHA_ID),
+                compartilhado=obter_cache_compartilhado(),
+            )
+    if snapshot["pool_quebrado"]:
+        obter_pool_preparo.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return snapshot
 
-    return df.sort_values("DATA", ascending=False)
 
+def registrar_esquemas(snapshot):
+    from dados import comparar_esquemas
 
+    conhecidos = em_cache(("esquemas_conhecidos",), dict)
+    avisos = comparar_esquemas(conhecidos, snapshot["esquemas"])
+    conhecidos.update(snapshot["esquemas"])
+    return list(snapshot["avisos"]) + avisos
 
 
 def render_topbar():
@@ -383,6 +309,96 @@ def render_kpi_cards(cards):
     html += '</div>'
     st.markdown(html, unsafe_allow_html=True)
 
+def mostrar_grafico(fig):
+    st.plotly_chart(compactar_figura(fig, PLOT_THEME), use_container_width=True)
+
+
+def figura_resumo(resumo, projecao=None):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_bar(
+        x=resumo["MES_ANO"],
+        y=resumo["RECEITA"],
+        name="Receita",
+        texttemplate=TEXTO_BRL,
+        textposition="inside",
+        textfont=dict(size=11, color="#f8fafc"),
+        marker=dict(color=COR_RECEITA, line=dict(width=0)),
+        insidetextanchor="middle",
+    )
+    fig.add_bar(
+        x=resumo["MES_ANO"],
+        y=resumo["DESPESA"],
+        name="Despesa",
+        texttemplate=TEXTO_BRL,
+        textposition="inside",
+        textfont=dict(size=11, color="#f8fafc"),
+        marker=dict(color=COR_DESPESA, line=dict(width=0)),
+        insidetextanchor="middle",
+    )
+    fig.add_bar(
+        x=resumo["MES_ANO"],
+        y=resumo["SALDO"],
+        name="Saldo",
+        texttemplate=TEXTO_BRL,
+        textposition="inside",
+        textfont=dict(size=11, color="#081018"),
+        marker=dict(color=COR_SALDO, line=dict(width=0)),
+        insidetextanchor="middle",
+    )
+    if projecao:
+        fig.add_scatter(
+            x=projecao["meses"],
+            y=projecao["mensal"][90],
+            mode="lines",
+            line=dict(width=0),
+            hoverinfo="skip",
+            showlegend=False,
+        )
+        fig.add_scatter(
+            x=projecao["meses"],
+            y=projecao["mensal"][10],
+            name="Saldo provável (p10–p90)",
+            mode="lines",
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor="rgba(114,224,181,0.16)",
+            hoverinfo="skip",
+        )
+        fig.add_scatter(
+            x=projecao["meses"],
+            y=projecao["mensal"][50],
+            name="Saldo projetado (mediana)",
+            mode="lines+markers",
+            line=dict(color=COR_SALDO, width=2, dash="dot"),
+            hovertemplate="<b>%{x}</b><br>Mediana: " + TEXTO_BRL + "<extra></extra>",
+        )
+    fig.update_layout(
+        template=PLOT_THEME,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        barmode="group",
+        bargap=0.24,
+        bargroupgap=0.08,
+        uniformtext_minsize=8,
+        uniformtext_mode="hide",
+        height=455,
+        margin=dict(l=6, r=6, t=10, b=6),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            bgcolor="rgba(0,0,0,0)"
+        ),
+        font=dict(color="#e5edf7", size=12),
+    )
+    fig.update_xaxes(showgrid=False, tickfont=dict(size=11))
+    fig.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
+    return compactar_figura(fig, PLOT_THEME)
+
 # =========================
 # HERO PREMIUM
 # =========================
@@ -391,8 +407,9 @@ render_topbar()
 col_refresh_1, col_refresh_2 = st.columns([1.2, 4.8])
 with col_refresh_1:
     if st.button("🔄 Atualizar agora", use_container_width=True):
-        st.cache_data.clear()
-        st.session_state.refresh_key = str(time.time())
+        CACHE.limpar(PLANILHA_ID, manter=lambda chave: chave[0] in ("aba", "impressoes"))
+        CACHE.inquilino(PLANILHA_ID).nova_geracao()
+        st.session_state.forcar_download = True
         st.rerun()
 with col_refresh_2:
     st.markdown(
@@ -404,38 +421,70 @@ with col_refresh_2:
 # LEITURA
 # =========================
 try:
-    planilhas, nomes_abas = carregar_planilhas(PLANILHA_URL, st.session_state.refresh_key)
+    # a geração é da planilha, não da sessão: abas novas reaproveitam o mesmo snapshot
+    snapshot = em_cache(
+        ("snapshot", CACHE.inquilino(PLANILHA_ID).geracao),
+        lambda: carregar_snapshot(PLANILHA_URL, st.session_state.pop("forcar_download", False)),
+        ttl=60,
+    )
 except Exception as e:
     st.error(f"Erro ao carregar planilha: {e}")
     st.stop()
 
+nomes_abas = snapshot["nomes_abas"]
+versao_snapshot = snapshot["versao"]
+
 if not nomes_abas:
     st.error("Nenhuma aba encontrada na planilha.")
     st.stop()
 
-try:
-    df = planilhas[nomes_abas[0]].copy()
-except Exception as e:
-    st.error(f"Erro ao abrir a aba principal: {e}")
-    st.stop()
+# a aba principal com erro só tira o painel do Atlas: a navegação e o Projeto Morar
+# Sozinho (que vem da aba CUSTO DE VIDA) continuam de pé
+erro_principal = snapshot["erros"].get("principal")
 
-df = normalizar_colunas(df)
+resumo = snapshot["resumo"]
 
-meio = len(df.columns) // 2
-receitas = preparar_base(df.iloc[:, :meio].copy())
-despesas = preparar_base(df.iloc[:, meio:].copy())
+for aviso in em_cache(("avisos_esquema", versao_snapshot), lambda: registrar_esquemas(snapshot)):
+    st.warning(aviso)
 
-# =========================
-# RESUMO
-# =========================
-rec_m = receitas.groupby(["ANO", "MES_NUM", "MES"], as_index=False)["VALOR"].sum().rename(columns={"VALOR": "RECEITA"})
-des_m = despesas.groupby(["ANO", "MES_NUM", "MES"], as_index=False)["VALOR"].sum().rename(columns={"VALOR": "DESPESA"})
+versao_lancamentos = (snapshot["versoes"].get("principal"), snapshot["versoes"].get("gastos"))
+
+def montar_consultas_duckdb():
+    from consultas_duckdb import ConsultasDuckDB
 
-resumo = pd.merge(rec_m, des_m, on=["ANO", "MES_NUM", "MES"], how="outer").fillna(0)
-resumo["SALDO"] = resumo["RECEITA"] - resumo["DESPESA"]
-resumo = resumo.sort_values(["ANO", "MES_NUM"])
-resumo["DATA_CHAVE"] = pd.to_datetime(resumo["ANO"].astype(str) + "-" + resumo["MES_NUM"].astype(str) + "-01")
-resumo["MES_ANO"] = resumo["DATA_CHAVE"].apply(mes_ano_pt)
+    return ConsultasDuckDB(snapshot)
+
+
+consultas = obter_livro(PLANILHA_ID)
+if consultas is not None:
+    try:
+        with memoria.etapa("livro_sqlite", st.session_state.setdefault("memoria_etapas", {})):
+            em_cache(("livro_sincronizado", versao_snapshot), lambda: consultas.sincronizar(snapshot))
+    except Exception as e:
+        st.warning(f"Não consegui atualizar o livro SQLite, seguindo com a planilha em memória. {e}")
+        consultas = None
+
+if USAR_DUCKDB:
+    try:
+        with memoria.etapa("consultas_duckdb", st.session_state.setdefault("memoria_etapas", {})):
+            consultas = em_cache(("consultas_duckdb", versao_snapshot), montar_consultas_duckdb)
+    except ImportError:
+        st.warning("ATLAS_DUCKDB=1, mas o pacote duckdb não está instalado. Seguindo com pandas.")
+
+if consultas is not None:
+    resumo = em_cache(("resumo_consultas", versao_snapshot), consultas.resumo)
+
+mudancas = snapshot["mudancas"]
+if mudancas and any(mudancas.values()):
+    partes = []
+    if mudancas["alteradas"]:
+        partes.append("alteradas: " + ", ".join(mudancas["alteradas"]))
+    if mudancas["novas"]:
+        partes.append("novas: " + ", ".join(mudancas["novas"]))
+    if mudancas["removidas"]:
+        partes.append("removidas: " + ", ".join(mudancas["removidas"]))
+    reaproveitadas = ", ".join(snapshot["reaproveitadas"]) or "nenhuma"
+    st.info(f"📝 O que mudou na planilha — {' • '.join(partes)}. Abas reaproveitadas sem recalcular: {reaproveitadas}.")
 
 # =========================
 # ANO ATUAL
@@ -443,337 +492,74 @@ resumo["MES_ANO"] = resumo["DATA_CHAVE"].apply(mes_ano_pt)
 ano_atual = datetime.now().year
 mes_atual = datetime.now().month
 
-resumo_ano = resumo[resumo["ANO"] == ano_atual]
+from indice_periodos import indicadores_ano
 
-total_receita_ano = resumo_ano["RECEITA"].sum()
-total_despesa_ano = resumo_ano["DESPESA"].sum()
-saldo_ano = resumo_ano["SALDO"].sum()
+indice = snapshot["indice"]
 
-saldo_restante = resumo_ano[resumo_ano["MES_NUM"] > mes_atual]["SALDO"].sum()
+indicadores = indicadores_ano(indice, snapshot["investimento"], ano_atual, mes_atual)
+total_receita_ano = indicadores["receita_ano"]
+total_despesa_ano = indicadores["despesa_ano"]
+saldo_ano = indicadores["saldo_ano"]
+saldo_restante = indicadores["saldo_restante"]
 
-# =========================
-# INVESTIMENTO
-# =========================
-valor_investido = 0.0
-for nome_aba in nomes_abas:
-    if normalizar_texto(nome_aba) == "INVESTIMENTO":
-        try:
-            investimento_df = pd.read_excel(PLANILHA_URL, sheet_name=nome_aba, header=None)
-            valor_investido = limpar_valor(investimento_df.iloc[13, 1])
-        except Exception:
-            valor_investido = 0.0
-        break
 
-patrimonio_em_construcao = saldo_restante + valor_investido
+def calcular_projecao():
+    from projecao import projetar
 
+    return projetar(indice, snapshot["gastos"], ano_atual, mes_atual)
 
 
-def format_pct(v):
-    try:
-        return f"{float(v):.1f}%".replace(".", ",")
-    except Exception:
-        return "0,0%"
+projecao = em_cache(("projecao", versao_lancamentos, ano_atual, mes_atual), calcular_projecao)
 
+# =========================
+# INVESTIMENTO
+# =========================
+valor_investido = indicadores["investido"]
 
-def faixa_percentual(p):
-    try:
-        p = float(p)
-    except Exception:
-        return "—"
-    if p <= 5:
-        return "Leve"
-    elif p <= 15:
-        return "Controlado"
-    elif p <= 30:
-        return "Pesa"
-    return "Muito pesado"
-
-
-def analise_subcategoria(pct_renda, categoria=""):
-    try:
-        p = float(pct_renda)
-    except Exception:
-        p = 0.0
-
-    if p <= 2:
-        return "Impacto bem pequeno na renda. Dá para manter sem drama."
-    elif p <= 5:
-        return "Impacto leve. Bom ponto para pequenos ajustes finos."
-    elif p <= 10:
-        return "Já aparece no orçamento. Vale acompanhar para não crescer no escuro."
-    elif p <= 20:
-        return "Peso relevante. Se apertar, aqui já existe espaço para revisar."
-    elif p <= 30:
-        return "Peso alto na renda. Merece atenção real e comparação de alternativas."
-    else:
-        if normalizar_texto(categoria) == "MORADIA":
-            return "Muito pesado para a renda. Moradia virou o centro do tabuleiro."
-        return "Muito pesado para a renda. Este item domina o orçamento e pede revisão."
-
-
-def parse_money_excel(x):
-    if pd.isna(x):
-        return 0.0
-    if isinstance(x, (int, float)):
-        return float(x)
-    s = str(x).strip()
-    if not s:
-        return 0.0
-    s = s.replace("R$", "").replace("r$", "").replace(" ", "")
-    if "." in s and "," in s:
-        s = s.replace(".", "").replace(",", ".")
-    elif "," in s:
-        s = s.replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return 0.0
-
-
-def encontrar_aba_custo_vida(sheet_names):
-    nomes_normalizados = {normalizar_texto(nome): nome for nome in sheet_names}
-    candidatos = [
-        "CUSTO DE VIDA",
-        "CUSTO_DE_VIDA",
-        "CUSTO VIDA",
-        "PLANEJAMENTO DE CUSTO DE VIDA",
-    ]
-    for cand in candidatos:
-        if cand in nomes_normalizados:
-            return nomes_normalizados[cand]
-    return None
-
-
-@st.cache_data(show_spinner=False, ttl=60)
-def carregar_custo_vida_raw(url, nome_aba, refresh_key):
-    return pd.read_excel(url, sheet_name=nome_aba, header=None)
-
-
-def extrair_projeto_morar_sozinho(df_raw):
-    renda_total = 0.0
-    custos_totais = 0.0
-    sobra_mes = 0.0
-    categoria_atual = None
-    itens = []
-
-    categorias_validas = {"RENDA", "MORADIA", "ALIMENTACAO", "ALIMENTAÇÃO", "TRANSPORTE", "OUTROS"}
-
-    for _, row in df_raw.iterrows():
-        a = str(row.iloc[0]).strip() if len(row) > 0 and pd.notna(row.iloc[0]) else ""
-        b = str(row.iloc[1]).strip() if len(row) > 1 and pd.notna(row.iloc[1]) else ""
-        c = row.iloc[2] if len(row) > 2 else None
-
-        a_up = normalizar_texto(a)
-        b_up = normalizar_texto(b)
-        valor = parse_money_excel(c)
-
-        if "RENDA TOTAL" in a_up:
-            renda_total = valor
-            continue
-        if "CUSTOS TOTAIS" in a_up:
-            custos_totais = valor
-            continue
-        if "SOBRA NO MES" in a_up:
-            sobra_mes = valor
-            continue
-
-        if a_up == "CATEGORIA" and b_up in {"DESCRICAO", "DESCRICAO"}:
-            continue
-
-        if a_up in categorias_validas:
-            categoria_atual = "ALIMENTAÇÃO" if "ALIMENT" in a_up else a_up
-            if b and not b_up.startswith("TOTAL"):
-                itens.append({
-                    "CATEGORIA": categoria_atual,
-                    "SUBCATEGORIA": b,
-                    "VALOR": valor,
-                })
-            continue
-
-        if categoria_atual and b and not b_up.startswith("TOTAL"):
-            itens.append({
-                "CATEGORIA": categoria_atual,
-                "SUBCATEGORIA": b,
-                "VALOR": valor,
-            })
-
-    df_itens = pd.DataFrame(itens)
-    if df_itens.empty:
-        return {
-            "renda_total": renda_total,
-            "custos_totais": custos_totais,
-            "sobra_mes": sobra_mes,
-            "df_itens": pd.DataFrame(columns=["CATEGORIA", "SUBCATEGORIA", "VALOR"]),
-            "df_cat": pd.DataFrame(columns=["CATEGORIA", "VALOR"]),
-        }
-
-    df_itens["SUBCATEGORIA"] = df_itens["SUBCATEGORIA"].fillna("").astype(str).str.strip()
-    df_itens["VALOR"] = df_itens["VALOR"].fillna(0.0).astype(float)
-    df_itens = df_itens[df_itens["SUBCATEGORIA"] != ""].copy()
-
-    if renda_total <= 0:
-        renda_total = df_itens.loc[df_itens["CATEGORIA"] == "RENDA", "VALOR"].sum()
-    if custos_totais <= 0:
-        custos_totais = df_itens.loc[df_itens["CATEGORIA"] != "RENDA", "VALOR"].sum()
-    if renda_total > 0 and sobra_mes == 0:
-        sobra_mes = renda_total - custos_totais
-
-    df_cat = df_itens.groupby("CATEGORIA", as_index=False)["VALOR"].sum()
-
-    mapa_cat = df_cat.set_index("CATEGORIA")["VALOR"].to_dict()
-    df_itens["TOTAL_CATEGORIA"] = df_itens["CATEGORIA"].map(mapa_cat).fillna(0.0)
-
-    if renda_total > 0:
-        df_itens["PCT_RENDA"] = (df_itens["VALOR"] / renda_total) * 100
-        df_cat["PCT_RENDA"] = (df_cat["VALOR"] / renda_total) * 100
-        pct_sobra = (sobra_mes / renda_total) * 100
-    else:
-        df_itens["PCT_RENDA"] = 0.0
-        df_cat["PCT_RENDA"] = 0.0
-        pct_sobra = 0.0
-
-    df_itens["PCT_CATEGORIA"] = (
-        df_itens["VALOR"] / df_itens["TOTAL_CATEGORIA"].replace(0, pd.NA) * 100
-    ).fillna(0.0)
-
-    df_itens["VALOR_FMT"] = df_itens["VALOR"].apply(formato_real)
-    df_itens["PCT_RENDA_FMT"] = df_itens["PCT_RENDA"].apply(format_pct)
-    df_itens["PCT_CATEGORIA_FMT"] = df_itens["PCT_CATEGORIA"].apply(format_pct)
-    df_itens["FAIXA"] = df_itens["PCT_RENDA"].apply(faixa_percentual)
-    df_itens["ANALISE"] = df_itens.apply(
-        lambda r: analise_subcategoria(r["PCT_RENDA"], r["CATEGORIA"]),
-        axis=1
-    )
+patrimonio_em_construcao = indicadores["patrimonio_em_construcao"]
 
-    df_cat["VALOR_FMT"] = df_cat["VALOR"].apply(formato_real)
-    df_cat["PCT_RENDA_FMT"] = df_cat["PCT_RENDA"].apply(format_pct)
-    df_cat["FAIXA"] = df_cat["PCT_RENDA"].apply(faixa_percentual)
-
-    return {
-        "renda_total": renda_total,
-        "custos_totais": custos_totais,
-        "sobra_mes": sobra_mes,
-        "pct_sobra": pct_sobra,
-        "df_itens": df_itens,
-        "df_cat": df_cat,
-    }
+if projecao:
+    faixa_restante = projecao["acumulado"]
+    dica_saldo_restante = f"Faixa provável (p10–p90): {formato_real(faixa_restante[10])} a {formato_real(faixa_restante[90])}."
+    dica_patrimonio = (
+        f"Faixa provável: {formato_real(faixa_restante[10] + valor_investido)}"
+        f" a {formato_real(faixa_restante[90] + valor_investido)}."
+    )
+else:
+    dica_saldo_restante = "Projeção do que ainda pode sobrar nos meses à frente."
+    dica_patrimonio = "Saldo restante somado ao que já está investido."
 
-# =========================
-# TABS
-# =========================
 
 
 # =========================
-# NAVEGAÇÃO PREMIUM
+# SEÇÕES COM RERUN PARCIAL
 # =========================
-if "atlas_nav" not in st.session_state:
-    st.session_state.atlas_nav = "🌙 Atlas Financeiro"
+fragmento = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
 
-NAV_OPTS = ["🌙 Atlas Financeiro", "🏠 Projeto Morar Sozinho"]
-nav_index = NAV_OPTS.index(st.session_state.atlas_nav) if st.session_state.atlas_nav in NAV_OPTS else 0
-st.radio(
-    "Navegação",
-    options=NAV_OPTS,
-    index=nav_index,
-    key="atlas_nav",
-    horizontal=True,
-    label_visibility="collapsed",
-)
 
-nav = st.session_state.atlas_nav
+def medido(nome):
+    def decorar(f):
+        if not MEDIR_TEMPOS and not MEDIR_MEMORIA:
+            return f
 
-if nav == "🌙 Atlas Financeiro":
-    # =========================
-    # MÉTRICAS
-    # =========================
-    st.markdown("""
-    <div class="section-head">
-        <div class="section-title">Visão do ano</div>
-        <div class="section-sub">Os números grandes primeiro. Clareza antes de pressa.</div>
-    </div>
-    """, unsafe_allow_html=True)
+        @functools.wraps(f)
+        def medir(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                with memoria.etapa(nome, st.session_state.setdefault("memoria_etapas", {})):
+                    return f(*args, **kwargs)
+            finally:
+                st.session_state.setdefault("tempos_secoes", {})[nome] = time.perf_counter() - inicio
+        return medir
+    return decorar
 
-    render_kpi_cards([
-        {"label": "Receita no ano", "value": formato_real(total_receita_ano), "hint": "Tudo que entrou no ano atual."},
-        {"label": "Despesa no ano", "value": formato_real(total_despesa_ano), "hint": "Tudo que saiu no ano atual."},
-        {"label": "Saldo no ano", "value": formato_real(saldo_ano), "hint": "Receita menos despesa, sem teatro."},
-        {"label": "Saldo restante", "value": formato_real(saldo_restante), "hint": "Projeção do que ainda pode sobrar nos meses à frente."},
-        {"label": "Investido", "value": formato_real(valor_investido), "hint": "Valor puxado da aba de investimento."},
-        {"label": "Total em construção", "value": formato_real(patrimonio_em_construcao), "hint": "Saldo restante somado ao que já está investido."},
-    ])
 
-    st.markdown('<div class="small-gap"></div>', unsafe_allow_html=True)
+@fragmento
+@medido("secao_raio_x")
+def secao_raio_x(resumo, ranking_despesas, consultas=None):
+    from ranking import com_outros
 
-    # =========================
-    # GRÁFICO GERAL
-    # =========================
-    st.markdown("""
-    <div class="section-head">
-        <div class="section-title">📊 Balanço Financeiro Geral</div>
-        <div class="section-sub">Receitas, despesas e saldo mês a mês.</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    fig = go.Figure()
-    fig.add_bar(
-        x=resumo["MES_ANO"],
-        y=resumo["RECEITA"],
-        name="Receita",
-        text=resumo["RECEITA"].apply(formato_real),
-        textposition="inside",
-        textfont=dict(size=11, color="#f8fafc"),
-        marker=dict(color=COR_RECEITA, line=dict(width=0)),
-        insidetextanchor="middle",
-    )
-    fig.add_bar(
-        x=resumo["MES_ANO"],
-        y=resumo["DESPESA"],
-        name="Despesa",
-        text=resumo["DESPESA"].apply(formato_real),
-        textposition="inside",
-        textfont=dict(size=11, color="#f8fafc"),
-        marker=dict(color=COR_DESPESA, line=dict(width=0)),
-        insidetextanchor="middle",
-    )
-    fig.add_bar(
-        x=resumo["MES_ANO"],
-        y=resumo["SALDO"],
-        name="Saldo",
-        text=resumo["SALDO"].apply(formato_real),
-        textposition="inside",
-        textfont=dict(size=11, color="#081018"),
-        marker=dict(color=COR_SALDO, line=dict(width=0)),
-        insidetextanchor="middle",
-    )
-    fig.update_layout(
-        template=PLOT_THEME,
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        barmode="group",
-        bargap=0.24,
-        bargroupgap=0.08,
-        uniformtext_minsize=8,
-        uniformtext_mode="hide",
-        height=455,
-        margin=dict(l=6, r=6, t=10, b=6),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1,
-            bgcolor="rgba(0,0,0,0)"
-        ),
-        font=dict(color="#e5edf7", size=12),
-    )
-    fig.update_xaxes(showgrid=False, tickfont=dict(size=11))
-    fig.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
-    st.plotly_chart(fig, use_container_width=True)
-
-    # =========================
-    # SELECTBOX DINÂMICO (PRÓXIMO MÊS)
-    # =========================
-    st.markdown("---")
+    import plotly.graph_objects as go
 
     if mes_atual == 12:
         prox_mes = 1
@@ -800,35 +586,34 @@ if nav == "🌙 Atlas Financeiro":
         mes_txt, ano_sel = mes_sel.split("/")
         ano_sel = int(ano_sel)
 
-        rec_mes = receitas[(receitas["ANO"] == ano_sel) & (receitas["MES"] == mes_txt)]
-        des_mes = despesas[(despesas["ANO"] == ano_sel) & (despesas["MES"] == mes_txt)]
+        if consultas is not None:
+            linha_mes = consultas.resumo_mes(ano_sel, mes_txt)
+            top_despesas = consultas.top_despesas(ano_sel, mes_txt)
+        else:
+            linha_mes = resumo[resumo["MES_ANO"] == mes_sel].iloc[0]
+            top_despesas = ranking_despesas.get((ano_sel, mes_txt))
 
         render_kpi_cards([
-            {"label": "Receitas", "value": formato_real(rec_mes["VALOR"].sum()), "hint": f"Entradas do mês {mes_sel}."},
-            {"label": "Despesas", "value": formato_real(des_mes["VALOR"].sum()), "hint": f"Saídas do mês {mes_sel}."},
-            {"label": "Saldo", "value": formato_real(rec_mes["VALOR"].sum() - des_mes["VALOR"].sum()), "hint": "O que sobrou depois da poeira baixar."},
+            {"label": "Receitas", "value": formato_real(linha_mes["RECEITA"]), "hint": f"Entradas do mês {mes_sel}."},
+            {"label": "Despesas", "value": formato_real(linha_mes["DESPESA"]), "hint": f"Saídas do mês {mes_sel}."},
+            {"label": "Saldo", "value": formato_real(linha_mes["SALDO"]), "hint": "O que sobrou depois da poeira baixar."},
         ])
 
         st.markdown('<div class="small-gap"></div>', unsafe_allow_html=True)
         st.markdown("#### 💸 Despesas do mês selecionado")
 
-        if not des_mes.empty:
-            despesas_total = (
-                des_mes.groupby("DESCRICAO", as_index=False)["VALOR"]
-                .sum()
-                .sort_values("VALOR", ascending=False)
-                .head(12)
-            )
+        if top_despesas is not None:
+            nomes_despesas, valores_despesas = com_outros(top_despesas)
 
             fig2 = go.Figure(go.Bar(
-                x=despesas_total["DESCRICAO"],
-                y=despesas_total["VALOR"],
-                text=despesas_total["VALOR"].apply(formato_real),
+                x=nomes_despesas,
+                y=valores_despesas,
+                texttemplate=TEXTO_BRL,
                 textposition="inside",
                 textfont=dict(size=11, color="#081018"),
                 insidetextanchor="middle",
                 marker=dict(color=COR_DESTAQUE, line=dict(width=0)),
-                hovertemplate="<b>%{x}</b><br>%{text}<extra></extra>",
+                hovertemplate=HOVER_BRL,
             ))
             fig2.update_layout(
                 template=PLOT_THEME,
@@ -844,36 +629,110 @@ if nav == "🌙 Atlas Financeiro":
             )
             fig2.update_xaxes(showgrid=False)
             fig2.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
-            st.plotly_chart(fig2, use_container_width=True)
+            mostrar_grafico(fig2)
         else:
             st.info("Sem despesas neste mês.")
     else:
         st.info("Não encontrei meses válidos na base principal.")
 
-    # =========================
-    # GASTOS VARIÁVEIS
-    # =========================
-    st.markdown("---")
+
+def variacao_pct(atual, anterior):
+    if not anterior:
+        return "sem base no ano anterior"
+    return f"{format_pct((atual - anterior) / abs(anterior) * 100)} vs mesmo período do ano anterior"
+
+
+@fragmento
+@medido("secao_periodo")
+def secao_periodo(indice):
+    from indice_periodos import mesmo_periodo_ano_anterior
 
     st.markdown("""
     <div class="section-head">
-        <div class="section-title">🧾 Gastos variáveis</div>
-        <div class="section-sub">O que escapa dos gastos fixos aparece aqui.</div>
+        <div class="section-title">🗓️ Período personalizado</div>
+        <div class="section-sub">Qualquer intervalo de datas, somado na hora, com comparação ao ano anterior.</div>
     </div>
     """, unsafe_allow_html=True)
 
-    aba_gastos = encontrar_aba_gastos(nomes_abas)
+    hoje = date.today()
+    periodo = st.date_input(
+        "Escolha o período",
+        value=(date(hoje.year, 1, 1), hoje),
+        format="DD/MM/YYYY",
+    )
+    if not isinstance(periodo, (list, tuple)) or len(periodo) != 2:
+        st.info("Escolha a data final do período.")
+        return
+
+    de, ate = periodo
+    totais = indice.totais(de, ate)
+    anteriores = indice.totais(*mesmo_periodo_ano_anterior(de, ate))
+    saldo = totais["RECEITA"] - totais["DESPESA"]
+    saldo_anterior = anteriores["RECEITA"] - anteriores["DESPESA"]
+
+    cards = [
+        {"label": "Receitas", "value": formato_real(totais["RECEITA"]), "hint": variacao_pct(totais["RECEITA"], anteriores["RECEITA"])},
+        {"label": "Despesas", "value": formato_real(totais["DESPESA"]), "hint": variacao_pct(totais["DESPESA"], anteriores["DESPESA"])},
+        {"label": "Saldo", "value": formato_real(saldo), "hint": variacao_pct(saldo, saldo_anterior)},
+    ]
+    if "GASTOS" in totais:
+        cards.append({"label": "Gastos variáveis", "value": formato_real(totais["GASTOS"]), "hint": variacao_pct(totais["GASTOS"], anteriores["GASTOS"])})
+    render_kpi_cards(cards)
+
+
+COLUNAS_EXPORTACAO = {
+    "Despesas": ["DATA", "DESCRICAO", "VALOR"],
+    "Receitas": ["DATA", "DESCRICAO", "VALOR"],
+    "Gastos variáveis": ["DATA", "MES", "QUINZENA", "NOME", "FORMA PAGAMENTO", "CLASSIFICACAO", "VALOR"],
+}
+
+
+def nome_arquivo_seguro(*partes):
+    return "_".join(re.sub(r"\W+", "-", str(p).lower()).strip("-") for p in partes)
+
+
+def botao_exportacao(base, linhas, colunas, nome_arquivo, chave):
+    from exportacao import FORMATOS, exportar, lotes
+
+    colx1, colx2 = st.columns([1.4, 1])
+    with colx1:
+        formato = st.radio("Formato", list(FORMATOS), horizontal=True, key=f"formato_{chave}")
+    extensao, mime = FORMATOS[formato]
+    with colx2:
+        st.download_button(
+            f"⬇️ Baixar {formato}",
+            data=lambda: exportar(formato, *lotes(base, linhas, colunas)),
+            file_name=f"{nome_arquivo}.{extensao}",
+            mime=mime,
+            on_click="ignore",
+            key=f"baixar_{chave}",
+        )
+
+
+@fragmento
+@medido("secao_gastos")
+def secao_gastos(snapshot, consultas=None):
+    import numpy as np
+    import plotly.graph_objects as go
+    from ranking import com_outros, totais_classificacao
+    from tabelas_arrow import fatiar, tabela_gastos
+
+    aba_gastos = snapshot["aba_gastos"]
 
     if not aba_gastos:
         st.info("Não encontrei uma aba de gastos variáveis. Crie uma aba como GASTOS e use colunas como DATA, MÊS, NOME, FORMA PAGAMENTO, CLASSIFICAÇÃO e VALOR.")
     else:
-        gastos_raw = planilhas.get(aba_gastos, pd.DataFrame())
-        gastos = preparar_gastos(gastos_raw)
+        gastos = snapshot["gastos"]
 
-        if gastos.empty:
+        if "gastos" in snapshot["erros"]:
+            st.warning(f"Encontrei a aba '{aba_gastos}', mas não consegui montar a base de gastos. {snapshot['erros']['gastos']}")
+        elif gastos is None or gastos.empty:
             st.warning(f"Encontrei a aba '{aba_gastos}', mas não consegui montar a base de gastos. Confere se ela tem pelo menos DATA, NOME e VALOR.")
         else:
-            meses_gastos = sorted(gastos["MES_ANO"].dropna().unique().tolist(), reverse=True)
+            if consultas is not None:
+                meses_gastos = sorted(consultas.meses_gastos(), reverse=True)
+            else:
+                meses_gastos = sorted(gastos["MES_ANO"].dropna().unique().tolist(), reverse=True)
             mes_padrao = mes_ano_pt(datetime.now())
             idx_mes_gasto = meses_gastos.index(mes_padrao) if mes_padrao in meses_gastos else 0
 
@@ -890,24 +749,32 @@ if nav == "🌙 Atlas Financeiro":
                 unsafe_allow_html=True,
             )
 
-            gastos_filt = gastos[gastos["MES_ANO"] == mes_gasto_sel].copy()
+            classif_codigo = {"Indispensável 👍": "INDISPENSAVEL", "Dispensável 👎": "DISPENSAVEL"}.get(classif_sel, "Todos")
+
+            if consultas is not None:
+                gastos_filt = consultas.gastos_filtrados(mes_gasto_sel, quinzena_sel, classif_codigo)
+                top_itens = consultas.top_gastos(mes_gasto_sel, quinzena_sel, classif_codigo)
+                por_classificacao = consultas.totais_classificacao(mes_gasto_sel, quinzena_sel, classif_codigo)
+                tabela_filtrada = tabela_gastos(gastos_filt)
+            else:
+                mascara_gastos = (gastos["MES_ANO"] == mes_gasto_sel).to_numpy(copy=True)
 
-            if quinzena_sel != "Todas":
-                gastos_filt = gastos_filt[gastos_filt["QUINZENA"] == quinzena_sel].copy()
+                if quinzena_sel != "Todas":
+                    mascara_gastos &= (gastos["QUINZENA"] == quinzena_sel).to_numpy()
 
-            if classif_sel == "Indispensável 👍":
-                gastos_filt = gastos_filt[gastos_filt["CLASSIFICACAO"] == "INDISPENSAVEL"].copy()
-            elif classif_sel == "Dispensável 👎":
-                gastos_filt = gastos_filt[gastos_filt["CLASSIFICACAO"] == "DISPENSAVEL"].copy()
+                if classif_codigo != "Todos":
+                    mascara_gastos &= (gastos["CLASSIFICACAO"] == classif_codigo).to_numpy()
 
-            total_gastos = gastos_filt["VALOR"].sum()
-            qtd_lanc = len(gastos_filt)
-            total_indisp = gastos_filt.loc[
-                gastos_filt["CLASSIFICACAO"].astype(str).str.upper() == "INDISPENSAVEL", "VALOR"
-            ].sum()
-            total_disp = gastos_filt.loc[
-                gastos_filt["CLASSIFICACAO"].astype(str).str.upper() == "DISPENSAVEL", "VALOR"
-            ].sum()
+                gastos_filt = gastos[mascara_gastos]
+                top_itens = snapshot["ranking_gastos"].get((mes_gasto_sel, quinzena_sel, classif_codigo))
+                por_classificacao = totais_classificacao(gastos_filt)
+                tabela_filtrada = fatiar(snapshot["tabela_gastos"], mascara_gastos)
+
+            total_por_codigo = dict(zip(por_classificacao["CLASSIFICACAO"], por_classificacao["VALOR"]))
+            total_gastos = por_classificacao["VALOR"].sum()
+            qtd_lanc = int(por_classificacao["LANCAMENTOS"].sum())
+            total_indisp = total_por_codigo.get("INDISPENSAVEL", 0.0)
+            total_disp = total_por_codigo.get("DISPENSAVEL", 0.0)
 
             render_kpi_cards([
                 {"label": "Total no período", "value": formato_real(total_gastos), "hint": "Soma dos gastos no filtro atual."},
@@ -920,20 +787,15 @@ if nav == "🌙 Atlas Financeiro":
 
             with gc1:
                 st.markdown("#### 📊 Gastos por classificação")
-                if gastos_filt.empty:
+                if por_classificacao.empty:
                     st.info("Sem gastos nesse filtro.")
                 else:
-                    classif = gastos_filt.copy()
-                    classif["CLASSIFICACAO_LABEL"] = classif["CLASSIFICACAO"].replace({
+                    graf_class = por_classificacao.dropna(subset=["CLASSIFICACAO"]).copy()
+                    graf_class["CLASSIFICACAO_LABEL"] = graf_class["CLASSIFICACAO"].replace({
                         "INDISPENSAVEL": "👍 Indispensável",
                         "DISPENSAVEL": "👎 Dispensável",
                         "SEM CLASSIFICACAO": "Sem classificação",
                     })
-                    graf_class = (
-                        classif.groupby("CLASSIFICACAO_LABEL", as_index=False)["VALOR"]
-                        .sum()
-                        .sort_values("VALOR", ascending=False)
-                    )
 
                     cores_classificacao = []
                     for item in graf_class["CLASSIFICACAO_LABEL"]:
@@ -947,12 +809,12 @@ if nav == "🌙 Atlas Financeiro":
                     fig3 = go.Figure(go.Bar(
                         x=graf_class["CLASSIFICACAO_LABEL"],
                         y=graf_class["VALOR"],
-                        text=graf_class["VALOR"].apply(formato_real),
+                        texttemplate=TEXTO_BRL,
                         textposition="inside",
                         insidetextanchor="middle",
                         textfont=dict(size=13, color="#081018"),
                         marker=dict(color=cores_classificacao, line=dict(width=0)),
-                        hovertemplate="<b>%{x}</b><br>%{text}<extra></extra>",
+                        hovertemplate=HOVER_BRL,
                     ))
                     fig3.update_layout(
                         template=PLOT_THEME,
@@ -968,29 +830,24 @@ if nav == "🌙 Atlas Financeiro":
                     )
                     fig3.update_xaxes(showgrid=False)
                     fig3.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
-                    st.plotly_chart(fig3, use_container_width=True)
+                    mostrar_grafico(fig3)
 
             with gc2:
                 st.markdown("#### 🧩 Seus gastos item por item")
-                if gastos_filt.empty:
+                if top_itens is None:
                     st.info("Sem gastos nesse filtro.")
                 else:
-                    graf_itens = (
-                        gastos_filt.groupby("NOME", as_index=False)["VALOR"]
-                        .sum()
-                        .sort_values("VALOR", ascending=False)
-                        .head(12)
-                    )
+                    nomes_itens, valores_itens = com_outros(top_itens)
 
                     fig4 = go.Figure(go.Bar(
-                        x=graf_itens["NOME"],
-                        y=graf_itens["VALOR"],
-                        text=graf_itens["VALOR"].apply(formato_real),
+                        x=nomes_itens,
+                        y=valores_itens,
+                        texttemplate=TEXTO_BRL,
                         textposition="inside",
                         insidetextanchor="middle",
                         textfont=dict(size=12, color="#f8fafc"),
                         marker=dict(color=COR_RECEITA, line=dict(width=0)),
-                        hovertemplate="<b>%{x}</b><br>%{text}<extra></extra>",
+                        hovertemplate=HOVER_BRL,
                     ))
                     fig4.update_layout(
                         template=PLOT_THEME,
@@ -1006,37 +863,627 @@ if nav == "🌙 Atlas Financeiro":
                     )
                     fig4.update_xaxes(showgrid=False)
                     fig4.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
-                    st.plotly_chart(fig4, use_container_width=True)
+                    mostrar_grafico(fig4)
 
             st.markdown("#### 📋 Tabela de gastos")
-            tabela_gastos = gastos_filt.copy()
-            tabela_gastos["DATA"] = tabela_gastos["DATA"].dt.strftime("%d/%m/%Y")
-            tabela_gastos["CLASSIFICACAO"] = tabela_gastos["CLASSIFICACAO"].replace({
-                "INDISPENSAVEL": "👍 Indispensável",
-                "DISPENSAVEL": "👎 Dispensável",
-                "SEM CLASSIFICACAO": "Sem classificação",
-            })
-            tabela_gastos["VALOR_FMT"] = tabela_gastos["VALOR"].map(formato_real)
-            tabela_gastos = tabela_gastos.rename(columns={
-                "DATA": "Data",
-                "MES": "Mês",
-                "QUINZENA": "Quinzena",
-                "NOME": "Nome",
-                "FORMA PAGAMENTO": "Forma pagamento",
-                "CLASSIFICACAO": "Classificação",
-            })
-
             st.dataframe(
-                tabela_gastos[[
-                    "Data", "Mês", "Quinzena", "Nome", "Forma pagamento", "Classificação", "VALOR_FMT"
-                ]].rename(columns={"VALOR_FMT": "Valor"}),
+                tabela_filtrada,
                 use_container_width=True,
                 hide_index=True,
             )
 
+            if consultas is not None:
+                base_exportacao, linhas_exportacao = gastos_filt, None
+            else:
+                base_exportacao, linhas_exportacao = gastos, np.flatnonzero(mascara_gastos)
+            botao_exportacao(
+                base_exportacao,
+                linhas_exportacao,
+                COLUNAS_EXPORTACAO["Gastos variáveis"],
+                nome_arquivo_seguro("gastos", mes_gasto_sel, quinzena_sel, classif_codigo),
+                "gastos_filtro",
+            )
+
+
+@fragmento
+@medido("secao_exportacao")
+def secao_exportacao(snapshot):
+    import numpy as np
+
+    bases = {
+        nome: df
+        for nome, df in (("Despesas", snapshot["despesas"]), ("Receitas", snapshot["receitas"]), ("Gastos variáveis", snapshot["gastos"]))
+        if df is not None and not df.empty
+    }
+    if not bases:
+        st.info("Nada para exportar ainda.")
+        return
+
+    cole1, cole2 = st.columns([1.4, 1])
+    with cole1:
+        nome_base = st.selectbox("Base", list(bases), key="exportacao_base")
+    base = bases[nome_base]
+    anos = sorted(base["ANO"].dropna().unique().tolist(), reverse=True)
+    with cole2:
+        ano = st.selectbox("Ano", anos, index=anos.index(ano_atual) if ano_atual in anos else 0, key="exportacao_ano")
+
+    linhas = np.flatnonzero((base["ANO"] == ano).to_numpy())
+    st.markdown(
+        f'<div class="soft-note">{len(linhas)} lançamentos em {ano}. O arquivo é gerado em lotes só quando você clica em baixar.</div>',
+        unsafe_allow_html=True,
+    )
+    botao_exportacao(base, linhas, COLUNAS_EXPORTACAO[nome_base], nome_arquivo_seguro(nome_base, ano), "ano")
+
+
+@fragmento
+@medido("secao_simulacao")
+def secao_simulacao(sobra_mes, renda_total):
+    st.markdown("#### 🛠️ Simulação rápida")
+    ajuste = st.slider(
+        "Se você reduzisse seus custos mensais, quanto conseguiria cortar?",
+        min_value=0,
+        max_value=1000,
+        value=200,
+        step=10,
+    )
+    nova_sobra = sobra_mes + ajuste
+    novo_pct_sobra = (nova_sobra / renda_total * 100) if renda_total > 0 else 0
+
+    s1, s2 = st.columns(2)
+    s1.metric("Nova sobra estimada", formato_real(nova_sobra))
+    s2.metric("Nova sobra em % da renda", format_pct(novo_pct_sobra))
+
+    st.markdown(
+        f'<div class="soft-note">Com um ajuste de <b>{formato_real(ajuste)}</b> por mês, sua sobra iria para <b>{formato_real(nova_sobra)}</b>, o que representa <b>{format_pct(novo_pct_sobra)}</b> da renda.</div>',
+        unsafe_allow_html=True,
+    )
+
+
+@fragmento
+@medido("secao_cenarios")
+def secao_cenarios(projeto, versao):
+    import numpy as np
+    import plotly.graph_objects as go
+    from cenarios import avaliar, base_cenarios, fronteira_equilibrio, histograma, resumo_cenarios, sortear_choques
+
+    st.markdown("#### 🎲 Cenários: e se…?")
+    st.markdown(
+        '<div class="soft-note">Milhares de cenários de uma vez: aluguel, renda e custos variando ao mesmo tempo.</div>',
+        unsafe_allow_html=True,
+    )
+
+    base = em_cache(("base_cenarios", versao), lambda: base_cenarios(projeto))
+    teto_aluguel = int(max(base["aluguel"] * 2, 1000) // 50 * 50)
+
+    e1, e2 = st.columns(2)
+    with e1:
+        aluguel = st.slider("Aluguel (R$)", 0, teto_aluguel, int(base["aluguel"]), step=50)
+        ajuste_renda = st.slider("Variação da renda (%)", -50, 50, 0, step=5)
+    with e2:
+        incerteza_custos = st.slider("Incerteza nos custos (± %)", 0, 50, 10, step=5)
+        incerteza_renda = st.slider("Incerteza na renda (± %)", 0, 50, 5, step=5)
+    qtd_cenarios = st.select_slider("Cenários simulados", options=[1_000, 10_000, 100_000], value=10_000)
+
+    choques = em_cache(
+        ("choques_cenarios", qtd_cenarios, len(base["valores"])),
+        lambda: sortear_choques(qtd_cenarios, len(base["valores"])),
+    )
+    renda, custos, sobra = avaliar(
+        base,
+        choques,
+        aluguel=aluguel,
+        ajuste_renda=ajuste_renda / 100,
+        incerteza_custos=incerteza_custos / 100,
+        incerteza_renda=incerteza_renda / 100,
+    )
+    resumo_sim = resumo_cenarios(custos, sobra)
+
+    def meses_txt(meses):
+        return "nunca" if not np.isfinite(meses) else f"{int(meses)} meses"
+
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Sobra típica (mediana)", formato_real(resumo_sim["sobra"][50]))
+    k2.metric("Sobra no cenário ruim (p10)", formato_real(resumo_sim["sobra"][10]))
+    k3.metric("Cenários no vermelho", format_pct(resumo_sim["pct_negativos"]))
+    k4.metric("Reserva de 6 meses em", meses_txt(resumo_sim["meses_reserva"][50]))
+
+    h1, h2 = st.columns(2)
+    with h1:
+        st.markdown("##### Distribuição da sobra")
+        centros, contagens = histograma(sobra)
+        fig_hist = go.Figure(go.Bar(
+            x=centros,
+            y=contagens,
+            marker=dict(color=[COR_SALDO if c >= 0 else COR_DESPESA for c in centros], line=dict(width=0)),
+            hovertemplate="Sobra ~ R$ %{x:,.0f}<br>%{y} cenários<extra></extra>",
+        ))
+        fig_hist.update_layout(
+            template=PLOT_THEME,
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)",
+            height=300,
+            margin=dict(l=10, r=10, t=10, b=10),
+            bargap=0.05,
+            font=dict(color="#e5edf7", size=12),
+            showlegend=False,
+        )
+        fig_hist.update_xaxes(showgrid=False)
+        fig_hist.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
+        mostrar_grafico(fig_hist)
+
+    with h2:
+        st.markdown("##### Fronteira de equilíbrio")
+        alugueis = np.linspace(0, teto_aluguel, 30)
+        fronteira = fronteira_equilibrio(base, choques, alugueis, incerteza_custos=incerteza_custos / 100)
+        renda_central = base["renda"] * (1 + ajuste_renda / 100)
+        fig_fronteira = go.Figure()
+        fig_fronteira.add_trace(go.Scatter(
+            x=alugueis, y=fronteira[90], name="Renda p/ fechar em 90% dos cenários",
+            mode="lines", line=dict(color=COR_DESPESA, width=2, dash="dot"),
+        ))
+        fig_fronteira.add_trace(go.Scatter(
+            x=alugueis, y=fronteira[50], name="Renda p/ empatar (mediana)",
+            mode="lines", line=dict(color=COR_DESTAQUE, width=3),
+        ))
+        fig_fronteira.add_trace(go.Scatter(
+            x=[aluguel], y=[renda_central], name="Seu cenário",
+            mode="markers", marker=dict(color=COR_SALDO, size=12),
+        ))
+        fig_fronteira.update_layout(
+            template=PLOT_THEME,
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)",
+            height=300,
+            margin=dict(l=10, r=10, t=10, b=10),
+            xaxis_title="Aluguel (R$)",
+            yaxis_title="Renda (R$)",
+            font=dict(color="#e5edf7", size=12),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0),
+        )
+        fig_fronteira.update_xaxes(showgrid=False)
+        fig_fronteira.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
+        mostrar_grafico(fig_fronteira)
+
+
+@fragmento
+@medido("secao_busca")
+def secao_busca(snapshot):
+    import plotly.graph_objects as go
+    from busca import IndiceBusca
+
+    termo = st.text_input("🔎 Buscar lançamento", placeholder="ex.: ifood, aluguel, uber…")
+    if not termo.strip():
+        st.markdown(
+            '<div class="soft-note">Procura em todas as despesas e gastos, de todos os meses.</div>',
+            unsafe_allow_html=True,
+        )
+        return
+
+    indice_busca = em_cache(
+        ("indice_busca", snapshot["versoes"].get("principal"), snapshot["versoes"].get("gastos")),
+        lambda: IndiceBusca([
+            ("Despesa fixa", snapshot["despesas"], "DESCRICAO"),
+            ("Gasto variável", snapshot["gastos"], "NOME"),
+        ]),
+    )
+    achados = indice_busca.buscar(termo)
+    if not len(achados["linhas"]):
+        st.info(f"Nada encontrado para “{termo.strip()}”.")
+        return
+
+    meses_com = int((achados["por_mes"] > 0).sum())
+    b1, b2, b3 = st.columns(3)
+    b1.metric("Total encontrado", formato_real(achados["total"]))
+    b2.metric("Lançamentos", str(len(achados["linhas"])))
+    b3.metric("Média por mês com gasto", formato_real(achados["total"] / meses_com if meses_com else 0))
+
+    fig_busca = go.Figure(go.Scatter(
+        x=achados["meses"].astype("datetime64[D]").astype(object),
+        y=achados["por_mes"],
+        mode="lines",
+        fill="tozeroy",
+        line=dict(color=COR_DESTAQUE, width=2),
+        fillcolor="rgba(180,151,255,0.18)",
+        hovertemplate="%{x|%m/%Y}<br>" + TEXTO_BRL + "<extra></extra>",
+    ))
+    fig_busca.update_layout(
+        template=PLOT_THEME,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        height=140,
+        margin=dict(l=6, r=6, t=6, b=6),
+        showlegend=False,
+        font=dict(color="#e5edf7", size=11),
+    )
+    fig_busca.update_xaxes(showgrid=False)
+    fig_busca.update_yaxes(showgrid=False, zeroline=False, showticklabels=False)
+    mostrar_grafico(fig_busca)
+
+    tabela = indice_busca.tabela(achados["linhas"])
+    tabela["DATA"] = tabela["DATA"].dt.strftime("%d/%m/%Y")
+    tabela["VALOR"] = tabela["VALOR"].apply(formato_real)
+    if len(achados["linhas"]) > len(tabela):
+        st.caption(f"Mostrando os {len(tabela)} lançamentos mais recentes de {len(achados['linhas'])}.")
+    st.dataframe(
+        tabela.rename(columns={"DATA": "Data", "DESCRICAO": "Descrição", "ORIGEM": "Origem", "VALOR": "Valor"}),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+@fragmento
+@medido("secao_calendario")
+def secao_calendario(snapshot):
+    import numpy as np
+    import plotly.graph_objects as go
+    from calendario import DIAS_SEMANA, bins_diarios, grade_semanal
+
+    gastos = snapshot["gastos"]
+    if gastos is None or gastos.empty:
+        st.info("Sem gastos variáveis para montar o calendário.")
+        return
+
+    dimensoes = {"Total": None, "Classificação": "CLASSIFICACAO", "Forma de pagamento": "FORMA PAGAMENTO"}
+    colc1, colc2, colc3 = st.columns([1, 1.2, 1])
+    with colc1:
+        dimensao = st.selectbox("Agrupar por", list(dimensoes), key="calendario_dimensao")
+    bins = em_cache(
+        ("calendario", snapshot["versoes"].get("gastos"), dimensao),
+        lambda: bins_diarios(gastos, dimensoes[dimensao]),
+    )
+    with colc2:
+        rotulos = {"INDISPENSAVEL": "👍 Indispensável", "DISPENSAVEL": "👎 Dispensável", "SEM CLASSIFICACAO": "Sem classificação"}
+        categoria = st.selectbox(
+            "Mostrar",
+            range(len(bins["categorias"])),
+            format_func=lambda i: rotulos.get(bins["categorias"][i], bins["categorias"][i]),
+            key="calendario_categoria",
+            disabled=len(bins["categorias"]) == 1,
+        )
+    fim = bins["inicio"] + bins["valores"].shape[1] - 1
+    ano_inicial = int(np.datetime64(bins["inicio"], "D").astype("datetime64[Y]").astype(int)) + 1970
+    ano_final = int(np.datetime64(fim, "D").astype("datetime64[Y]").astype(int)) + 1970
+    with colc3:
+        periodo = st.selectbox(
+            "Período",
+            ["Histórico inteiro"] + list(range(ano_final, ano_inicial - 1, -1)),
+            index=1,
+            key="calendario_periodo",
+        )
+
+    de = ate = None
+    if periodo != "Histórico inteiro":
+        de = int(np.datetime64(f"{periodo}-01-01", "D").astype(np.int64))
+        ate = int(np.datetime64(f"{periodo}-12-31", "D").astype(np.int64))
+    grade = grade_semanal(bins["inicio"], bins["valores"][min(categoria, len(bins["categorias"]) - 1)], de, ate)
+    if grade is None:
+        st.info("Sem gastos nesse período.")
+        return
+
+    fig_cal = go.Figure(go.Heatmap(
+        x=grade["semanas"],
+        y=DIAS_SEMANA,
+        z=grade["z"],
+        xgap=2,
+        ygap=2,
+        zmin=0,
+        colorscale=[[0, "rgba(148,163,184,0.10)"], [0.0001, "#1f3b4d"], [0.5, COR_RECEITA], [1, COR_DESTAQUE]],
+        colorbar=dict(thickness=10, tickprefix="R$ ", tickformat=",.0f"),
+        hovertemplate="Semana de %{x}<br>%{y}: R$ %{z:,.2f}<extra></extra>",
+    ))
+    fig_cal.update_layout(
+        template=PLOT_THEME,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        height=230,
+        margin=dict(l=6, r=6, t=6, b=6),
+        font=dict(color="#e5edf7", size=11),
+    )
+    fig_cal.update_xaxes(showgrid=False, type="date", tickformat="%b/%Y")
+    fig_cal.update_yaxes(showgrid=False, autorange="reversed")
+    mostrar_grafico(fig_cal)
+    st.caption(f"{grade['dias_com_gasto']} dias com gasto • {formato_real(grade['total'])} no período.")
+
+
+@fragmento
+@medido("secao_faturas")
+def secao_faturas(snapshot):
+    import plotly.graph_objects as go
+    from faturas import ciclos_fatura, dia_fechamento, ler_fechamentos, linhas_fatura
+    from formatos import normalizar_texto
+
+    gastos = snapshot["gastos"]
+    if gastos is None or gastos.empty:
+        st.info("Sem gastos variáveis para montar as faturas.")
+        return
+
+    # ajustes da sessão sobrevivem à troca de cartão (o estado do widget não sobrevive)
+    fechamentos = st.session_state.setdefault("fatura_fechamentos", ler_fechamentos())
+    formas = em_cache(
+        ("formas_pagamento", snapshot["versoes"].get("gastos")),
+        lambda: sorted(gastos["FORMA PAGAMENTO"].astype(str).unique().tolist()),
+    )
+
+    colp1, colp2, colp3 = st.columns([1.3, 0.8, 1.4])
+    with colp1:
+        forma_sel = st.selectbox("💳 Forma de pagamento", formas, key="fatura_forma")
+    with colp2:
+        fechamentos[normalizar_texto(forma_sel)] = int(st.number_input(
+            "Dia de fechamento",
+            min_value=1,
+            max_value=31,
+            value=dia_fechamento(fechamentos, forma_sel),
+            key=f"fatura_fechamento_{forma_sel}",
+            help="Compras a partir desse dia entram na fatura seguinte. Dia 1 = mês civil.",
+        ))
+    chave_fechamentos = tuple((forma, dia_fechamento(fechamentos, forma)) for forma in formas)
+
+    faturas = em_cache(
+        ("faturas", snapshot["versoes"].get("gastos"), chave_fechamentos),
+        lambda: ciclos_fatura(gastos, dict(fechamentos)),
+    )
+    ciclos = faturas["tabelas"][forma_sel]
+
+    def rotulo_ciclo(i):
+        linha = ciclos.iloc[i]
+        return f"{linha['INICIO']:%d/%m/%Y} a {linha['FIM']:%d/%m/%Y}"
+
+    with colp3:
+        ciclo_sel = st.selectbox("🧾 Fatura", range(len(ciclos)), format_func=rotulo_ciclo, key=f"fatura_ciclo_{forma_sel}")
+
+    linha = ciclos.iloc[ciclo_sel]
+    anterior = ciclos.iloc[ciclo_sel + 1]["TOTAL"] if ciclo_sel + 1 < len(ciclos) else None
+    media = ciclos["TOTAL"].iloc[ciclo_sel:ciclo_sel + 6].mean()
+    render_kpi_cards([
+        {"label": "Total da fatura", "value": formato_real(linha["TOTAL"]), "hint": f"Compras de {linha['INICIO']:%d/%m} a {linha['FIM']:%d/%m/%Y}."},
+        {"label": "Compras", "value": str(int(linha["COMPRAS"])), "hint": "Lançamentos dentro do ciclo."},
+        {
+            "label": "Fatura anterior",
+            "value": formato_real(anterior) if anterior is not None else "—",
+            "hint": "O ciclo imediatamente antes deste.",
+        },
+        {"label": "Média de 6 faturas", "value": formato_real(media), "hint": "Esta e as cinco anteriores."},
+    ])
+
+    ultimos = ciclos.iloc[:24].iloc[::-1]
+    fig_fat = go.Figure(go.Bar(
+        x=ultimos["FIM"].dt.strftime("%d/%m/%y"),
+        y=ultimos["TOTAL"].to_numpy(),
+        marker_color=[COR_DESTAQUE if c == linha["CICLO"] else COR_RECEITA for c in ultimos["CICLO"]],
+        texttemplate=TEXTO_BRL,
+        textposition="outside",
+        hovertemplate="<b>Ciclo até %{x}</b><br>R$ %{y:,.2f}<extra></extra>",
+    ))
+    fig_fat.update_layout(
+        template=PLOT_THEME,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        height=320,
+        margin=dict(l=10, r=10, t=20, b=10),
+        font=dict(color="#e5edf7"),
+        showlegend=False,
+    )
+    fig_fat.update_xaxes(showgrid=False, type="category")
+    fig_fat.update_yaxes(showgrid=True, gridcolor="rgba(255,255,255,0.06)")
+    mostrar_grafico(fig_fat)
+
+    st.dataframe(
+        snapshot["tabela_gastos"].take(linhas_fatura(faturas, forma_sel, linha["CICLO"])),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def secao_recorrencias(snapshot):
+    import pandas as pd
+    from recorrencias import DetectorRecorrencias
+
+    detector = em_cache(("detector_recorrencias",), DetectorRecorrencias)
+    detector.atualizar(
+        [
+            ("Despesa fixa", snapshot["despesas"], "DESCRICAO"),
+            ("Gasto variável", snapshot["gastos"], "NOME"),
+        ],
+        (ano_atual, mes_atual),
+        versao=versao_lancamentos,
+    )
+    referencia = (ano_atual, mes_atual)
+    recorrentes = detector.recorrentes(referencia)
+    novas = detector.novas(referencia)
+
+    if not recorrentes:
+        st.info("Ainda não há histórico suficiente para reconhecer cobranças recorrentes.")
+        return
+
+    sumidas = [r for r in recorrentes if r["SITUACAO"] == "Sumiu?"]
+    r1, r2, r3 = st.columns(3)
+    r1.metric("Cobranças recorrentes", str(len(recorrentes)))
+    r2.metric("Peso mensal médio", formato_real(sum(r["VALOR_MEDIO"] for r in recorrentes if r["CADENCIA"] == "Mensal")))
+    r3.metric("Sumiram do radar", str(len(sumidas)))
+
+    if sumidas:
+        st.warning("Não apareceram quando deviam: " + ", ".join(r["DESCRICAO"] for r in sumidas) + ".")
+    if novas:
+        st.info("Novidades neste mês: " + ", ".join(f"{n['DESCRICAO']} ({formato_real(n['VALOR'])})" for n in novas) + ".")
+
+    tabela = pd.DataFrame(recorrentes).sort_values("VALOR_MEDIO", ascending=False)
+    tabela["VALOR_MEDIO"] = tabela["VALOR_MEDIO"].apply(formato_real)
+    tabela["ULTIMO_VALOR"] = tabela["ULTIMO_VALOR"].apply(formato_real)
+    st.dataframe(
+        tabela.rename(columns={
+            "DESCRICAO": "Descrição",
+            "ORIGEM": "Origem",
+            "CADENCIA": "Cadência",
+            "OCORRENCIAS": "Ocorrências",
+            "VALOR_MEDIO": "Valor médio",
+            "ULTIMO_VALOR": "Último valor",
+            "ULTIMA": "Última vez",
+            "PROXIMA": "Próxima",
+            "SITUACAO": "Situação",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+# =========================
+# NAVEGAÇÃO PREMIUM
+# =========================
+if "atlas_nav" not in st.session_state:
+    st.session_state.atlas_nav = "🌙 Atlas Financeiro"
+
+NAV_OPTS = ["🌙 Atlas Financeiro", "🏠 Projeto Morar Sozinho"]
+nav_index = NAV_OPTS.index(st.session_state.atlas_nav) if st.session_state.atlas_nav in NAV_OPTS else 0
+st.radio(
+    "Navegação",
+    options=NAV_OPTS,
+    index=nav_index,
+    key="atlas_nav",
+    horizontal=True,
+    label_visibility="collapsed",
+)
+
+nav = st.session_state.atlas_nav
+
+if nav == "🌙 Atlas Financeiro" and erro_principal is not None:
+    st.error(f"Erro ao abrir a aba principal: {erro_principal}")
+
+elif nav == "🌙 Atlas Financeiro":
+    # =========================
+    # MÉTRICAS
+    # =========================
+    st.markdown("""
+    <div class="section-head">
+        <div class="section-title">Visão do ano</div>
+        <div class="section-sub">Os números grandes primeiro. Clareza antes de pressa.</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    render_kpi_cards([
+        {"label": "Receita no ano", "value": formato_real(total_receita_ano), "hint": "Tudo que entrou no ano atual."},
+        {"label": "Despesa no ano", "value": formato_real(total_despesa_ano), "hint": "Tudo que saiu no ano atual."},
+        {"label": "Saldo no ano", "value": formato_real(saldo_ano), "hint": "Receita menos despesa, sem teatro."},
+        {"label": "Saldo restante", "value": formato_real(saldo_restante), "hint": dica_saldo_restante},
+        {"label": "Investido", "value": formato_real(valor_investido), "hint": "Valor puxado da aba de investimento."},
+        {"label": "Total em construção", "value": formato_real(patrimonio_em_construcao), "hint": dica_patrimonio},
+    ])
+
+    st.markdown('<div class="small-gap"></div>', unsafe_allow_html=True)
+
+    # =========================
+    # GRÁFICO GERAL
+    # =========================
+    st.markdown("""
+    <div class="section-head">
+        <div class="section-title">📊 Balanço Financeiro Geral</div>
+        <div class="section-sub">Receitas, despesas e saldo mês a mês.</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # figura compartilhada entre sessões: já sai compactada do cache e não é alterada aqui
+    fig = em_cache(("fig_resumo", versao_lancamentos, ano_atual, mes_atual), lambda: figura_resumo(resumo, projecao))
+    st.plotly_chart(fig, use_container_width=True)
+
+    # =========================
+    # SELECTBOX DINÂMICO (PRÓXIMO MÊS)
+    # =========================
+    st.markdown("---")
+
+    secao_raio_x(resumo, snapshot["ranking_despesas"], consultas)
+
+    st.markdown("---")
+
+    secao_periodo(indice)
+
+    # =========================
+    # GASTOS VARIÁVEIS
+    # =========================
+    st.markdown("---")
+
+    st.markdown("""
+    <div class="section-head">
+        <div class="section-title">🧾 Gastos variáveis</div>
+        <div class="section-sub">O que escapa dos gastos fixos aparece aqui.</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    secao_gastos(snapshot, consultas)
+
+    # =========================
+    # CALENDÁRIO
+    # =========================
+    st.markdown("---")
+
+    st.markdown("""
+    <div class="section-head">
+        <div class="section-title">📆 Calendário de gastos</div>
+        <div class="section-sub">Dia a dia, semana a semana: onde o dinheiro escorreu.</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    secao_calendario(snapshot)
+
+    # =========================
+    # FATURAS
+    # =========================
+    st.markdown("---")
+
+    st.markdown("""
+    <div class="section-head">
+        <div class="section-title">💳 Faturas por forma de pagamento</div>
+        <div class="section-sub">Cada cartão no seu ciclo de fechamento, não no mês do calendário.</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    secao_faturas(snapshot)
+
+    # =========================
+    # BUSCA
+    # =========================
+    st.markdown("---")
+
+    st.markdown("""
+    <div class="section-head">
+        <div class="section-title">🔎 Busca nos lançamentos</div>
+        <div class="section-sub">Ache todo iFood, todo Uber, todo aluguel — em qualquer mês.</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    secao_busca(snapshot)
+
+    # =========================
+    # RECORRÊNCIAS
+    # =========================
+    st.markdown("---")
+
+    st.markdown("""
+    <div class="section-head">
+        <div class="section-title">🔁 Cobranças recorrentes</div>
+        <div class="section-sub">O que volta todo mês (ou todo ano), e o que sumiu sem avisar.</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    secao_recorrencias(snapshot)
+
+    # =========================
+    # EXPORTAÇÃO
+    # =========================
+    st.markdown("---")
+
+    st.markdown("""
+    <div class="section-head">
+        <div class="section-title">⬇️ Exportar dados</div>
+        <div class="section-sub">Um ano inteiro de despesas, receitas ou gastos em CSV, Parquet ou Excel.</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    secao_exportacao(snapshot)
+
 
 
 elif nav == "🏠 Projeto Morar Sozinho":
+        import plotly.graph_objects as go
+
         st.markdown("""
         <div class="section-head">
             <div class="section-title">🏠 Projeto Morar Sozinho</div>
@@ -1044,13 +1491,14 @@ elif nav == "🏠 Projeto Morar Sozinho":
         </div>
         """, unsafe_allow_html=True)
 
-        aba_custo_vida = encontrar_aba_custo_vida(nomes_abas)
+        aba_custo_vida = snapshot["aba_custo_vida"]
         if not aba_custo_vida:
             st.info("Não encontrei a aba 'CUSTO DE VIDA' na planilha.")
         else:
             try:
-                raw_cv = carregar_custo_vida_raw(PLANILHA_URL, aba_custo_vida, st.session_state.refresh_key)
-                projeto = extrair_projeto_morar_sozinho(raw_cv)
+                if "custo_vida" in snapshot["erros"]:
+                    raise snapshot["erros"]["custo_vida"]
+                projeto = snapshot["custo_vida"]
 
                 renda_total = projeto["renda_total"]
                 custos_totais = projeto["custos_totais"]
@@ -1062,6 +1510,17 @@ elif nav == "🏠 Projeto Morar Sozinho":
                 if renda_total <= 0 or df_itens.empty:
                     st.warning("Achei a aba, mas não consegui montar o planejamento. Dá uma olhada se a estrutura segue o print que você mostrou.")
                 else:
+                    tabela_cat = projeto["tabela_cat"]
+                    if consultas is not None:
+                        from dados import completar_categorias
+                        from tabelas_arrow import tabela_categorias
+
+                        df_cat = em_cache(
+                            ("custo_por_categoria", snapshot["versoes"].get("custo_vida")),
+                            lambda: completar_categorias(consultas.custo_por_categoria(), renda_total),
+                        )
+                        tabela_cat = tabela_categorias(df_cat)
+
                     reserva_6m = custos_totais * 6
                     pct_custos = (custos_totais / renda_total * 100) if renda_total > 0 else 0
 
@@ -1108,7 +1567,7 @@ elif nav == "🏠 Projeto Morar Sozinho":
                         fig_cat = go.Figure(go.Bar(
                             x=df_cat_plot["CATEGORIA"],
                             y=df_cat_plot["VALOR"],
-                            text=df_cat_plot["VALOR_FMT"],
+                            texttemplate=TEXTO_BRL,
                             textposition="inside",
                             insidetextanchor="middle",
                             textfont=dict(size=13, color="#081018"),
@@ -1116,7 +1575,7 @@ elif nav == "🏠 Projeto Morar Sozinho":
                                 color=["#72E0B5", "#FFD36A", "#6EA8FF", "#B497FF"][:len(df_cat_plot)],
                                 line=dict(width=0)
                             ),
-                            hovertemplate="<b>%{x}</b><br>%{text}<extra></extra>",
+                            hovertemplate=HOVER_BRL,
                         ))
                         fig_cat.update_layout(
                             template=PLOT_THEME,
@@ -1133,7 +1592,7 @@ elif nav == "🏠 Projeto Morar Sozinho":
                         )
                         fig_cat.update_xaxes(showgrid=False)
                         fig_cat.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
-                        st.plotly_chart(fig_cat, use_container_width=True)
+                        mostrar_grafico(fig_cat)
 
                     with c2:
                         st.markdown("#### 🧠 Diagnóstico")
@@ -1157,42 +1616,17 @@ elif nav == "🏠 Projeto Morar Sozinho":
 
                     st.markdown("---")
                     st.markdown("#### 🗂️ Resumo por categoria")
-                    tabela_cat = df_cat[df_cat["CATEGORIA"] != "RENDA"].copy()
                     st.dataframe(
-                        tabela_cat[["CATEGORIA", "VALOR_FMT", "PCT_RENDA_FMT", "FAIXA"]].rename(
-                            columns={
-                                "CATEGORIA": "Categoria",
-                                "VALOR_FMT": "Total",
-                                "PCT_RENDA_FMT": "% da renda",
-                                "FAIXA": "Peso",
-                            }
-                        ),
+                        tabela_cat,
                         use_container_width=True,
                         hide_index=True,
                     )
 
                     st.markdown("---")
                     st.markdown("#### 🔎 Subcategorias com análise")
-                    df_sub = df_itens[df_itens["CATEGORIA"] != "RENDA"].copy()
-                    ordem_sub = {"MORADIA": 1, "ALIMENTAÇÃO": 2, "TRANSPORTE": 3, "OUTROS": 4}
-                    df_sub["ORDEM"] = df_sub["CATEGORIA"].map(ordem_sub).fillna(99)
-                    df_sub = df_sub.sort_values(["ORDEM", "PCT_RENDA"], ascending=[True, False])
-
+                    df_sub = projeto["df_sub"]
                     st.dataframe(
-                        df_sub[[
-                            "CATEGORIA", "SUBCATEGORIA", "VALOR_FMT", "PCT_RENDA_FMT",
-                            "PCT_CATEGORIA_FMT", "FAIXA", "ANALISE"
-                        ]].rename(
-                            columns={
-                                "CATEGORIA": "Categoria",
-                                "SUBCATEGORIA": "Subcategoria",
-                                "VALOR_FMT": "Valor",
-                                "PCT_RENDA_FMT": "% da renda",
-                                "PCT_CATEGORIA_FMT": "% da categoria",
-                                "FAIXA": "Peso",
-                                "ANALISE": "Análise",
-                            }
-                        ),
+                        projeto["tabela_sub"],
                         use_container_width=True,
                         hide_index=True,
                     )
@@ -1212,12 +1646,12 @@ elif nav == "🏠 Projeto Morar Sozinho":
                     fig_sub = go.Figure(go.Bar(
                         x=top_sub["SUBCATEGORIA"],
                         y=top_sub["VALOR"],
-                        text=top_sub["VALOR_FMT"],
+                        texttemplate=TEXTO_BRL,
                         textposition="inside",
                         insidetextanchor="middle",
                         textfont=dict(size=12, color="#081018"),
                         marker=dict(color=cores_sub, line=dict(width=0)),
-                        hovertemplate="<b>%{x}</b><br>%{text}<extra></extra>",
+                        hovertemplate=HOVER_BRL,
                     ))
                     fig_sub.update_layout(
                         template=PLOT_THEME,
@@ -1234,27 +1668,36 @@ elif nav == "🏠 Projeto Morar Sozinho":
                     )
                     fig_sub.update_xaxes(showgrid=False)
                     fig_sub.update_yaxes(showgrid=True, gridcolor="rgba(148,163,184,0.08)", zeroline=False)
-                    st.plotly_chart(fig_sub, use_container_width=True)
-
-                    st.markdown("#### 🛠️ Simulação rápida")
-                    ajuste = st.slider(
-                        "Se você reduzisse seus custos mensais, quanto conseguiria cortar?",
-                        min_value=0,
-                        max_value=1000,
-                        value=200,
-                        step=10,
-                    )
-                    nova_sobra = sobra_mes + ajuste
-                    novo_pct_sobra = (nova_sobra / renda_total * 100) if renda_total > 0 else 0
+                    mostrar_grafico(fig_sub)
 
-                    s1, s2 = st.columns(2)
-                    s1.metric("Nova sobra estimada", formato_real(nova_sobra))
-                    s2.metric("Nova sobra em % da renda", format_pct(novo_pct_sobra))
+                    secao_simulacao(sobra_mes, renda_total)
 
-                    st.markdown(
-                        f'<div class="soft-note">Com um ajuste de <b>{formato_real(ajuste)}</b> por mês, sua sobra iria para <b>{formato_real(nova_sobra)}</b>, o que representa <b>{format_pct(novo_pct_sobra)}</b> da renda.</div>',
-                        unsafe_allow_html=True,
-                    )
+                    st.markdown("---")
+                    secao_cenarios(projeto, snapshot["versoes"].get("custo_vida"))
 
             except Exception as e:
                 st.error(f"Erro ao montar o Projeto Morar Sozinho: {e}")
+
+
+# =========================
+# DIAGNÓSTICO DE MEMÓRIA (ATLAS_MEDIR_MEMORIA=1)
+# =========================
+if MEDIR_MEMORIA:
+    import pandas as pd
+
+    with st.expander("🧠 Memória por etapa e caches"):
+        etapas = st.session_state.get("memoria_etapas", {})
+        st.dataframe(
+            pd.DataFrame(
+                [(nome, m["pico"] / 1024 / 1024, m["retido"] / 1024 / 1024) for nome, m in etapas.items()],
+                columns=["Etapa", "Pico (MB)", "Retido (MB)"],
+            ).round(2),
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.dataframe(pd.DataFrame(CACHE.resumo()), use_container_width=True, hide_index=True)
+        st.dataframe(
+            pd.DataFrame(memoria.maiores_alocacoes(), columns=["Linha", "Bytes", "Blocos"]),
+            use_container_width=True,
+            hide_index=True,
+        )
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from formatos import normalizar_texto
+
+
+def trigramas(texto, bordas=True):
+    if bordas:
+        texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+# =========================
+# ÍNDICE DE TRIGRAMAS
+# =========================
+class IndiceBusca:
+    def __init__(self, lancamentos):
+        partes = [
+            pd.DataFrame({
+                "DATA": df["DATA"].to_numpy(dtype="datetime64[ns]"),
+                "DESCRICAO": df[coluna].to_numpy(dtype=object),
+                "VALOR": df["VALOR"].to_numpy(dtype=np.float64),
+                "ORIGEM": origem,
+            })
+            for origem, df, coluna in lancamentos
+            if df is not None and not df.empty
+        ]
+        base = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(
+            {"DATA": [], "DESCRICAO": [], "VALOR": [], "ORIGEM": []}
+        )
+        base = base[base["DESCRICAO"].notna() & base["DATA"].notna()]
+
+        codigos, descricoes = pd.factorize(base["DESCRICAO"].astype(str))
+        self.descricoes = np.asarray(descricoes, dtype=object)
+        self.normalizadas = [normalizar_texto(d) for d in self.descricoes]
+
+        self.postagens = {}
+        for i, texto in enumerate(self.normalizadas):
+            for tri in trigramas(texto):
+                self.postagens.setdefault(tri, []).append(i)
+        self.postagens = {tri: np.asarray(ids, dtype=np.int32) for tri, ids in self.postagens.items()}
+
+        ordem = np.argsort(codigos, kind="stable")
+        self.inicios = np.searchsorted(codigos[ordem], np.arange(len(self.descricoes) + 1))
+        self.ordem = ordem
+        self.datas = base["DATA"].to_numpy(dtype="datetime64[D]")
+        self.valores = base["VALOR"].to_numpy(dtype=np.float64)
+        self.origens = base["ORIGEM"].to_numpy(dtype=object)
+        self.codigos = codigos
+
+        meses = self.datas.astype("datetime64[M]").astype(np.int64)
+        self.mes_inicial = int(meses.min()) if len(meses) else 0
+        self.meses = (meses - self.mes_inicial).astype(np.int32)
+        self.qtd_meses = int(self.meses.max()) + 1 if len(meses) else 0
+
+    @property
+    def nbytes(self):
+        return (
+            self.ordem.nbytes + self.inicios.nbytes + self.datas.nbytes + self.valores.nbytes
+            + self.meses.nbytes + self.codigos.nbytes + self.origens.nbytes
+            + sum(p.nbytes + 64 for p in self.postagens.values())
+            + sum(len(t) + 50 for t in self.normalizadas) * 2
+        )
+
+    def _descricoes_com(self, palavra):
+        if len(palavra) < 3:
+            return np.asarray([i for i, t in enumerate(self.normalizadas) if palavra in t], dtype=np.int32)
+        listas = [self.postagens.get(tri) for tri in trigramas(palavra, bordas=False)]
+        if any(lista is None for lista in listas):
+            return np.empty(0, dtype=np.int32)
+        candidatos = listas[0]
+        for lista in sorted(listas[1:], key=len):
+            candidatos = np.intersect1d(candidatos, lista, assume_unique=True)
+            if not len(candidatos):
+                break
+        return np.asarray([i for i in candidatos if palavra in self.normalizadas[i]], dtype=np.int32)
+
+    def buscar(self, termo):
+        # termo só de emoji/símbolos normaliza para vazio: resultado vazio, não None
+        palavras = normalizar_texto(termo).split()
+        ids = self._descricoes_com(palavras[0]) if palavras else np.empty(0, dtype=np.int32)
+        for palavra in palavras[1:]:
+            ids = np.intersect1d(ids, self._descricoes_com(palavra), assume_unique=True)
+
+        if len(ids):
+            linhas = np.concatenate([self.ordem[self.inicios[i]:self.inicios[i + 1]] for i in ids])
+        else:
+            linhas = np.empty(0, dtype=np.int64)
+        por_mes = np.bincount(self.meses[linhas], weights=self.valores[linhas], minlength=self.qtd_meses)
+        return {
+            "linhas": linhas,
+            "descricoes": self.descricoes[ids],
+            "total": float(self.valores[linhas].sum()),
+            "meses": np.arange(self.mes_inicial, self.mes_inicial + self.qtd_meses).astype("datetime64[M]"),
+            "por_mes": por_mes,
+        }
+
+    def tabela(self, linhas, limite=500):
+        linhas = linhas[np.argsort(self.datas[linhas], kind="stable")[::-1][:limite]]
+        return pd.DataFrame({
+            "DATA": self.datas[linhas],
+            "DESCRICAO": self.descricoes[self.codigos[linhas]],
+            "ORIGEM": self.origens[linhas],
+            "VALOR": self.valores[linhas],
+        })
@@ -0,0 +1,155 @@
+import http.client
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+
+STATUS_REPETIR = {408, 425, 429, 500, 502, 503, 504}
+STATUS_REDIRECIONAR = {301, 302, 303, 307, 308}
+
+
+class ErroDownload(Exception):
+    pass
+
+
+# =========================
+# POOL DE CONEXÕES
+# =========================
+class PoolConexoes:
+    def __init__(self, max_por_host=4, timeout=30.0):
+        self.max_por_host = max_por_host
+        self.timeout = timeout
+        self._livres = {}
+        self._lock = threading.Lock()
+
+    def _fila(self, chave):
+        with self._lock:
+            fila = self._livres.get(chave)
+            if fila is None:
+                fila = queue.LifoQueue(maxsize=self.max_por_host)
+                self._livres[chave] = fila
+            return fila
+
+    def _nova(self, esquema, host):
+        if esquema == "https":
+            return http.client.HTTPSConnection(host, timeout=self.timeout)
+        return http.client.HTTPConnection(host, timeout=self.timeout)
+
+    def pegar(self, esquema, host):
+        try:
+            return self._fila((esquema, host)).get_nowait()
+        except queue.Empty:
+            return self._nova(esquema, host)
+
+    def devolver(self, esquema, host, conexao):
+        try:
+            self._fila((esquema, host)).put_nowait(conexao)
+        except queue.Full:
+            conexao.close()
+
+    def fechar(self):
+        with self._lock:
+            filas = list(self._livres.values())
+            self._livres.clear()
+        for fila in filas:
+            while True:
+                try:
+                    fila.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+# =========================
+# DOWNLOADS
+# =========================
+class BuscadorPlanilhas:
+    def __init__(self, max_concorrencia=4, max_por_host=4, timeout=30.0,
+                 tentativas=3, espera_base=0.5, espera_max=8.0, max_redirecionamentos=5):
+        self.pool = PoolConexoes(max_por_host=max_por_host, timeout=timeout)
+        self.tentativas = max(1, tentativas)
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.max_redirecionamentos = max_redirecionamentos
+        self._semaforo = threading.BoundedSemaphore(max_concorrencia)
+        self._executor = ThreadPoolExecutor(max_workers=max_concorrencia, thread_name_prefix="atlas-download")
+
+    def _requisicao(self, url):
+        partes = urlsplit(url)
+        caminho = partes.path or "/"
+        if partes.query:
+            caminho += "?" + partes.query
+        conexao = self.pool.pegar(partes.scheme, partes.netloc)
+        try:
+            conexao.request("GET", caminho, headers={"Connection": "keep-alive", "Accept-Encoding": "identity"})
+            resposta = conexao.getresponse()
+            corpo = resposta.read()
+        except Exception:
+            conexao.close()
+            raise
+        if resposta.will_close:
+            conexao.close()
+        else:
+            self.pool.devolver(partes.scheme, partes.netloc, conexao)
+        return resposta.status, resposta.getheader("Location"), corpo
+
+    def _espera(self, tentativa):
+        espera = min(self.espera_max, self.espera_base * (2 ** tentativa))
+        return espera * (0.5 + random.random() / 2)
+
+    def _seguir(self, url):
+        atual = url
+        for _ in range(self.max_redirecionamentos + 1):
+            status, destino, corpo = self._requisicao(atual)
+            if status in STATUS_REDIRECIONAR and destino:
+                atual = urljoin(atual, destino)
+                continue
+            return status, corpo
+        raise ErroDownload(f"Redirecionamentos demais ao baixar {url}")
+
+    def baixar(self, url):
+        if "://" not in url:
+            with open(url, "rb") as f:
+                return f.read()
+
+        ultimo_erro = None
+        with self._semaforo:
+            for tentativa in range(self.tentativas):
+                try:
+                    status, corpo = self._seguir(url)
+                except (OSError, http.client.HTTPException) as e:
+                    ultimo_erro = ErroDownload(f"Falha de conexão ao baixar {url}: {e}")
+                else:
+                    if status == 200:
+                        return corpo
+                    ultimo_erro = ErroDownload(f"HTTP {status} ao baixar {url}")
+                    if status not in STATUS_REPETIR:
+                        raise ultimo_erro
+                if tentativa < self.tentativas - 1:
+                    time.sleep(self._espera(tentativa))
+        raise ultimo_erro
+
+    def baixar_varias(self, urls):
+        futuros = {url: self._executor.submit(self.baixar, url) for url in dict.fromkeys(urls)}
+        resultado = {}
+        for url, futuro in futuros.items():
+            try:
+                resultado[url] = futuro.result()
+            except Exception as e:
+                resultado[url] = e
+        return resultado
+
+    def fechar(self):
+        self._executor.shutdown(wait=False)
+        self.pool.fechar()
+
+
+def criar_buscador():
+    return BuscadorPlanilhas(
+        max_concorrencia=int(os.environ.get("ATLAS_DOWNLOADS_CONCORRENTES", "4")),
+        timeout=float(os.environ.get("ATLAS_DOWNLOAD_TIMEOUT", "30")),
+        tentativas=int(os.environ.get("ATLAS_DOWNLOAD_TENTATIVAS", "3")),
+    )
@@ -0,0 +1,227 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# =========================
+# TAMANHO DOS OBJETOS
+# =========================
+def estimar_bytes(obj):
+    if obj is None:
+        return 0
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        try:
+            return int(obj.memory_usage(deep=True, index=True).sum())
+        except Exception:
+            pass
+    if hasattr(obj, "memory_usage"):
+        try:
+            return int(obj.memory_usage(deep=True, index=True))
+        except Exception:
+            pass
+    if hasattr(obj, "nbytes"):
+        try:
+            return int(obj.nbytes)
+        except Exception:
+            pass
+    if hasattr(obj, "to_plotly_json"):
+        try:
+            return sum(estimar_bytes(t) for t in obj.to_plotly_json().get("data", [])) + 4096
+        except Exception:
+            pass
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimar_bytes(k) + estimar_bytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimar_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+# =========================
+# CACHE POR INQUILINO
+# =========================
+class CacheInquilino:
+    def __init__(self, inquilino, limite_bytes, max_entradas=None):
+        self.inquilino = inquilino
+        self.limite_bytes = limite_bytes
+        self.max_entradas = max_entradas
+        self.entradas = OrderedDict()
+        self.bytes = 0
+        self.geracao = 0
+        self.ultimo_uso = time.monotonic()
+        self._lock = threading.RLock()
+        self._locks_chave = {}
+
+    def _lock_da_chave(self, chave):
+        with self._lock:
+            lock = self._locks_chave.get(chave)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks_chave[chave] = lock
+            return lock
+
+    def _pegar(self, chave):
+        with self._lock:
+            entrada = self.entradas.get(chave)
+            if entrada is None:
+                return None
+            valor, tamanho, expira = entrada
+            if expira is not None and expira < time.monotonic():
+                self._remover(chave)
+                return None
+            self.entradas.move_to_end(chave)
+            self.ultimo_uso = time.monotonic()
+            return entrada
+
+    def _remover(self, chave):
+        entrada = self.entradas.pop(chave, None)
+        if entrada is not None:
+            self.bytes -= entrada[1]
+            lock = self._locks_chave.get(chave)
+            if lock is not None and not lock.locked():
+                del self._locks_chave[chave]
+        return entrada
+
+    def _expirar(self):
+        agora = time.monotonic()
+        for chave in [c for c, (_, _, expira) in self.entradas.items() if expira is not None and expira < agora]:
+            self._remover(chave)
+
+    def pegar(self, chave):
+        entrada = self._pegar(chave)
+        return None if entrada is None else entrada[0]
+
+    def guardar(self, chave, valor, ttl=None):
+        tamanho = estimar_bytes(valor)
+        expira = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._remover(chave)
+            if tamanho > self.limite_bytes:
+                return tamanho
+            self._expirar()
+            self.entradas[chave] = (valor, tamanho, expira)
+            self.bytes += tamanho
+            self.ultimo_uso = time.monotonic()
+            while self.bytes > self.limite_bytes and len(self.entradas) > 1:
+                self._remover(next(iter(self.entradas)))
+            while self.max_entradas and len(self.entradas) > self.max_entradas:
+                self._remover(next(iter(self.entradas)))
+        return tamanho
+
+    def obter(self, chave, construir, ttl=None):
+        entrada = self._pegar(chave)
+        if entrada is not None:
+            return entrada[0]
+        with self._lock_da_chave(chave):
+            entrada = self._pegar(chave)
+            if entrada is not None:
+                return entrada[0]
+            valor = construir()
+            self.guardar(chave, valor, ttl=ttl)
+            return valor
+
+    def descartar_mais_antiga(self):
+        with self._lock:
+            if not self.entradas:
+                return 0
+            _, entrada = next(iter(self.entradas.items()))
+            self._remover(next(iter(self.entradas)))
+            return entrada[1]
+
+    def nova_geracao(self):
+        with self._lock:
+            self.geracao += 1
+            return self.geracao
+
+    def limpar(self, manter=None):
+        with self._lock:
+            if manter is None:
+                self.entradas.clear()
+                self.bytes = 0
+                self._locks_chave.clear()
+                return
+            for chave in [c for c in self.entradas if not manter(c)]:
+                self._remover(chave)
+                self._locks_chave.pop(chave, None)
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+class CacheMultiInquilino:
+    def __init__(self, limite_por_inquilino, limite_total, max_entradas=None, max_inquilinos=None):
+        self.limite_por_inquilino = limite_por_inquilino
+        self.limite_total = limite_total
+        self.max_entradas = max_entradas
+        self.max_inquilinos = max_inquilinos
+        self.inquilinos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def inquilino(self, inquilino):
+        with self._lock:
+            cache = self.inquilinos.get(inquilino)
+            if cache is None:
+                cache = CacheInquilino(inquilino, self.limite_por_inquilino, self.max_entradas)
+                self.inquilinos[inquilino] = cache
+            self.inquilinos.move_to_end(inquilino)
+            while self.max_inquilinos and len(self.inquilinos) > self.max_inquilinos:
+                _, antigo = self.inquilinos.popitem(last=False)
+                antigo.limpar()
+            return cache
+
+    def obter(self, inquilino, chave, construir, ttl=None):
+        cache = self.inquilino(inquilino)
+        valor = cache.obter(chave, construir, ttl=ttl)
+        self.aplicar_limite_total(preservar=inquilino)
+        return valor
+
+    def bytes_total(self):
+        with self._lock:
+            caches = list(self.inquilinos.values())
+        return sum(c.bytes for c in caches)
+
+    def aplicar_limite_total(self, preservar=None):
+        with self._lock:
+            ordem = sorted(self.inquilinos.values(), key=lambda c: c.ultimo_uso)
+        total = sum(c.bytes for c in ordem)
+        for cache in ordem:
+            if total <= self.limite_total:
+                break
+            if cache.inquilino == preservar:
+                continue
+            while total > self.limite_total and len(cache):
+                total -= cache.descartar_mais_antiga()
+        with self._lock:
+            for nome in [n for n, c in self.inquilinos.items() if not len(c) and n != preservar]:
+                del self.inquilinos[nome]
+
+    def limpar(self, inquilino=None, manter=None):
+        if inquilino is not None and manter is not None:
+            with self._lock:
+                cache = self.inquilinos.get(inquilino)
+            if cache is not None:
+                cache.limpar(manter)
+            return
+        with self._lock:
+            if inquilino is None:
+                caches = list(self.inquilinos.values())
+                self.inquilinos.clear()
+            else:
+                caches = [self.inquilinos.pop(inquilino)] if inquilino in self.inquilinos else []
+        for cache in caches:
+            cache.limpar()
+
+    def resumo(self):
+        with self._lock:
+            caches = list(self.inquilinos.values())
+        return [
+            {
+                "inquilino": c.inquilino,
+                "entradas": len(c),
+                "bytes": c.bytes,
+                "limite": c.limite_bytes,
+                "max_entradas": c.max_entradas,
+                "geracao": c.geracao,
+            }
+            for c in caches
+        ]
@@ -0,0 +1,272 @@
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+TTL_PADRAO = float(os.environ.get("ATLAS_COMPARTILHADO_TTL", "86400"))
+TTL_CONTEUDO = float(os.environ.get("ATLAS_COMPARTILHADO_TTL_CONTEUDO", "30"))
+VALIDADE_ARRENDAMENTO = float(os.environ.get("ATLAS_COMPARTILHADO_ARRENDAMENTO", "120"))
+ESPERA_MAXIMA = float(os.environ.get("ATLAS_COMPARTILHADO_ESPERA", "60"))
+
+
+class ErroCompartilhado(Exception):
+    pass
+
+
+class ErroConexao(ErroCompartilhado):
+    pass
+
+
+ERROS_BACKEND = (OSError, sqlite3.Error, ErroCompartilhado)
+
+LIBERAR_SE_DONO = (
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) else return 0 end"
+)
+
+
+def chave_texto(chave):
+    return "atlas:" + hashlib.sha1(repr(chave).encode("utf-8")).hexdigest()
+
+
+# =========================
+# BACKEND SQLITE (ARQUIVO)
+# =========================
+class BackendSQLite:
+    def __init__(self, caminho, timeout=30.0):
+        self.caminho = caminho
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=self.timeout, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS entradas (chave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL)"
+            )
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS arrendamentos (chave TEXT PRIMARY KEY, dono TEXT NOT NULL, expira REAL NOT NULL)"
+            )
+            self._local.conexao = conexao
+        return conexao
+
+    def pegar(self, chave):
+        linha = self._conexao().execute(
+            "SELECT valor FROM entradas WHERE chave = ? AND (expira IS NULL OR expira >= ?)",
+            (chave, time.time()),
+        ).fetchone()
+        return None if linha is None else bytes(linha[0])
+
+    def guardar(self, chave, valor, ttl=None):
+        agora = time.time()
+        conexao = self._conexao()
+        conexao.execute(
+            "INSERT OR REPLACE INTO entradas (chave, valor, expira) VALUES (?, ?, ?)",
+            (chave, sqlite3.Binary(valor), agora + ttl if ttl else None),
+        )
+        conexao.execute("DELETE FROM entradas WHERE expira IS NOT NULL AND expira < ?", (agora,))
+
+    def adquirir(self, chave, dono, validade):
+        agora = time.time()
+        cursor = self._conexao().execute(
+            "INSERT INTO arrendamentos (chave, dono, expira) VALUES (?, ?, ?) "
+            "ON CONFLICT(chave) DO UPDATE SET dono = excluded.dono, expira = excluded.expira "
+            "WHERE arrendamentos.expira < ? OR arrendamentos.dono = excluded.dono",
+            (chave, dono, agora + validade, agora),
+        )
+        return cursor.rowcount == 1
+
+    def liberar(self, chave, dono):
+        self._conexao().execute("DELETE FROM arrendamentos WHERE chave = ? AND dono = ?", (chave, dono))
+
+    def fechar(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is not None:
+            conexao.close()
+            self._local.conexao = None
+
+
+# =========================
+# BACKEND PROTOCOLO REDIS (RESP)
+# =========================
+class BackendRedis:
+    def __init__(self, host="127.0.0.1", porta=6379, banco=0, senha=None, timeout=5.0):
+        self.host = host
+        self.porta = porta
+        self.banco = banco
+        self.senha = senha
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conectar(self):
+        sock = socket.create_connection((self.host, self.porta), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.leitor = sock.makefile("rb")
+        if self.senha:
+            self._enviar("AUTH", self.senha)
+        if self.banco:
+            self._enviar("SELECT", str(self.banco))
+
+    def _ler(self):
+        linha = self._local.leitor.readline()
+        if not linha:
+            raise ErroConexao("Conexão encerrada pelo servidor")
+        tipo, corpo = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return corpo.decode()
+        if tipo == b"-":
+            raise ErroCompartilhado(corpo.decode())
+        if tipo == b":":
+            return int(corpo)
+        if tipo == b"$":
+            tamanho = int(corpo)
+            if tamanho < 0:
+                return None
+            dados = self._local.leitor.read(tamanho + 2)
+            return dados[:-2]
+        if tipo == b"*":
+            tamanho = int(corpo)
+            return None if tamanho < 0 else [self._ler() for _ in range(tamanho)]
+        raise ErroCompartilhado(f"Resposta inesperada: {linha!r}")
+
+    def _enviar(self, *partes):
+        blocos = [f"*{len(partes)}\r\n".encode()]
+        for parte in partes:
+            dados = parte if isinstance(parte, bytes) else str(parte).encode("utf-8")
+            blocos.append(b"$%d\r\n%s\r\n" % (len(dados), dados))
+        self._local.sock.sendall(b"".join(blocos))
+        return self._ler()
+
+    def _comando(self, *partes):
+        for tentativa in range(2):
+            try:
+                if getattr(self._local, "sock", None) is None:
+                    self._conectar()
+                return self._enviar(*partes)
+            except (OSError, ErroConexao):
+                self.fechar()
+                if tentativa:
+                    raise
+
+    def pegar(self, chave):
+        return self._comando("GET", chave)
+
+    def guardar(self, chave, valor, ttl=None):
+        if ttl:
+            self._comando("SET", chave, valor, "PX", str(int(ttl * 1000)))
+        else:
+            self._comando("SET", chave, valor)
+
+    def adquirir(self, chave, dono, validade):
+        return self._comando("SET", chave, dono, "NX", "PX", str(int(validade * 1000))) == "OK"
+
+    def liberar(self, chave, dono):
+        # compara e apaga no próprio servidor: um GET seguido de DEL pode apagar o
+        # arrendamento que outro processo pegou depois que o nosso expirou
+        self._comando("EVAL", LIBERAR_SE_DONO, "1", chave, dono)
+
+    def fechar(self):
+        # o leitor do makefile segura o descritor: sem fechá-lo a conexão fica aberta
+        for recurso in (getattr(self._local, "leitor", None), getattr(self._local, "sock", None)):
+            if recurso is not None:
+                try:
+                    recurso.close()
+                except OSError:
+                    pass
+        self._local.sock = None
+        self._local.leitor = None
+
+
+# =========================
+# ARRENDAMENTO E LEITURA COMPARTILHADA
+# =========================
+@contextmanager
+def arrendamento(backend, chave, validade=None):
+    dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+    chave_lease = chave + ":lease"
+    obtido = backend.adquirir(chave_lease, dono, validade or VALIDADE_ARRENDAMENTO)
+    try:
+        yield obtido
+    finally:
+        if obtido:
+            try:
+                backend.liberar(chave_lease, dono)
+            except ERROS_BACKEND:
+                # o arrendamento expira sozinho; não vale perder o valor já construído
+                pass
+
+
+def obter_ou_construir(backend, chave, construir, ttl=None, espera=None, intervalo=0.1):
+    valor = backend.pegar(chave)
+    if valor is not None:
+        return valor
+
+    limite = time.monotonic() + (ESPERA_MAXIMA if espera is None else espera)
+    while True:
+        with arrendamento(backend, chave) as meu:
+            if meu:
+                valor = backend.pegar(chave)
+                if valor is None:
+                    valor = construir()
+                    guardar_sem_falhar(backend, chave, valor, ttl)
+                return valor
+        valor = backend.pegar(chave)
+        if valor is not None:
+            return valor
+        if time.monotonic() >= limite:
+            return construir()
+        time.sleep(intervalo)
+
+
+def guardar_sem_falhar(backend, chave, valor, ttl):
+    try:
+        backend.guardar(chave, valor, ttl=ttl)
+    except ERROS_BACKEND:
+        pass
+
+
+def baixar_compartilhado(buscador, url, backend, forcar=False):
+    if backend is None:
+        return buscador.baixar(url)
+    chave = chave_texto(("conteudo", url))
+    if forcar:
+        conteudo = buscador.baixar(url)
+        guardar_sem_falhar(backend, chave, conteudo, TTL_CONTEUDO)
+        return conteudo
+
+    # só cai no download direto se o backend falhou antes de baixar: um OSError do
+    # próprio download sobe como veio, sem uma segunda tentativa escondida
+    baixando = []
+
+    def construir():
+        baixando.append(url)
+        return buscador.baixar(url)
+
+    try:
+        return obter_ou_construir(backend, chave, construir, ttl=TTL_CONTEUDO)
+    except ERROS_BACKEND:
+        if baixando:
+            raise
+        return buscador.baixar(url)
+
+
+def criar_backend(url=None):
+    url = url if url is not None else os.environ.get("ATLAS_CACHE_COMPARTILHADO", "")
+    if not url:
+        return None
+    partes = urlsplit(url)
+    if partes.scheme == "sqlite":
+        caminho = partes.netloc + partes.path if partes.netloc else partes.path
+        return BackendSQLite(caminho)
+    if partes.scheme == "redis":
+        banco = int(partes.path.strip("/") or 0)
+        return BackendRedis(partes.hostname or "127.0.0.1", partes.port or 6379, banco, partes.password)
+    raise ValueError(f"Backend de cache compartilhado desconhecido: {url}")
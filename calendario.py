@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from indice_periodos import ordinais_dia
+
+
+DIAS_SEMANA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+
+# =========================
+# GASTO POR DIA (UM BINCOUNT SÓ)
+# =========================
+def bins_diarios(gastos, coluna=None):
+    if gastos is None or gastos.empty:
+        return None
+    ordinais = ordinais_dia(gastos["DATA"].to_numpy())
+    inicio = int(ordinais.min())
+    dias = int(ordinais.max()) - inicio + 1
+
+    if coluna is None:
+        codigos = np.zeros(len(ordinais), dtype=np.int64)
+        categorias = ["Total"]
+    else:
+        codigos, categorias = pd.factorize(gastos[coluna].fillna("—").astype(str), sort=True)
+        categorias = list(categorias)
+
+    valores = np.bincount(
+        codigos * dias + (ordinais - inicio),
+        weights=gastos["VALOR"].to_numpy(dtype=np.float64),
+        minlength=len(categorias) * dias,
+    ).reshape(len(categorias), dias)
+    return {"inicio": inicio, "categorias": categorias, "valores": valores}
+
+
+def grade_semanal(inicio, por_dia, de=None, ate=None):
+    fim = inicio + len(por_dia) - 1
+    de = inicio if de is None else max(int(de), inicio)
+    ate = fim if ate is None else min(int(ate), fim)
+    if ate < de:
+        return None
+
+    # 1970-01-01 foi quinta-feira: (ordinal + 3) % 7 dá 0 para segunda
+    primeira_segunda = de - (de + 3) % 7
+    semanas = (ate - primeira_segunda) // 7 + 1
+    grade = np.full(semanas * 7, np.nan)
+    grade[de - primeira_segunda:ate - primeira_segunda + 1] = por_dia[de - inicio:ate - inicio + 1]
+    inicios = np.datetime64(primeira_segunda, "D") + np.arange(semanas) * 7
+    return {
+        "semanas": np.datetime_as_string(inicios, unit="D"),
+        "z": grade.reshape(semanas, 7).T,
+        "total": float(np.nansum(grade)),
+        "dias_com_gasto": int((grade > 0).sum()),
+    }
@@ -0,0 +1,168 @@
+import hashlib
+import io
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+
+
+NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PACOTE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+RE_A1 = re.compile(r"^\$?([A-Za-z]{1,3})\$?(\d+)$")
+RE_TEXTO_COMPARTILHADO = re.compile(rb'<c\b[^>]*?\bt="s"[^>]*>\s*<v>(\d+)</v>')
+
+
+class ErroReferencia(LookupError):
+    pass
+
+
+# =========================
+# REFERÊNCIAS A1
+# =========================
+def coluna_para_indice(letras):
+    indice = 0
+    for letra in letras.upper():
+        indice = indice * 26 + (ord(letra) - ord("A") + 1)
+    return indice
+
+
+def separar_celula(ref):
+    m = RE_A1.match(ref.strip())
+    if not m:
+        raise ErroReferencia(f"Referência inválida: {ref}")
+    return coluna_para_indice(m.group(1)), int(m.group(2))
+
+
+def separar_referencia(ref):
+    if "!" not in ref:
+        return None, ref
+    aba, celula = ref.rsplit("!", 1)
+    aba = aba.strip()
+    if aba.startswith("'") and aba.endswith("'"):
+        aba = aba[1:-1].replace("''", "'")
+    return aba, celula.split(":")[0]
+
+
+# =========================
+# LEITOR DA PASTA DE TRABALHO
+# =========================
+class LeitorCelulas:
+    def __init__(self, conteudo):
+        self._zip = zipfile.ZipFile(io.BytesIO(conteudo))
+        raiz = ElementTree.fromstring(self._zip.read("xl/workbook.xml"))
+        rels = ElementTree.fromstring(self._zip.read("xl/_rels/workbook.xml.rels"))
+        alvos = {r.get("Id"): r.get("Target") for r in rels.iter(f"{NS_PACOTE}Relationship")}
+
+        self.abas = {}
+        for aba in raiz.iter(f"{NS}sheet"):
+            alvo = alvos.get(aba.get(f"{NS_REL}id"), "")
+            caminho = alvo.lstrip("/") if alvo.startswith("/") else posixpath.normpath(posixpath.join("xl", alvo))
+            self.abas[aba.get("name")] = caminho
+        self.nomes_definidos = {
+            d.get("name").upper(): (d.text or "").strip()
+            for d in raiz.iter(f"{NS}definedName")
+            if d.get("localSheetId") is None and not d.get("name", "").startswith("_xlnm.")
+        }
+        self._strings = None
+        self._hash_estilos = None
+
+    def _string_compartilhada(self, indice):
+        if self._strings is None:
+            self._strings = []
+            if "xl/sharedStrings.xml" in self._zip.namelist():
+                with self._zip.open("xl/sharedStrings.xml") as f:
+                    for _, elem in ElementTree.iterparse(f):
+                        if elem.tag == f"{NS}si":
+                            self._strings.append("".join(t.text or "" for t in elem.iter(f"{NS}t")))
+                            elem.clear()
+        return self._strings[indice]
+
+    def _valor(self, celula):
+        tipo = celula.get("t", "n")
+        if tipo == "inlineStr":
+            return "".join(t.text or "" for t in celula.iter(f"{NS}t"))
+        bruto = celula.findtext(f"{NS}v")
+        if bruto is None:
+            return None
+        if tipo == "s":
+            return self._string_compartilhada(int(bruto))
+        if tipo == "b":
+            return bruto == "1"
+        if tipo in ("str", "e"):
+            return bruto
+        try:
+            return float(bruto)
+        except ValueError:
+            return bruto
+
+    def celula(self, aba, ref):
+        if aba not in self.abas:
+            raise ErroReferencia(f"Aba não encontrada: {aba}")
+        coluna_alvo, linha_alvo = separar_celula(ref)
+
+        linha = 0
+        with self._zip.open(self.abas[aba]) as f:
+            for _, elem in ElementTree.iterparse(f):
+                if elem.tag != f"{NS}row":
+                    continue
+                linha = int(elem.get("r") or linha + 1)
+                if linha < linha_alvo:
+                    elem.clear()
+                    continue
+                if linha > linha_alvo:
+                    return None
+                for pos, celula in enumerate(elem.iter(f"{NS}c"), start=1):
+                    ref_celula = celula.get("r")
+                    coluna = separar_celula(ref_celula)[0] if ref_celula else pos
+                    if coluna == coluna_alvo:
+                        return self._valor(celula)
+                return None
+        return None
+
+    def impressao(self, aba):
+        if aba not in self.abas:
+            raise ErroReferencia(f"Aba não encontrada: {aba}")
+        if self._hash_estilos is None:
+            estilos = self._zip.read("xl/styles.xml") if "xl/styles.xml" in self._zip.namelist() else b""
+            self._hash_estilos = hashlib.sha1(estilos)
+
+        xml = self._zip.read(self.abas[aba])
+        h = self._hash_estilos.copy()
+        h.update(xml)
+        for indice in sorted({int(i) for i in RE_TEXTO_COMPARTILHADO.findall(xml)}):
+            h.update(self._string_compartilhada(indice).encode("utf-8") + b"\x00")
+        return h.hexdigest()
+
+    def impressao_nomes(self):
+        return hashlib.sha1(repr(sorted(self.nomes_definidos.items())).encode("utf-8")).hexdigest()
+
+    def resolver(self, ref, aba_padrao=None):
+        destino = self.nomes_definidos.get(ref.strip().upper())
+        if destino is not None:
+            ref = destino.split(",")[0]
+        aba, celula = separar_referencia(ref)
+        aba = aba or aba_padrao
+        if aba is None:
+            raise ErroReferencia(f"Referência sem aba: {ref}")
+        return self.celula(aba, celula)
+
+    def fechar(self):
+        self._zip.close()
+
+
+def impressoes_abas(conteudo):
+    leitor = LeitorCelulas(conteudo)
+    try:
+        return {aba: leitor.impressao(aba) for aba in leitor.abas}, leitor.impressao_nomes()
+    finally:
+        leitor.fechar()
+
+
+def ler_celula(conteudo, ref, aba_padrao=None):
+    leitor = LeitorCelulas(conteudo)
+    try:
+        return leitor.resolver(ref, aba_padrao)
+    finally:
+        leitor.fechar()
@@ -0,0 +1,72 @@
+import numpy as np
+
+from formatos import normalizar_texto
+
+
+# =========================
+# BASE DO PROJETO
+# =========================
+def base_cenarios(projeto):
+    itens = projeto["df_itens"]
+    custos = itens[itens["CATEGORIA"] != "RENDA"]
+    por_categoria = custos.groupby("CATEGORIA", sort=False)["VALOR"].sum()
+
+    nomes = custos["SUBCATEGORIA"].map(normalizar_texto)
+    aluguel = custos.loc[nomes.str.contains("ALUGUEL", regex=False), "VALOR"].sum()
+
+    return {
+        "categorias": por_categoria.index.to_numpy(dtype=object),
+        "valores": por_categoria.to_numpy(dtype=np.float64),
+        "aluguel": float(aluguel),
+        "renda": float(projeto["renda_total"]),
+        "custos": float(projeto["custos_totais"]),
+    }
+
+
+def sortear_choques(n, categorias, semente=42):
+    rng = np.random.default_rng(semente)
+    return {
+        "custos": rng.standard_normal((n, categorias)),
+        "renda": rng.standard_normal(n),
+    }
+
+
+# =========================
+# AVALIAÇÃO VETORIZADA
+# =========================
+def avaliar(base, choques, aluguel=None, ajuste_renda=0.0, incerteza_custos=0.0, incerteza_renda=0.0):
+    aluguel = base["aluguel"] if aluguel is None else aluguel
+
+    multiplicadores = np.maximum(1.0 + incerteza_custos * choques["custos"], 0.0)
+    custos = base["custos"] + (multiplicadores - 1.0) @ base["valores"] + (aluguel - base["aluguel"])
+
+    renda = base["renda"] * (1.0 + ajuste_renda) * np.maximum(1.0 + incerteza_renda * choques["renda"], 0.0)
+    return renda, custos, renda - custos
+
+
+def meses_para_reserva(custos, sobra, meses_reserva=6):
+    meses = np.full(sobra.shape, np.inf)
+    positivos = sobra > 0
+    meses[positivos] = np.ceil(custos[positivos] * meses_reserva / sobra[positivos])
+    return meses
+
+
+def resumo_cenarios(custos, sobra, percentis=(10, 50, 90)):
+    meses = meses_para_reserva(custos, sobra)
+    return {
+        "sobra": dict(zip(percentis, np.percentile(sobra, percentis))),
+        "meses_reserva": dict(zip(percentis, np.percentile(meses, percentis, method="nearest"))),
+        "pct_negativos": float((sobra < 0).mean() * 100),
+    }
+
+
+def fronteira_equilibrio(base, choques, alugueis, incerteza_custos=0.0, percentis=(50, 90)):
+    multiplicadores = np.maximum(1.0 + incerteza_custos * choques["custos"], 0.0)
+    sem_aluguel = base["custos"] - base["aluguel"] + (multiplicadores - 1.0) @ base["valores"]
+    alugueis = np.asarray(alugueis, dtype=np.float64)
+    return {p: alugueis + q for p, q in zip(percentis, np.percentile(sem_aluguel, percentis))}
+
+
+def histograma(valores, faixas=40):
+    contagens, bordas = np.histogram(valores, bins=faixas)
+    return (bordas[:-1] + bordas[1:]) / 2, contagens
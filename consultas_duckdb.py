@@ -0,0 +1,215 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import duckdb
+
+from dados import completar_resumo
+from ranking import TOP_N
+
+
+THREADS = int(os.environ.get("ATLAS_DUCKDB_THREADS", str(os.cpu_count() or 1)))
+
+CONSULTAS = {
+    "resumo_mes": """
+        SELECT
+            COALESCE(SUM(valor) FILTER (WHERE origem = 'RECEITA'), 0) AS receita,
+            COALESCE(SUM(valor) FILTER (WHERE origem = 'DESPESA'), 0) AS despesa
+        FROM lancamentos
+        WHERE origem IN ('RECEITA', 'DESPESA') AND ano = $1 AND mes_txt = $2
+    """,
+    "top_despesas": """
+        SELECT descricao, total, SUM(total) OVER () AS geral, COUNT(*) OVER () AS grupos
+        FROM (
+            SELECT descricao, SUM(valor) AS total
+            FROM lancamentos
+            WHERE origem = 'DESPESA' AND ano = $1 AND mes_txt = $2
+            GROUP BY descricao
+        )
+        ORDER BY total DESC, descricao
+        LIMIT $3
+    """,
+    "top_gastos": """
+        SELECT descricao, total, SUM(total) OVER () AS geral, COUNT(*) OVER () AS grupos
+        FROM (
+            SELECT descricao, SUM(valor) AS total
+            FROM lancamentos
+            WHERE origem = 'GASTO' AND mes_ano = $1
+              AND ($2 = 'Todas' OR quinzena = $2)
+              AND ($3 = 'Todos' OR classificacao = $3)
+            GROUP BY descricao
+        )
+        ORDER BY total DESC, descricao
+        LIMIT $4
+    """,
+    "gastos_filtrados": """
+        SELECT
+            data AS "DATA", mes_planilha AS "MES", quinzena AS "QUINZENA", descricao AS "NOME",
+            forma_pagamento AS "FORMA PAGAMENTO", classificacao AS "CLASSIFICACAO", valor AS "VALOR"
+        FROM lancamentos
+        WHERE origem = 'GASTO' AND mes_ano = $1
+          AND ($2 = 'Todas' OR quinzena = $2)
+          AND ($3 = 'Todos' OR classificacao = $3)
+        ORDER BY data DESC, linha
+    """,
+    "meses_gastos": """
+        SELECT DISTINCT mes_ano FROM lancamentos WHERE origem = 'GASTO' AND mes_ano IS NOT NULL
+    """,
+    "resumo": """
+        SELECT
+            ano AS "ANO", mes AS "MES_NUM", mes_txt AS "MES",
+            COALESCE(SUM(valor) FILTER (WHERE origem = 'RECEITA'), 0) AS "RECEITA",
+            COALESCE(SUM(valor) FILTER (WHERE origem = 'DESPESA'), 0) AS "DESPESA"
+        FROM lancamentos
+        WHERE origem IN ('RECEITA', 'DESPESA') AND mes_txt IS NOT NULL
+        GROUP BY ano, mes, mes_txt
+    """,
+    "totais_classificacao": """
+        SELECT classificacao AS "CLASSIFICACAO", SUM(valor) AS "VALOR", COUNT(*) AS "LANCAMENTOS"
+        FROM lancamentos
+        WHERE origem = 'GASTO' AND mes_ano = $1
+          AND ($2 = 'Todas' OR quinzena = $2)
+          AND ($3 = 'Todos' OR classificacao = $3)
+        GROUP BY classificacao
+        ORDER BY "VALOR" DESC, "CLASSIFICACAO"
+    """,
+    "custo_por_categoria": """
+        SELECT categoria AS "CATEGORIA", SUM(valor) AS "VALOR"
+        FROM custo_vida
+        GROUP BY categoria
+        ORDER BY categoria
+    """,
+}
+
+
+def _texto(df, coluna):
+    if coluna not in df.columns:
+        return pa.nulls(len(df), pa.string())
+    return pa.array(df[coluna], type=pa.string(), from_pandas=True)
+
+
+def tabela_lancamentos(origem, df, coluna_descricao):
+    datas = df["DATA"]
+    abreviado = "MES_ABREV" in df.columns
+    return pa.table({
+        "origem": pa.array(np.full(len(df), origem, dtype=object), type=pa.string()),
+        "data": pa.array(datas.to_numpy(dtype="datetime64[us]"), type=pa.timestamp("us")),
+        "ano": pa.array(datas.dt.year.to_numpy(dtype=np.int32)),
+        "mes": pa.array(datas.dt.month.to_numpy(dtype=np.int32)),
+        "mes_txt": _texto(df, "MES_ABREV" if abreviado else "MES"),
+        "mes_ano": _texto(df, "MES_ANO"),
+        "quinzena": _texto(df, "QUINZENA"),
+        "descricao": _texto(df, coluna_descricao),
+        "forma_pagamento": _texto(df, "FORMA PAGAMENTO"),
+        "classificacao": _texto(df, "CLASSIFICACAO"),
+        "mes_planilha": _texto(df, "MES") if abreviado else pa.nulls(len(df), pa.string()),
+        "valor": pa.array(df["VALOR"].to_numpy(dtype=np.float64), from_pandas=True),
+    })
+
+
+def _top(linhas):
+    if not linhas:
+        return None
+    valores = np.asarray([linha[1] for linha in linhas], dtype=np.float64)
+    total = float(linhas[0][2])
+    return {
+        "nomes": np.asarray([linha[0] for linha in linhas], dtype=object),
+        "valores": valores,
+        "outros": total - float(valores.sum()),
+        "qtd_outros": int(linhas[0][3]) - len(linhas),
+        "total": total,
+    }
+
+
+# =========================
+# CONSULTAS EM DUCKDB (CARREGADO DO ARROW)
+# =========================
+class ConsultasDuckDB:
+    def __init__(self, snapshot, threads=None):
+        partes = [
+            tabela_lancamentos(origem, df, coluna)
+            for origem, df, coluna in (
+                ("RECEITA", snapshot["receitas"], "DESCRICAO"),
+                ("DESPESA", snapshot["despesas"], "DESCRICAO"),
+                ("GASTO", snapshot["gastos"], "NOME"),
+            )
+            if df is not None and not df.empty
+        ]
+        if not partes:
+            vazio = pd.DataFrame({"DATA": pd.Series([], dtype="datetime64[us]"), "VALOR": pd.Series([], dtype=np.float64)})
+            partes = [tabela_lancamentos("RECEITA", vazio, "DESCRICAO")]
+        lancamentos = pa.concat_tables(partes)
+        lancamentos = lancamentos.append_column("linha", pa.array(np.arange(lancamentos.num_rows, dtype=np.int64)))
+
+        projeto = snapshot.get("custo_vida")
+        itens = projeto["df_itens"] if projeto else None
+        if itens is None or itens.empty:
+            itens = pd.DataFrame({"CATEGORIA": [], "VALOR": pd.Series([], dtype=np.float64)})
+        custo_vida = pa.table({
+            "categoria": _texto(itens, "CATEGORIA"),
+            "valor": pa.array(itens["VALOR"].to_numpy(dtype=np.float64), from_pandas=True),
+        })
+        self.nbytes = lancamentos.nbytes + custo_vida.nbytes
+
+        self._banco = duckdb.connect(":memory:", config={"threads": threads or THREADS})
+        self._banco.register("arrow_lancamentos", lancamentos)
+        self._banco.register("arrow_custo_vida", custo_vida)
+        self._banco.execute(
+            "CREATE TABLE lancamentos AS SELECT * FROM arrow_lancamentos ORDER BY origem, mes_ano, data DESC, linha"
+        )
+        self._banco.execute("CREATE TABLE custo_vida AS SELECT * FROM arrow_custo_vida")
+        self._banco.unregister("arrow_lancamentos")
+        self._banco.unregister("arrow_custo_vida")
+        self._local = threading.local()
+
+    def _cursor(self):
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._banco.cursor()
+            self._local.cursor = cursor
+            self._local.preparadas = {}
+        return cursor
+
+    # O DuckDB em Python não devolve um plano preparado que aceite parâmetros ligados, e
+    # EXECUTE nome(?) é recusado pelo binder. O que dá para guardar por cursor é a
+    # consulta já parseada: cada chamada só liga os valores e planeja.
+    def _executar(self, nome, *parametros):
+        cursor = self._cursor()
+        preparada = self._local.preparadas.get(nome)
+        if preparada is None:
+            preparada = self._local.preparadas[nome] = cursor.extract_statements(CONSULTAS[nome])[0]
+        return cursor.execute(preparada, list(parametros))
+
+    # =========================
+    # MESMA INTERFACE DO LIVRO SQLITE
+    # =========================
+    def resumo_mes(self, ano, mes_txt):
+        receita, despesa = self._executar("resumo_mes", int(ano), mes_txt).fetchone()
+        return {"RECEITA": receita, "DESPESA": despesa, "SALDO": receita - despesa}
+
+    def top_despesas(self, ano, mes_txt, k=None):
+        return _top(self._executar("top_despesas", int(ano), mes_txt, k or TOP_N).fetchall())
+
+    def top_gastos(self, mes_ano, quinzena, classificacao, k=None):
+        return _top(self._executar("top_gastos", mes_ano, quinzena, classificacao, k or TOP_N).fetchall())
+
+    def meses_gastos(self):
+        return [m for (m,) in self._executar("meses_gastos").fetchall()]
+
+    def gastos_filtrados(self, mes_ano, quinzena, classificacao):
+        return self._executar("gastos_filtrados", mes_ano, quinzena, classificacao).df()
+
+    # =========================
+    # AGREGADOS DO PAINEL
+    # =========================
+    def resumo(self):
+        return completar_resumo(self._executar("resumo").df())
+
+    def totais_classificacao(self, mes_ano, quinzena, classificacao):
+        return self._executar("totais_classificacao", mes_ano, quinzena, classificacao).df()
+
+    def custo_por_categoria(self):
+        return self._executar("custo_por_categoria").df()
@@ -0,0 +1,481 @@
+import io
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+from celulas_xlsx import ErroReferencia, LeitorCelulas
+from formatos import MESES_PT, format_pct, formato_real, mes_ano_pt, normalizar_texto
+
+
+def limpar_valor(v):
+    if pd.isna(v):
+        return 0.0
+    if isinstance(v, str):
+        v = v.replace("R$", "").replace(".", "").replace(",", ".").strip()
+        try:
+            return float(v)
+        except Exception:
+            return 0.0
+    try:
+        return float(v)
+    except Exception:
+        return 0.0
+
+
+def normalizar_colunas(df):
+    df = df.copy()
+    df.columns = [normalizar_texto(c) for c in df.columns]
+    return df
+
+
+def classificar_gasto(valor):
+    txt = normalizar_texto(valor)
+    if "INDISP" in txt:
+        return "INDISPENSAVEL"
+    if "DISP" in txt:
+        return "DISPENSAVEL"
+    return "SEM CLASSIFICACAO"
+
+
+# =========================
+# ESQUEMA DAS ABAS
+# =========================
+class ErroEsquema(ValueError):
+    pass
+
+
+REGRAS_BASE = [
+    ("DATA", lambda c: "DATA" in c),
+    ("DESCRICAO", lambda c: "NOME" in c or "DESCR" in c),
+    ("VALOR", lambda c: "VALOR" in c),
+]
+
+REGRAS_GASTOS = [
+    ("DATA", lambda c: "DATA" in c),
+    ("MES", lambda c: "MES" in c),
+    ("NOME", lambda c: "NOME" in c),
+    ("FORMA PAGAMENTO", lambda c: "FORMA" in c and "PAG" in c),
+    ("CLASSIFICACAO", lambda c: "CLASSIFIC" in c),
+    ("VALOR", lambda c: "VALOR" in c),
+]
+
+
+def assinatura_cabecalho(colunas):
+    return tuple(normalizar_texto(c) for c in colunas)
+
+
+def _colunas_base(assinatura, inicio, fim):
+    colunas = {}
+    for destino, regra in REGRAS_BASE:
+        colunas[destino] = next((i for i in range(inicio, fim) if regra(assinatura[i])), None)
+    return colunas
+
+
+def _descrever_faltando(rotulo, faltando, assinatura):
+    cabecalho = ", ".join(c for c in assinatura if c and not c.startswith("UNNAMED")) or "vazio"
+    return f"{rotulo}: não encontrei coluna(s) {', '.join(faltando)}. Cabeçalho lido: {cabecalho}."
+
+
+@lru_cache(maxsize=256)
+def esquema_principal(assinatura):
+    avisos = []
+    total = len(assinatura)
+
+    segundas = []
+    for _, regra in REGRAS_BASE:
+        posicoes = [i for i, c in enumerate(assinatura) if regra(c)]
+        if len(posicoes) >= 2:
+            segundas.append(posicoes[1])
+
+    corte = min(segundas) if len(segundas) == len(REGRAS_BASE) else None
+    if corte is not None:
+        receitas = _colunas_base(assinatura, 0, corte)
+        despesas = _colunas_base(assinatura, corte, total)
+        if None in receitas.values() or None in despesas.values():
+            corte = None
+    if corte is None:
+        corte = total // 2
+        avisos.append(
+            "Aba principal: não achei dois blocos completos (DATA, NOME/DESCRIÇÃO, VALOR); "
+            f"dividi as colunas ao meio (receitas até a coluna {corte})."
+        )
+        receitas = _colunas_base(assinatura, 0, corte)
+        despesas = _colunas_base(assinatura, corte, total)
+
+    for rotulo, colunas in (("Receitas", receitas), ("Despesas", despesas)):
+        faltando = [destino for destino, pos in colunas.items() if pos is None]
+        if faltando:
+            raise ErroEsquema(_descrever_faltando(rotulo, faltando, assinatura))
+
+    return {"corte": corte, "receitas": receitas, "despesas": despesas, "avisos": tuple(avisos)}
+
+
+@lru_cache(maxsize=256)
+def esquema_gastos(assinatura):
+    mapa = {}
+    for pos, c in enumerate(assinatura):
+        for destino, regra in REGRAS_GASTOS:
+            if destino not in mapa and regra(c):
+                mapa[destino] = pos
+                break
+
+    faltando = [destino for destino in ("DATA", "NOME", "VALOR") if destino not in mapa]
+    if faltando:
+        raise ErroEsquema(_descrever_faltando("Gastos", faltando, assinatura))
+    return mapa
+
+
+def comparar_esquemas(anteriores, atuais):
+    avisos = []
+    for aba, assinatura in atuais.items():
+        anterior = anteriores.get(aba)
+        if anterior is None or anterior == assinatura:
+            continue
+        novas = [c for c in assinatura if c not in anterior]
+        removidas = [c for c in anterior if c not in assinatura]
+        detalhes = []
+        if novas:
+            detalhes.append(f"novas: {', '.join(novas)}")
+        if removidas:
+            detalhes.append(f"removidas: {', '.join(removidas)}")
+        if not detalhes:
+            detalhes.append("colunas mudaram de posição")
+        avisos.append(f"O cabeçalho da aba '{aba}' mudou desde a última leitura ({'; '.join(detalhes)}).")
+    return avisos
+
+
+def _validar_conversao(rotulo, coluna, brutos, convertidos, avisos):
+    if avisos is None:
+        return
+    preenchidos = brutos.notna().sum()
+    if preenchidos and not convertidos.notna().any():
+        avisos.append(f"{rotulo}: a coluna {coluna} tem {preenchidos} valor(es), mas nenhuma data válida.")
+
+
+def preparar_base(base, colunas=None, avisos=None, rotulo="Base"):
+    if colunas is None:
+        base = normalizar_colunas(base)
+        colunas = _colunas_base(tuple(base.columns), 0, len(base.columns))
+        if None in colunas.values():
+            return pd.DataFrame(columns=["DATA", "DESCRICAO", "VALOR", "ANO", "MES_NUM", "MES"])
+
+    nome_data = str(base.columns[colunas["DATA"]])
+    base = base.iloc[:, [colunas["DATA"], colunas["DESCRICAO"], colunas["VALOR"]]].copy()
+    base.columns = ["DATA", "DESCRICAO", "VALOR"]
+
+    base["VALOR"] = base["VALOR"].apply(limpar_valor)
+    datas_brutas = base["DATA"]
+    base["DATA"] = pd.to_datetime(base["DATA"], errors="coerce", dayfirst=True)
+    _validar_conversao(rotulo, nome_data, datas_brutas, base["DATA"], avisos)
+    base = base.dropna(subset=["DATA"])
+
+    base["ANO"] = base["DATA"].dt.year
+    base["MES_NUM"] = base["DATA"].dt.month
+    base["MES"] = base["MES_NUM"].map(MESES_PT)
+
+    return base
+
+
+def encontrar_aba_gastos(sheet_names):
+    nomes_normalizados = {normalizar_texto(nome): nome for nome in sheet_names}
+    candidatos = [
+        "GASTOS",
+        "GASTOS_VARIAVEIS",
+        "GASTOS VARIAVEIS",
+        "GASTOS EXTRAS",
+        "VARIAVEIS",
+        "EXTRAS",
+    ]
+    for cand in candidatos:
+        if cand in nomes_normalizados:
+            return nomes_normalizados[cand]
+    return None
+
+
+def preparar_gastos(df, avisos=None):
+    if df is None or df.empty:
+        return pd.DataFrame(columns=[
+            "DATA", "MES", "QUINZENA", "NOME", "FORMA PAGAMENTO", "CLASSIFICACAO", "VALOR"
+        ])
+
+    mapa = esquema_gastos(assinatura_cabecalho(df.columns))
+    nome_data = str(df.columns[mapa["DATA"]])
+    df = df.iloc[:, list(mapa.values())].copy()
+    df.columns = list(mapa.keys())
+
+    for col in ["FORMA PAGAMENTO", "CLASSIFICACAO", "MES"]:
+        if col not in df.columns:
+            df[col] = ""
+
+    df = df[["DATA", "MES", "NOME", "FORMA PAGAMENTO", "CLASSIFICACAO", "VALOR"]].copy()
+    datas_brutas = df["DATA"]
+    df["DATA"] = pd.to_datetime(df["DATA"], errors="coerce", dayfirst=True)
+    _validar_conversao("Gastos", nome_data, datas_brutas, df["DATA"], avisos)
+    df["VALOR"] = df["VALOR"].apply(limpar_valor)
+    df = df.dropna(subset=["DATA"])
+    df = df[df["NOME"].astype(str).str.strip() != ""]
+
+    df["CLASSIFICACAO"] = df["CLASSIFICACAO"].apply(classificar_gasto)
+    df["FORMA PAGAMENTO"] = (
+        df["FORMA PAGAMENTO"]
+        .fillna("")
+        .astype(str)
+        .str.strip()
+        .replace({"": "NÃO INFORMADO"})
+    )
+
+    df["QUINZENA"] = df["DATA"].dt.day.apply(lambda x: "1ª quinzena" if x <= 15 else "2ª quinzena")
+    df["ANO"] = df["DATA"].dt.year
+    df["MES_NUM"] = df["DATA"].dt.month
+    df["MES_ABREV"] = df["MES_NUM"].map(MESES_PT)
+    df["MES_ANO"] = df["DATA"].apply(mes_ano_pt)
+
+    mes_limpo = df["MES"].fillna("").astype(str).str.strip().str.upper()
+    df["MES"] = mes_limpo.where(mes_limpo != "", df["MES_ABREV"])
+
+    return df.sort_values("DATA", ascending=False)
+
+
+def preparar_principal(df, avisos=None):
+    esquema = esquema_principal(assinatura_cabecalho(df.columns))
+    if avisos is not None:
+        avisos.extend(esquema["avisos"])
+
+    receitas = preparar_base(df, esquema["receitas"], avisos, "Receitas")
+    despesas = preparar_base(df, esquema["despesas"], avisos, "Despesas")
+    return receitas, despesas, montar_resumo(receitas, despesas)
+
+
+def montar_resumo(receitas, despesas):
+    rec_m = receitas.groupby(["ANO", "MES_NUM", "MES"], as_index=False)["VALOR"].sum().rename(columns={"VALOR": "RECEITA"})
+    des_m = despesas.groupby(["ANO", "MES_NUM", "MES"], as_index=False)["VALOR"].sum().rename(columns={"VALOR": "DESPESA"})
+
+    return completar_resumo(pd.merge(rec_m, des_m, on=["ANO", "MES_NUM", "MES"], how="outer").fillna(0))
+
+
+# o mesmo acabamento para o resumo agregado em pandas ou nas consultas (DuckDB/SQLite)
+def completar_resumo(resumo):
+    resumo = resumo.copy()
+    resumo["SALDO"] = resumo["RECEITA"] - resumo["DESPESA"]
+    resumo = resumo.sort_values(["ANO", "MES_NUM"])
+    resumo["DATA_CHAVE"] = pd.to_datetime(resumo["ANO"].astype(str) + "-" + resumo["MES_NUM"].astype(str) + "-01")
+    resumo["MES_ANO"] = resumo["DATA_CHAVE"].apply(mes_ano_pt)
+    return resumo
+
+
+REF_INVESTIMENTO = os.environ.get("ATLAS_REF_INVESTIMENTO", "B14")
+NOMES_INVESTIMENTO = ("TOTAL_INVESTIDO", "VALOR_INVESTIDO", "INVESTIDO")
+
+
+def carregar_investimento(conteudo, nome_aba, avisos=None):
+    try:
+        leitor = LeitorCelulas(conteudo)
+    except Exception as e:
+        if avisos is not None:
+            avisos.append(f"Investimento: não consegui abrir a planilha ({e}).")
+        return 0.0
+    try:
+        nome = next((n for n in NOMES_INVESTIMENTO if n in leitor.nomes_definidos), None)
+        ref = nome or REF_INVESTIMENTO
+        try:
+            valor = leitor.resolver(ref, aba_padrao=nome_aba)
+        except ErroReferencia as e:
+            valor = None
+            if avisos is not None:
+                avisos.append(f"Investimento: {e}.")
+        if avisos is not None and (valor is None or isinstance(valor, str) and not limpar_valor(valor)):
+            origem = f"nome definido {nome}" if nome else f"célula {ref} da aba '{nome_aba}'"
+            avisos.append(
+                f"Investimento: {origem} está vazia ou não é um número. "
+                f"Crie o nome definido TOTAL_INVESTIDO apontando para o total para não depender da posição."
+            )
+        return limpar_valor(valor)
+    finally:
+        leitor.fechar()
+
+
+def faixa_percentual(p):
+    try:
+        p = float(p)
+    except Exception:
+        return "—"
+    if p <= 5:
+        return "Leve"
+    elif p <= 15:
+        return "Controlado"
+    elif p <= 30:
+        return "Pesa"
+    return "Muito pesado"
+
+
+def analise_subcategoria(pct_renda, categoria=""):
+    try:
+        p = float(pct_renda)
+    except Exception:
+        p = 0.0
+
+    if p <= 2:
+        return "Impacto bem pequeno na renda. Dá para manter sem drama."
+    elif p <= 5:
+        return "Impacto leve. Bom ponto para pequenos ajustes finos."
+    elif p <= 10:
+        return "Já aparece no orçamento. Vale acompanhar para não crescer no escuro."
+    elif p <= 20:
+        return "Peso relevante. Se apertar, aqui já existe espaço para revisar."
+    elif p <= 30:
+        return "Peso alto na renda. Merece atenção real e comparação de alternativas."
+    else:
+        if normalizar_texto(categoria) == "MORADIA":
+            return "Muito pesado para a renda. Moradia virou o centro do tabuleiro."
+        return "Muito pesado para a renda. Este item domina o orçamento e pede revisão."
+
+
+def parse_money_excel(x):
+    if pd.isna(x):
+        return 0.0
+    if isinstance(x, (int, float)):
+        return float(x)
+    s = str(x).strip()
+    if not s:
+        return 0.0
+    s = s.replace("R$", "").replace("r$", "").replace(" ", "")
+    if "." in s and "," in s:
+        s = s.replace(".", "").replace(",", ".")
+    elif "," in s:
+        s = s.replace(",", ".")
+    try:
+        return float(s)
+    except Exception:
+        return 0.0
+
+
+def encontrar_aba_custo_vida(sheet_names):
+    nomes_normalizados = {normalizar_texto(nome): nome for nome in sheet_names}
+    candidatos = [
+        "CUSTO DE VIDA",
+        "CUSTO_DE_VIDA",
+        "CUSTO VIDA",
+        "PLANEJAMENTO DE CUSTO DE VIDA",
+    ]
+    for cand in candidatos:
+        if cand in nomes_normalizados:
+            return nomes_normalizados[cand]
+    return None
+
+
+def carregar_custo_vida_raw(conteudo, nome_aba):
+    return pd.read_excel(io.BytesIO(conteudo), sheet_name=nome_aba, header=None)
+
+
+def extrair_projeto_morar_sozinho(df_raw):
+    renda_total = 0.0
+    custos_totais = 0.0
+    sobra_mes = 0.0
+    categoria_atual = None
+    itens = []
+
+    categorias_validas = {"RENDA", "MORADIA", "ALIMENTACAO", "ALIMENTAÇÃO", "TRANSPORTE", "OUTROS"}
+
+    for _, row in df_raw.iterrows():
+        a = str(row.iloc[0]).strip() if len(row) > 0 and pd.notna(row.iloc[0]) else ""
+        b = str(row.iloc[1]).strip() if len(row) > 1 and pd.notna(row.iloc[1]) else ""
+        c = row.iloc[2] if len(row) > 2 else None
+
+        a_up = normalizar_texto(a)
+        b_up = normalizar_texto(b)
+        valor = parse_money_excel(c)
+
+        if "RENDA TOTAL" in a_up:
+            renda_total = valor
+            continue
+        if "CUSTOS TOTAIS" in a_up:
+            custos_totais = valor
+            continue
+        if "SOBRA NO MES" in a_up:
+            sobra_mes = valor
+            continue
+
+        if a_up == "CATEGORIA" and b_up in {"DESCRICAO", "DESCRICAO"}:
+            continue
+
+        if a_up in categorias_validas:
+            categoria_atual = "ALIMENTAÇÃO" if "ALIMENT" in a_up else a_up
+            if b and not b_up.startswith("TOTAL"):
+                itens.append({
+                    "CATEGORIA": categoria_atual,
+                    "SUBCATEGORIA": b,
+                    "VALOR": valor,
+                })
+            continue
+
+        if categoria_atual and b and not b_up.startswith("TOTAL"):
+            itens.append({
+                "CATEGORIA": categoria_atual,
+                "SUBCATEGORIA": b,
+                "VALOR": valor,
+            })
+
+    df_itens = pd.DataFrame(itens)
+    if df_itens.empty:
+        return {
+            "renda_total": renda_total,
+            "custos_totais": custos_totais,
+            "sobra_mes": sobra_mes,
+            "df_itens": pd.DataFrame(columns=["CATEGORIA", "SUBCATEGORIA", "VALOR"]),
+            "df_cat": pd.DataFrame(columns=["CATEGORIA", "VALOR"]),
+        }
+
+    df_itens["SUBCATEGORIA"] = df_itens["SUBCATEGORIA"].fillna("").astype(str).str.strip()
+    df_itens["VALOR"] = df_itens["VALOR"].fillna(0.0).astype(float)
+    df_itens = df_itens[df_itens["SUBCATEGORIA"] != ""].copy()
+
+    if renda_total <= 0:
+        renda_total = df_itens.loc[df_itens["CATEGORIA"] == "RENDA", "VALOR"].sum()
+    if custos_totais <= 0:
+        custos_totais = df_itens.loc[df_itens["CATEGORIA"] != "RENDA", "VALOR"].sum()
+    if renda_total > 0 and sobra_mes == 0:
+        sobra_mes = renda_total - custos_totais
+
+    df_cat = df_itens.groupby("CATEGORIA", as_index=False)["VALOR"].sum()
+
+    mapa_cat = df_cat.set_index("CATEGORIA")["VALOR"].to_dict()
+    df_itens["TOTAL_CATEGORIA"] = df_itens["CATEGORIA"].map(mapa_cat).fillna(0.0)
+
+    if renda_total > 0:
+        df_itens["PCT_RENDA"] = (df_itens["VALOR"] / renda_total) * 100
+        pct_sobra = (sobra_mes / renda_total) * 100
+    else:
+        df_itens["PCT_RENDA"] = 0.0
+        pct_sobra = 0.0
+
+    df_itens["PCT_CATEGORIA"] = (
+        df_itens["VALOR"] / df_itens["TOTAL_CATEGORIA"].replace(0, pd.NA) * 100
+    ).fillna(0.0)
+
+    df_itens["VALOR_FMT"] = df_itens["VALOR"].apply(formato_real)
+    df_itens["PCT_RENDA_FMT"] = df_itens["PCT_RENDA"].apply(format_pct)
+    df_itens["PCT_CATEGORIA_FMT"] = df_itens["PCT_CATEGORIA"].apply(format_pct)
+    df_itens["FAIXA"] = df_itens["PCT_RENDA"].apply(faixa_percentual)
+    df_itens["ANALISE"] = df_itens.apply(
+        lambda r: analise_subcategoria(r["PCT_RENDA"], r["CATEGORIA"]),
+        axis=1
+    )
+
+    return {
+        "renda_total": renda_total,
+        "custos_totais": custos_totais,
+        "sobra_mes": sobra_mes,
+        "pct_sobra": pct_sobra,
+        "df_itens": df_itens,
+        "df_cat": completar_categorias(df_cat, renda_total),
+    }
+
+
+def completar_categorias(df_cat, renda_total):
+    df_cat = df_cat.copy()
+    df_cat["PCT_RENDA"] = (df_cat["VALOR"] / renda_total) * 100 if renda_total > 0 else 0.0
+    df_cat["VALOR_FMT"] = df_cat["VALOR"].apply(formato_real)
+    df_cat["PCT_RENDA_FMT"] = df_cat["PCT_RENDA"].apply(format_pct)
+    df_cat["FAIXA"] = df_cat["PCT_RENDA"].apply(faixa_percentual)
+    return df_cat
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+
+LINHAS_POR_ABA_XLSX = 1_048_575
+LOTE = int(os.environ.get("ATLAS_EXPORTACAO_LOTE", "20000"))
+MEMORIA_MAXIMA = int(float(os.environ.get("ATLAS_EXPORTACAO_MB_MEMORIA", "8")) * 1024 * 1024)
+CONCORRENTES = threading.BoundedSemaphore(int(os.environ.get("ATLAS_EXPORTACOES_CONCORRENTES", "2")))
+
+FORMATOS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+# =========================
+# LOTES A PARTIR DA VISÃO FILTRADA
+# =========================
+def esquema_exportacao(df):
+    campos = []
+    for campo in pa.Schema.from_pandas(df.head(0), preserve_index=False):
+        if pa.types.is_timestamp(campo.type):
+            campo = campo.with_type(pa.date32())
+        elif pa.types.is_large_string(campo.type) or pa.types.is_null(campo.type):
+            campo = campo.with_type(pa.string())
+        campos.append(campo)
+    return pa.schema(campos)
+
+
+def lotes(df, linhas=None, colunas=None, lote=None):
+    lote = lote or LOTE
+    base = df[colunas] if colunas else df
+    esquema = esquema_exportacao(base)
+    linhas = np.arange(len(base)) if linhas is None else np.asarray(linhas)
+
+    def gerar():
+        for inicio in range(0, len(linhas), lote):
+            pedaco = base.take(linhas[inicio:inicio + lote])
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(pedaco[campo.name], from_pandas=True).cast(campo.type) for campo in esquema],
+                schema=esquema,
+            )
+
+    return esquema, gerar()
+
+
+# =========================
+# ESCRITORES POR FORMATO
+# =========================
+def escrever_csv(esquema, pedacos, destino):
+    with pa_csv.CSVWriter(destino, esquema) as escritor:
+        for pedaco in pedacos:
+            escritor.write_batch(pedaco)
+
+
+def escrever_parquet(esquema, pedacos, destino):
+    with pq.ParquetWriter(destino, esquema, compression="zstd") as escritor:
+        for pedaco in pedacos:
+            escritor.write_batch(pedaco)
+
+
+def escrever_xlsx(esquema, pedacos, destino, titulo="Dados"):
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    abas = 0
+    restantes = 0
+    for pedaco in pedacos:
+        for linha in zip(*(coluna.to_pylist() for coluna in pedaco.columns)):
+            if not restantes:
+                abas += 1
+                aba = livro.create_sheet(titulo[:27] if abas == 1 else f"{titulo[:27]} {abas}")
+                aba.append(esquema.names)
+                restantes = LINHAS_POR_ABA_XLSX
+            aba.append(linha)
+            restantes -= 1
+    if not abas:
+        livro.create_sheet(titulo[:31]).append(esquema.names)
+    livro.save(destino)
+
+
+ESCRITORES = {"CSV": escrever_csv, "Parquet": escrever_parquet, "Excel": escrever_xlsx}
+
+
+def exportar(formato, esquema, pedacos):
+    with CONCORRENTES, tempfile.SpooledTemporaryFile(max_size=MEMORIA_MAXIMA) as destino:
+        ESCRITORES[formato](esquema, pedacos, destino)
+        destino.seek(0)
+        return destino.read()
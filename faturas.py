@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from formatos import normalizar_texto
+from indice_periodos import ordinais_dia
+
+
+# =========================
+# CALENDÁRIO DE FECHAMENTO POR FORMA DE PAGAMENTO
+# =========================
+# ATLAS_FECHAMENTO_FATURAS="Nubank=5; Itaú crédito=28" — compras a partir do dia de
+# fechamento já caem na fatura seguinte. Forma sem fechamento usa o mês civil (dia 1).
+def ler_fechamentos(texto=None):
+    texto = texto if texto is not None else os.environ.get("ATLAS_FECHAMENTO_FATURAS", "")
+    fechamentos = {}
+    for item in texto.replace(",", ";").split(";"):
+        nome, _, dia = item.partition("=")
+        if not nome.strip() or not dia.strip().isdigit():
+            continue
+        fechamentos[normalizar_texto(nome)] = min(max(int(dia), 1), 31)
+    return fechamentos
+
+
+def dia_fechamento(fechamentos, forma):
+    return fechamentos.get(normalizar_texto(forma), 1)
+
+
+def inicios_ciclo(dia, primeiro, ultimo):
+    # um início por mês, do mês anterior à primeira compra até o seguinte à última
+    mes_primeiro, mes_ultimo = np.array([primeiro, ultimo], dtype="datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    meses = np.arange(mes_primeiro - 1, mes_ultimo + 2)
+    inicio_mes = meses.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    dias_no_mes = (meses + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) - inicio_mes
+    return inicio_mes + np.minimum(dia, dias_no_mes) - 1
+
+
+# =========================
+# TOTAIS POR FATURA (UM SEARCHSORTED POR FORMA)
+# =========================
+def ciclos_fatura(gastos, fechamentos):
+    if gastos is None or gastos.empty:
+        return None
+
+    ordinais = ordinais_dia(gastos["DATA"].to_numpy())
+    codigos, formas = pd.factorize(gastos["FORMA PAGAMENTO"].astype(str), sort=True)
+    valores = gastos["VALOR"].to_numpy(dtype=np.float64)
+
+    ciclo = np.empty(len(ordinais), dtype=np.int64)
+    tabelas = {}
+    for codigo, forma in enumerate(formas):
+        linhas = np.flatnonzero(codigos == codigo)
+        dia = dia_fechamento(fechamentos, forma)
+        inicios = inicios_ciclo(dia, ordinais[linhas].min(), ordinais[linhas].max())
+        ciclo[linhas] = np.searchsorted(inicios, ordinais[linhas], side="right") - 1
+
+        usados = np.unique(ciclo[linhas])
+        total = np.bincount(ciclo[linhas], weights=valores[linhas], minlength=len(inicios))
+        compras = np.bincount(ciclo[linhas], minlength=len(inicios))
+        inicio = inicios[usados].astype("datetime64[D]")
+        fim = (inicios[usados + 1] - 1).astype("datetime64[D]")
+        tabelas[forma] = pd.DataFrame({
+            "CICLO": usados,
+            "INICIO": pd.to_datetime(inicio),
+            "FIM": pd.to_datetime(fim),
+            "COMPRAS": compras[usados],
+            "TOTAL": total[usados],
+        }).iloc[::-1].reset_index(drop=True)
+        tabelas[forma].attrs["dia_fechamento"] = dia
+
+    # linhas agrupadas por (forma, ciclo): cada fatura vira uma fatia contígua de `ordem`
+    ordem = np.lexsort((-ordinais, ciclo, codigos))
+    chaves = codigos[ordem] * (ciclo.max() + 1) + ciclo[ordem]
+    quebras = np.flatnonzero(np.diff(chaves)) + 1
+    inicios_fatia = np.r_[0, quebras]
+    fins_fatia = np.r_[quebras, len(ordem)]
+    return {
+        "formas": list(formas),
+        "tabelas": tabelas,
+        "ordem": ordem,
+        "limites": {
+            (formas[codigos[ordem[a]]], int(ciclo[ordem[a]])): (int(a), int(b))
+            for a, b in zip(inicios_fatia, fins_fatia)
+        },
+    }
+
+
+def linhas_fatura(faturas, forma, ciclo):
+    inicio, fim = faturas["limites"].get((forma, int(ciclo)), (0, 0))
+    return faturas["ordem"][inicio:fim]
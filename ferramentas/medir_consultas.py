@@ -0,0 +1,145 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from planilha_sintetica import DESCRICOES_DESPESA, FORMAS, NOMES_GASTOS  # noqa: E402
+from ranking import totais_classificacao  # noqa: E402
+
+
+# =========================
+# BASE SINTÉTICA JÁ PREPARADA
+# =========================
+def _datas(rng, linhas, anos):
+    fim = np.datetime64(pd.Timestamp.today().normalize().strftime("%Y-%m-%d"), "D")
+    return np.sort(fim - rng.integers(0, anos * 365, linhas).astype("timedelta64[D]"))[::-1].astype("datetime64[us]")
+
+
+def _calendario(datas):
+    from formatos import MESES_PT
+
+    serie = pd.Series(datas)
+    ano = serie.dt.year.astype(np.int32)
+    mes = serie.dt.month.astype(np.int32)
+    abrev = mes.map(MESES_PT)
+    return ano, mes, abrev, abrev + "/" + ano.astype(str)
+
+
+def base_sintetica(linhas, anos, semente=42):
+    rng = np.random.default_rng(semente)
+    nomes = np.asarray(NOMES_GASTOS + [f"Loja {i:04d}" for i in range(2000)], dtype=object)
+
+    datas = _datas(rng, linhas, anos)
+    ano, mes, abrev, mes_ano = _calendario(datas)
+    gastos = pd.DataFrame({
+        "DATA": datas,
+        "MES": abrev,
+        "NOME": nomes[rng.zipf(1.3, linhas) % len(nomes)],
+        "FORMA PAGAMENTO": np.asarray(FORMAS, dtype=object)[rng.integers(0, len(FORMAS), linhas)],
+        "CLASSIFICACAO": np.where(rng.random(linhas) < 0.55, "INDISPENSAVEL", "DISPENSAVEL"),
+        "VALOR": np.round(rng.gamma(2.0, 40.0, linhas), 2),
+        "QUINZENA": np.where(pd.Series(datas).dt.day <= 15, "1ª quinzena", "2ª quinzena"),
+        "ANO": ano,
+        "MES_NUM": mes,
+        "MES_ABREV": abrev,
+        "MES_ANO": mes_ano,
+    })
+
+    fixos = max(linhas // 20, 1)
+    datas = _datas(rng, fixos, anos)
+    ano, mes, abrev, _ = _calendario(datas)
+    principal = pd.DataFrame({"DATA": datas, "ANO": ano, "MES_NUM": mes, "MES": abrev})
+    receitas = principal.assign(
+        DESCRICAO=np.where(rng.random(fixos) < 0.8, "Salário", "Freela"),
+        VALOR=np.round(rng.normal(3000, 400, fixos), 2),
+    )
+    despesas = principal.assign(
+        DESCRICAO=np.asarray(DESCRICOES_DESPESA, dtype=object)[rng.integers(0, len(DESCRICOES_DESPESA), fixos)],
+        VALOR=np.round(rng.gamma(3.0, 300.0, fixos), 2),
+    )
+    itens = pd.DataFrame({
+        "CATEGORIA": ["RENDA", "MORADIA", "MORADIA", "ALIMENTAÇÃO", "TRANSPORTE", "OUTROS"],
+        "SUBCATEGORIA": ["Salário", "ALUGUEL", "Luz", "Mercado", "Ônibus", "Lazer"],
+        "VALOR": [6000.0, 1800.0, 200.0, 1200.0, 250.0, 180.0],
+    })
+    return {"receitas": receitas, "despesas": despesas, "gastos": gastos, "custo_vida": {"df_itens": itens}}
+
+
+# =========================
+# CAMINHOS COMPARADOS
+# =========================
+def consultas_pandas(snapshot, ranking, mes_ano, quinzena, classificacao):
+    gastos = snapshot["gastos"]
+    mascara = (gastos["MES_ANO"] == mes_ano).to_numpy(copy=True)
+    if quinzena != "Todas":
+        mascara &= (gastos["QUINZENA"] == quinzena).to_numpy()
+    if classificacao != "Todos":
+        mascara &= (gastos["CLASSIFICACAO"] == classificacao).to_numpy()
+    classes = totais_classificacao(gastos[mascara])
+    return int(classes["LANCAMENTOS"].sum()), float(classes["VALOR"].sum()), ranking.get((mes_ano, quinzena, classificacao))
+
+
+def consultas_duckdb(consultas, mes_ano, quinzena, classificacao):
+    consultas.gastos_filtrados(mes_ano, quinzena, classificacao)
+    classes = consultas.totais_classificacao(mes_ano, quinzena, classificacao)
+    return int(classes["LANCAMENTOS"].sum()), float(classes["VALOR"].sum()), consultas.top_gastos(mes_ano, quinzena, classificacao)
+
+
+def _cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000, resultado
+
+
+def medir(linhas, anos, repeticoes, threads):
+    from consultas_duckdb import ConsultasDuckDB
+    from dados import montar_resumo
+    from ranking import ranking_gastos
+
+    inicio = time.perf_counter()
+    snapshot = base_sintetica(linhas, anos)
+    print(f"Base: {len(snapshot['gastos']):,} gastos + {len(snapshot['receitas']) * 2:,} receitas/despesas "
+          f"({time.perf_counter() - inicio:.1f} s para gerar)")
+
+    ms_ranking, ranking = _cronometrar(lambda: ranking_gastos(snapshot["gastos"]), 1)
+    ms_montar, consultas = _cronometrar(lambda: ConsultasDuckDB(snapshot, threads=threads), 1)
+    print(f"Preparo por versão: pandas ranking_gastos {ms_ranking:.0f} ms • DuckDB carga ordenada a partir do Arrow {ms_montar:.0f} ms")
+
+    ms_pd, resumo_pd = _cronometrar(lambda: montar_resumo(snapshot["receitas"], snapshot["despesas"]), repeticoes)
+    ms_db, resumo_db = _cronometrar(consultas.resumo, repeticoes)
+    assert np.allclose(resumo_pd["SALDO"].to_numpy(), resumo_db["SALDO"].to_numpy())
+    print(f"{'resumo (receitas × despesas por mês)':<40} pandas {ms_pd:>8.1f} ms • DuckDB {ms_db:>8.1f} ms")
+
+    meses = snapshot["gastos"]["MES_ANO"].iloc[[0, len(snapshot["gastos"]) // 2]].tolist()
+    for mes_ano in meses:
+        for quinzena, classificacao in [("Todas", "Todos"), ("1ª quinzena", "DISPENSAVEL")]:
+            ms_pd, (n_pd, soma_pd, top_pd) = _cronometrar(
+                lambda: consultas_pandas(snapshot, ranking, mes_ano, quinzena, classificacao), repeticoes
+            )
+            ms_db, (n_db, soma_db, top_db) = _cronometrar(
+                lambda: consultas_duckdb(consultas, mes_ano, quinzena, classificacao), repeticoes
+            )
+            assert n_pd == n_db and abs(soma_pd - soma_db) < 1e-6 and abs(top_pd["total"] - top_db["total"]) < 1e-6
+            rotulo = f"filtro {mes_ano} • {quinzena} • {classificacao}"
+            print(f"{rotulo:<40} pandas {ms_pd:>8.1f} ms • DuckDB {ms_db:>8.1f} ms • {n_db:,} linhas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara o caminho pandas com as consultas DuckDB sobre Arrow.")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--anos", type=int, default=10)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+    medir(args.linhas, args.anos, args.repeticoes, args.threads)
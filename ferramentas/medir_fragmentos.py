@@ -0,0 +1,70 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from planilha_sintetica import gerar_planilha  # noqa: E402
+
+
+def _selectbox(at, rotulo):
+    return next(s for s in at.selectbox if s.label == rotulo)
+
+
+def _cronometrar(acao):
+    inicio = time.perf_counter()
+    acao()
+    return time.perf_counter() - inicio
+
+
+def medir(anos, repeticoes):
+    from streamlit.testing.v1 import AppTest
+
+    pasta = tempfile.mkdtemp(prefix="atlas-medir-")
+    planilha_id = "planilhasintetica"
+    with open(os.path.join(pasta, f"{planilha_id}.xlsx"), "wb") as f:
+        f.write(gerar_planilha(anos=anos))
+    os.environ["ATLAS_PLANILHA_URL_MODELO"] = os.path.join(pasta, "{id}.xlsx")
+    os.environ["ATLAS_PLANILHA_ID"] = planilha_id
+    os.environ["ATLAS_MEDIR_TEMPOS"] = "1"
+
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+    frio = _cronometrar(at.run)
+
+    interacoes = {
+        "Escolha o mês": "secao_raio_x",
+        "🗓️ Quinzena": "secao_gastos",
+        "Filtro": "secao_gastos",
+    }
+    resultados = {}
+    for rotulo, secao in interacoes.items():
+        completo, secao_s = [], []
+        for i in range(repeticoes):
+            caixa = _selectbox(at, rotulo)
+            opcao = caixa.options[i % len(caixa.options)]
+            completo.append(_cronometrar(lambda: caixa.select(opcao).run()))
+            secao_s.append(at.session_state["tempos_secoes"][secao])
+        resultados[rotulo] = (statistics.median(completo), statistics.median(secao_s))
+
+    print(f"Primeira execução (download + preparo): {frio * 1000:.1f} ms")
+    # O AppTest sempre reexecuta o script inteiro; o tempo da seção é o corpo da
+    # função decorada, um piso para o rerun do fragmento, não o rerun em si.
+    print(f"{'Interação':<20} {'script inteiro':>16} {'execução da seção':>18} {'teto do ganho':>14}")
+    for rotulo, (completo, secao) in resultados.items():
+        teto = completo / secao if secao else float("inf")
+        print(f"{rotulo:<20} {completo * 1000:>13.1f} ms {secao * 1000:>15.1f} ms {teto:>13.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara o rerun completo de cada filtro com o tempo de execução da seção que ele afeta."
+    )
+    parser.add_argument("--anos", type=int, default=3)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    medir(args.anos, args.repeticoes)
@@ -0,0 +1,46 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from planilha_sintetica import gerar_planilha  # noqa: E402
+
+
+def _titulo(spec):
+    dados = json.loads(spec).get("data", [])
+    nomes = [t.get("name") or t.get("type", "?") for t in dados[:3]]
+    return f"{len(dados)} traços: " + ", ".join(str(n) for n in nomes)
+
+
+def medir(anos):
+    from streamlit.testing.v1 import AppTest
+
+    pasta = tempfile.mkdtemp(prefix="atlas-graficos-")
+    planilha_id = "planilhasintetica"
+    with open(os.path.join(pasta, f"{planilha_id}.xlsx"), "wb") as f:
+        f.write(gerar_planilha(anos=anos))
+    os.environ["ATLAS_PLANILHA_URL_MODELO"] = os.path.join(pasta, "{id}.xlsx")
+    os.environ["ATLAS_PLANILHA_ID"] = planilha_id
+
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+    at.run()
+    total = 0
+    print(f"Planilha sintética de {anos} anos — bytes de cada gráfico na mensagem enviada pelo websocket")
+    for grafico in at.get("plotly_chart"):
+        tamanho = grafico.proto.ByteSize()
+        total += tamanho
+        print(f"  {tamanho:>9,} B  {_titulo(grafico.proto.spec)}")
+    print(f"  {total:>9,} B  total")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tamanho serializado dos gráficos Plotly da página principal.")
+    parser.add_argument("--anos", type=int, default=6)
+    args = parser.parse_args()
+    medir(args.anos)
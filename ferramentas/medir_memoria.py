@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from planilha_sintetica import gerar_planilha  # noqa: E402
+
+
+def _mb(valor):
+    return f"{valor / 1024 / 1024:>8.2f} MB"
+
+
+def medir(anos, atualizacoes, sessoes):
+    from streamlit.testing.v1 import AppTest
+
+    pasta = tempfile.mkdtemp(prefix="atlas-memoria-")
+    planilha_id = "planilhasintetica"
+    with open(os.path.join(pasta, f"{planilha_id}.xlsx"), "wb") as f:
+        f.write(gerar_planilha(anos=anos))
+    os.environ["ATLAS_PLANILHA_URL_MODELO"] = os.path.join(pasta, "{id}.xlsx")
+    os.environ["ATLAS_PLANILHA_ID"] = planilha_id
+    os.environ["ATLAS_MEDIR_MEMORIA"] = "1"
+
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+    at.run()
+    print(f"Planilha sintética de {anos} anos — primeira execução")
+    print(f"  {'etapa':<20} {'pico':>11} {'retido':>11}")
+    for nome, valores in at.session_state["memoria_etapas"].items():
+        print(f"  {nome:<20} {_mb(valores['pico'])} {_mb(valores['retido'])}")
+
+    botao = next(b for b in at.button if "Atualizar" in b.label)
+    for _ in range(atualizacoes):
+        botao.click().run()
+        botao = next(b for b in at.button if "Atualizar" in b.label)
+    # sessões novas não podem abrir entradas novas de snapshot
+    for _ in range(sessoes):
+        at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+        at.run()
+
+    import tracemalloc
+
+    atual, pico = tracemalloc.get_traced_memory()
+    print(f"Depois de {atualizacoes} atualizações e {sessoes} sessões novas: {_mb(atual)} em uso, pico {_mb(pico)}")
+    caches = at.dataframe[-2].value
+    for linha in caches.to_dict("records"):
+        print(
+            f"  cache {linha['inquilino']}: {linha['entradas']} entradas (máx. {linha['max_entradas']}), "
+            f"{_mb(linha['bytes'])} de {_mb(linha['limite'])}, geração {linha['geracao']}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pico e memória retida por etapa, e o efeito de atualizações repetidas nos caches.")
+    parser.add_argument("--anos", type=int, default=3)
+    parser.add_argument("--atualizacoes", type=int, default=5)
+    parser.add_argument("--sessoes", type=int, default=5)
+    args = parser.parse_args()
+    medir(args.anos, args.atualizacoes, args.sessoes)
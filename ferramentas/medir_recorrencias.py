@@ -0,0 +1,75 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from planilha_sintetica import gerar_planilha  # noqa: E402
+
+
+SUFIXOS_RUIDO = ["", "", " *SP", ".COM", " 03/12", " PAG*", " - compra"]
+
+
+def _com_ruido(gastos, semente):
+    rnd = random.Random(semente)
+    gastos = gastos.copy()
+    gastos["NOME"] = [f"{nome}{rnd.choice(SUFIXOS_RUIDO)}" for nome in gastos["NOME"]]
+    return gastos
+
+
+def _ate(df, ordinal):
+    meses = df["DATA"].dt.year * 12 + df["DATA"].dt.month - 1
+    return df[meses <= ordinal]
+
+
+def medir(anos, gastos_por_mes, meses_medidos):
+    from preparo_paralelo import preparar_workbook
+    from recorrencias import DetectorRecorrencias
+
+    snapshot = preparar_workbook(gerar_planilha(anos=anos, gastos_por_mes=gastos_por_mes))
+    despesas = snapshot["despesas"]
+    gastos = _com_ruido(snapshot["gastos"], anos)
+    print(f"Base: {len(despesas)} despesas, {len(gastos)} gastos, {gastos['NOME'].nunique()} descrições distintas")
+
+    fim = int((gastos["DATA"].dt.year * 12 + gastos["DATA"].dt.month - 1).max())
+    incremental = DetectorRecorrencias()
+    tempos_inc, tempos_cheio = [], []
+
+    for ordinal in range(fim - meses_medidos, fim + 1):
+        lancamentos = [
+            ("Despesa fixa", _ate(despesas, ordinal), "DESCRICAO"),
+            ("Gasto variável", _ate(gastos, ordinal), "NOME"),
+        ]
+        mes_aberto = (ordinal // 12, ordinal % 12 + 1)
+
+        inicio = time.perf_counter()
+        incremental.atualizar(lancamentos, mes_aberto, versao=ordinal)
+        tempos_inc.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        cheio = DetectorRecorrencias().atualizar(lancamentos, mes_aberto, versao=ordinal)
+        tempos_cheio.append(time.perf_counter() - inicio)
+
+    referencia = (fim // 12, fim % 12 + 1)
+    assert len(incremental.recorrentes(referencia)) == len(cheio.recorrentes(referencia))
+
+    # a primeira rodada do incremental é uma varredura completa
+    inc = statistics.median(tempos_inc[1:])
+    completo = statistics.median(tempos_cheio[1:])
+    print(f"Grupos: {len(cheio.grupos)} • recorrentes: {len(cheio.recorrentes(referencia))}")
+    print(f"Reprocessar o histórico inteiro por mês: {completo * 1000:>8.1f} ms")
+    print(f"Atualização incremental por mês:         {inc * 1000:>8.1f} ms  ({completo / inc:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do detector de recorrências (completo vs incremental).")
+    parser.add_argument("--anos", type=int, default=5)
+    parser.add_argument("--gastos-por-mes", type=int, default=150)
+    parser.add_argument("--meses", type=int, default=12, help="Quantos meses finais simular chegando um a um.")
+    args = parser.parse_args()
+    medir(args.anos, args.gastos_por_mes, args.meses)
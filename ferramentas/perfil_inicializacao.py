@@ -0,0 +1,102 @@
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS_ADIADOS = ["pandas", "numpy", "pyarrow", "plotly.graph_objects", "openpyxl", "preparo_paralelo"]
+
+
+def _chama_topbar(no):
+    return (
+        isinstance(no, ast.Expr)
+        and isinstance(no.value, ast.Call)
+        and getattr(no.value.func, "id", None) == "render_topbar"
+    )
+
+
+def imports_de_topo(caminho):
+    # só o que roda antes da topbar aparecer: imports depois dela já não atrasam o primeiro byte
+    with open(caminho, encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    modulos = []
+    for no in arvore.body:
+        if _chama_topbar(no):
+            break
+        if isinstance(no, ast.Import):
+            modulos.extend(alias.name for alias in no.names)
+        elif isinstance(no, ast.ImportFrom) and no.module and not no.level:
+            modulos.append(no.module)
+    return list(dict.fromkeys(modulos))
+
+
+def separar_streamlit(modulos):
+    streamlit = [m for m in modulos if m.split(".")[0] == "streamlit"]
+    return streamlit, [m for m in modulos if m not in streamlit]
+
+
+def adiados_carregados(modulos, ja_carregados=()):
+    codigo = "".join(f"import {m}\n" for m in list(ja_carregados) + list(modulos))
+    codigo += f"import sys\nprint('\\n'.join(m for m in {MODULOS_ADIADOS!r} if m in sys.modules))\n"
+    proc = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    return proc.stdout.split()
+
+
+def medir_imports(modulos, ja_carregados=()):
+    codigo = "".join(f"import {m}\n" for m in ja_carregados)
+    codigo += "import sys\nsys.stderr.write('--- inicio ---\\n')\n"
+    codigo += "".join(f"import {m}\n" for m in modulos)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "falha ao importar")
+
+    linhas = proc.stderr.split("--- inicio ---\n", 1)[-1].splitlines()
+    por_raiz = defaultdict(int)
+    for linha in linhas:
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, cumulativo, nome = linha.split(":", 1)[1].split("|")
+        cumulativo = cumulativo.strip()
+        if not cumulativo.isdigit():
+            continue
+        nome = nome[1:]
+        if not nome.startswith(" "):
+            por_raiz[nome.strip()] += int(cumulativo)
+    return dict(por_raiz)
+
+
+def imprimir(titulo, custos, limite=15):
+    total = sum(custos.values())
+    print(f"\n{titulo}: {total / 1000:.1f} ms")
+    for nome, us in sorted(custos.items(), key=lambda kv: kv[1], reverse=True)[:limite]:
+        print(f"  {us / 1000:>9.1f} ms  {nome}")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Perfil de imports do app.py (equivalente a python -X importtime, agregado por módulo)."
+    )
+    parser.add_argument("--orcamento-ms", type=float, default=None,
+                        help="Falha (código 1) se os imports próprios do app passarem deste tempo.")
+    args = parser.parse_args()
+
+    streamlit, proprios = separar_streamlit(imports_de_topo(os.path.join(RAIZ, "app.py")))
+
+    imprimir("Streamlit (custo fixo do servidor)", medir_imports(streamlit))
+    total_proprio = imprimir("Imports de topo do app.py (antes da topbar)", medir_imports(proprios, streamlit))
+    imprimir("Adiados para o primeiro gráfico/preparo", medir_imports(MODULOS_ADIADOS, streamlit + proprios))
+
+    if args.orcamento_ms is not None:
+        if total_proprio / 1000 > args.orcamento_ms:
+            print(f"\nOrçamento estourado: {total_proprio / 1000:.1f} ms > {args.orcamento_ms:.1f} ms")
+            sys.exit(1)
+        print(f"\nDentro do orçamento de {args.orcamento_ms:.1f} ms.")
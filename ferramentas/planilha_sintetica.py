@@ -0,0 +1,100 @@
+import argparse
+import io
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+
+
+NOMES_GASTOS = [
+    "iFood", "Uber", "Mercado Extra", "Farmácia", "Padaria", "Netflix", "Spotify",
+    "Posto Shell", "Cinema", "Livraria", "Academia", "Pet shop", "Restaurante",
+]
+FORMAS = ["Nubank", "Itaú crédito", "Pix", "Débito", "Dinheiro"]
+DESCRICOES_DESPESA = ["Aluguel", "Condomínio", "Luz", "Internet", "Celular", "Plano de saúde", "Faculdade"]
+
+
+def _dias(inicio, anos):
+    fim = date(inicio.year + anos, inicio.month, 1)
+    dia = inicio
+    while dia < fim:
+        yield dia
+        dia += timedelta(days=1)
+
+
+def gerar_planilha(anos=2, gastos_por_mes=60, ano_inicial=None, semente=42):
+    rnd = random.Random(semente)
+    inicio = date(ano_inicial or date.today().year - anos + 1, 1, 1)
+
+    receitas, despesas, gastos = [], [], []
+    for dia in _dias(inicio, anos):
+        if dia.day == 5:
+            receitas.append((dia, "Salário", round(rnd.uniform(5500, 6500), 2)))
+        if dia.day == 20:
+            receitas.append((dia, "Freela", round(rnd.uniform(300, 1500), 2)))
+        if dia.day == 10:
+            for desc in DESCRICOES_DESPESA:
+                despesas.append((dia, desc, round(rnd.uniform(80, 1800), 2)))
+        for _ in range(rnd.randint(0, max(1, gastos_por_mes // 15))):
+            gastos.append((
+                dia,
+                rnd.choice(NOMES_GASTOS),
+                rnd.choice(FORMAS),
+                rnd.choice(["Indispensável", "Dispensável"]),
+                round(rnd.uniform(8, 250), 2),
+            ))
+
+    tamanho = max(len(receitas), len(despesas))
+    receitas += [(None, None, None)] * (tamanho - len(receitas))
+    despesas += [(None, None, None)] * (tamanho - len(despesas))
+    principal = pd.DataFrame({
+        "DATA": [r[0] for r in receitas],
+        "DESCRIÇÃO": [r[1] for r in receitas],
+        "VALOR": [r[2] for r in receitas],
+        " ": [None] * tamanho,
+        "DATA ": [d[0] for d in despesas],
+        "DESCRIÇÃO ": [d[1] for d in despesas],
+        "VALOR ": [d[2] for d in despesas],
+    })
+
+    gastos_df = pd.DataFrame(gastos, columns=["DATA", "NOME", "FORMA PAGAMENTO", "CLASSIFICAÇÃO", "VALOR"])
+    gastos_df.insert(1, "MÊS", "")
+
+    custo_vida = pd.DataFrame([
+        ["CATEGORIA", "DESCRIÇÃO", "VALOR"],
+        ["RENDA", "Salário", 6000],
+        ["", "Freela", 800],
+        ["MORADIA", "Aluguel", 1800],
+        ["", "Condomínio", 450],
+        ["", "Luz", 160],
+        ["ALIMENTAÇÃO", "Mercado", 900],
+        ["", "Delivery", 300],
+        ["TRANSPORTE", "Uber", 250],
+        ["OUTROS", "Academia", 120],
+        ["", "Streaming", 60],
+        ["RENDA TOTAL", "", 6800],
+        ["CUSTOS TOTAIS", "", 4040],
+        ["SOBRA NO MÊS", "", 2760],
+    ])
+
+    investimento = pd.DataFrame([[None, None]] * 20)
+    investimento.iloc[13, 0] = "TOTAL INVESTIDO"
+    investimento.iloc[13, 1] = 25000.0
+
+    saida = io.BytesIO()
+    with pd.ExcelWriter(saida, engine="openpyxl") as escritor:
+        principal.to_excel(escritor, sheet_name="FINANCEIRO", index=False)
+        gastos_df.to_excel(escritor, sheet_name="GASTOS", index=False)
+        custo_vida.to_excel(escritor, sheet_name="CUSTO DE VIDA", index=False, header=False)
+        investimento.to_excel(escritor, sheet_name="INVESTIMENTO", index=False, header=False)
+    return saida.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera uma planilha sintética no formato do Atlas Financeiro.")
+    parser.add_argument("destino")
+    parser.add_argument("--anos", type=int, default=2)
+    parser.add_argument("--gastos-por-mes", type=int, default=60)
+    args = parser.parse_args()
+    with open(args.destino, "wb") as f:
+        f.write(gerar_planilha(args.anos, args.gastos_por_mes))
@@ -0,0 +1,115 @@
+import argparse
+import os
+import socketserver
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_compartilhado import LIBERAR_SE_DONO  # noqa: E402
+
+
+# =========================
+# SERVIDOR RESP MÍNIMO (GET/SET/DEL/PING + EVAL DO ARRENDAMENTO)
+# =========================
+class Armazem:
+    def __init__(self):
+        self.dados = {}
+        self.lock = threading.Lock()
+
+    def _vivo(self, chave):
+        item = self.dados.get(chave)
+        if item is None:
+            return None
+        valor, expira = item
+        if expira is not None and expira < time.monotonic():
+            del self.dados[chave]
+            return None
+        return valor
+
+    def executar(self, partes):
+        comando = partes[0].upper()
+        with self.lock:
+            if comando == b"PING":
+                return "+PONG"
+            if comando in (b"SELECT", b"AUTH"):
+                return "+OK"
+            if comando == b"GET":
+                return self._vivo(partes[1])
+            if comando == b"DEL":
+                removidos = sum(1 for chave in partes[1:] if self._vivo(chave) is not None and self.dados.pop(chave))
+                return removidos
+            if comando == b"SET":
+                chave, valor, opcoes = partes[1], partes[2], [p.upper() for p in partes[3:]]
+                expira = None
+                if b"PX" in opcoes:
+                    expira = time.monotonic() + int(partes[3 + opcoes.index(b"PX") + 1]) / 1000
+                if b"EX" in opcoes:
+                    expira = time.monotonic() + int(partes[3 + opcoes.index(b"EX") + 1])
+                if b"NX" in opcoes and self._vivo(chave) is not None:
+                    return None
+                self.dados[chave] = (valor, expira)
+                return "+OK"
+            if comando == b"EVAL" and partes[1].decode() == LIBERAR_SE_DONO:
+                # sem Lua aqui: só o compara-e-apaga que o BackendRedis.liberar manda,
+                # atômico sob o mesmo lock
+                chave, dono = partes[3], partes[4]
+                if self._vivo(chave) != dono:
+                    return 0
+                del self.dados[chave]
+                return 1
+        return f"-ERR comando não suportado: {comando.decode(errors='replace')}"
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def _ler_comando(self):
+        linha = self.rfile.readline()
+        if not linha:
+            return None
+        if not linha.startswith(b"*"):
+            return linha.split()
+        partes = []
+        for _ in range(int(linha[1:-2])):
+            tamanho = int(self.rfile.readline()[1:-2])
+            partes.append(self.rfile.read(tamanho + 2)[:-2])
+        return partes
+
+    def handle(self):
+        while True:
+            partes = self._ler_comando()
+            if partes is None:
+                return
+            resposta = self.server.armazem.executar(partes)
+            if resposta is None:
+                self.wfile.write(b"$-1\r\n")
+            elif isinstance(resposta, int):
+                self.wfile.write(b":%d\r\n" % resposta)
+            elif isinstance(resposta, str):
+                self.wfile.write(resposta.encode() + b"\r\n")
+            else:
+                self.wfile.write(b"$%d\r\n%s\r\n" % (len(resposta), resposta))
+
+
+class ServidorResp(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, endereco):
+        super().__init__(endereco, Handler)
+        self.armazem = Armazem()
+
+
+def iniciar(porta=0):
+    servidor = ServidorResp(("127.0.0.1", porta))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local com protocolo Redis (subconjunto) para testes.")
+    parser.add_argument("--porta", type=int, default=6379)
+    args = parser.parse_args()
+    servidor = ServidorResp(("127.0.0.1", args.porta))
+    print(f"Escutando em redis://127.0.0.1:{args.porta}/0")
+    servidor.serve_forever()
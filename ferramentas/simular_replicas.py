@@ -0,0 +1,103 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from planilha_sintetica import gerar_planilha  # noqa: E402
+
+
+# =========================
+# ORIGEM CONTANDO DOWNLOADS
+# =========================
+def servir_contando(corpo):
+    contagem = {"downloads": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                contagem["downloads"] += 1
+            time.sleep(0.2)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, contagem
+
+
+# =========================
+# RÉPLICA
+# =========================
+def replica(url_planilha, url_backend, largada, fila):
+    sys.path.insert(0, RAIZ)
+    from busca_planilhas import criar_buscador
+    from cache_compartilhado import baixar_compartilhado, criar_backend
+    from preparo_paralelo import preparar_workbook
+
+    backend = criar_backend(url_backend) if url_backend else None
+    buscador = criar_buscador()
+    largada.wait()
+    inicio = time.perf_counter()
+    conteudo = baixar_compartilhado(buscador, url_planilha, backend)
+    snapshot = preparar_workbook(conteudo, compartilhado=backend)
+    fila.put((os.getpid(), time.perf_counter() - inicio, len(snapshot["gastos"]), sorted(snapshot["erros"])))
+
+
+def rodar(replicas, url_backend, anos):
+    servidor, contagem = servir_contando(gerar_planilha(anos=anos))
+    url_planilha = f"http://127.0.0.1:{servidor.server_address[1]}/planilha.xlsx"
+
+    contexto = multiprocessing.get_context("spawn")
+    largada = contexto.Event()
+    fila = contexto.Queue()
+    processos = [contexto.Process(target=replica, args=(url_planilha, url_backend, largada, fila)) for _ in range(replicas)]
+    for p in processos:
+        p.start()
+    time.sleep(2.0)
+    inicio = time.perf_counter()
+    largada.set()
+    resultados = [fila.get(timeout=300) for _ in processos]
+    duracao = time.perf_counter() - inicio
+    for p in processos:
+        p.join()
+    servidor.shutdown()
+
+    print(f"Backend: {url_backend or 'nenhum (cada réplica por conta própria)'}")
+    print(f"Réplicas: {replicas} • downloads na origem: {contagem['downloads']} • tempo total: {duracao:.2f} s")
+    for pid, segundos, linhas, erros in sorted(resultados, key=lambda r: r[1]):
+        print(f"  réplica {pid}: {segundos * 1000:>8.1f} ms • {linhas} gastos" + (f" • erros: {erros}" if erros else ""))
+    return contagem["downloads"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simula N réplicas carregando a mesma planilha com cache compartilhado.")
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--anos", type=int, default=2)
+    parser.add_argument("--backend", choices=["nenhum", "sqlite", "redis"], default="sqlite")
+    parser.add_argument("--url", default=None, help="URL do backend (padrão: arquivo temporário ou servidor RESP local).")
+    args = parser.parse_args()
+
+    url_backend = args.url
+    if url_backend is None and args.backend == "sqlite":
+        url_backend = f"sqlite://{os.path.join(tempfile.mkdtemp(prefix='atlas-cache-'), 'cache.db')}"
+    elif url_backend is None and args.backend == "redis":
+        from servidor_resp import iniciar
+
+        url_backend = f"redis://127.0.0.1:{iniciar().server_address[1]}/0"
+    rodar(args.replicas, url_backend if args.backend != "nenhum" else None, args.anos)
@@ -0,0 +1,206 @@
+import argparse
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from planilha_sintetica import gerar_planilha  # noqa: E402
+
+
+NAV_OPTS = ["🌙 Atlas Financeiro", "🏠 Projeto Morar Sozinho"]
+
+
+# =========================
+# PLANILHAS LOCAIS
+# =========================
+def servir_planilhas(planilhas):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            corpo = planilhas.get(self.path.strip("/").removesuffix(".xlsx"))
+            if corpo is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    pos = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[pos]
+
+
+# =========================
+# SESSÕES
+# =========================
+def _selectbox(at, rotulo):
+    return next((s for s in at.selectbox if s.label == rotulo), None)
+
+
+def _radio(at, rotulo):
+    return next((r for r in at.radio if r.label == rotulo), None)
+
+
+def _navegar(at, destino):
+    radio = _radio(at, "Navegação")
+    if radio is None:
+        motivo = "; ".join(e.value for e in at.error) or "sem mensagem na página"
+        raise RuntimeError(f"rádio de navegação não apareceu ({motivo})")
+    radio.set_value(destino).run()
+
+
+def preparar_sessoes_paralelas():
+    # o AppTest foi feito para uma sessão por vez; três ajustes deixam as sessões em
+    # threads parecidas com um servidor de verdade:
+    # - cada AppTest.run troca o Runtime global por um mock e o zera ao terminar, então a
+    #   sessão que termina primeiro tiraria o runtime das que ainda rodam;
+    # - cada AppTest tem seu ScriptCache e recompila o app.py, e ast.parse em paralelo
+    #   quebra no CPython 3.11 — o servidor compila uma vez só;
+    # - cada run liga global.appTest e devolve o valor anterior ao terminar, então os
+    #   widgets das outras sessões perderiam o registro de teste no meio da execução.
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    ultimo = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            ultimo["runtime"] = cls._instance
+            return cls._instance
+        if "runtime" in ultimo:
+            return ultimo["runtime"]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    def exists(cls):
+        return cls._instance is not None or "runtime" in ultimo
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+    compilar = ScriptCache.get_bytecode
+    trava = threading.Lock()
+
+    def get_bytecode(self, script_path):
+        with trava:
+            return compilar(self, script_path)
+
+    ScriptCache.get_bytecode = get_bytecode
+    config.set_option("global.appTest", True)
+
+
+def simular_sessao(indice, planilha_id, rodadas, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    latencias = []
+
+    def medir(acao):
+        inicio = time.perf_counter()
+        acao()
+        latencias.append(time.perf_counter() - inicio)
+
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=timeout)
+    at.query_params["planilha"] = planilha_id
+    erros = []
+    # uma sessão que quebra vira erro no relatório, sem derrubar as outras
+    try:
+        medir(at.run)
+        for rodada in range(rodadas):
+            for rotulo in ("Escolha o mês", "📅 Mês dos gastos", "🗓️ Quinzena", "Filtro"):
+                caixa = _selectbox(at, rotulo)
+                if caixa is not None and caixa.options:
+                    opcao = caixa.options[(indice + rodada) % len(caixa.options)]
+                    medir(lambda: caixa.select(opcao).run())
+            medir(lambda: _navegar(at, NAV_OPTS[1]))
+            if at.slider:
+                medir(lambda: at.slider[0].set_value((indice * 10 + rodada * 50) % 1000).run())
+            medir(lambda: _navegar(at, NAV_OPTS[0]))
+    except Exception as e:
+        erros.append(f"sessão {indice}: {type(e).__name__}: {e}")
+
+    erros.extend(f"sessão {indice}: {e.value}" for e in at.exception)
+    return latencias, erros
+
+
+def rodar(sessoes, rodadas, planilhas_distintas, anos, timeout):
+    planilhas = {
+        f"planilhasintetica{i:03d}": gerar_planilha(anos=anos, semente=i)
+        for i in range(planilhas_distintas)
+    }
+    servidor = servir_planilhas(planilhas)
+    os.environ["ATLAS_PLANILHA_URL_MODELO"] = f"http://127.0.0.1:{servidor.server_address[1]}/{{id}}.xlsx"
+    ids = list(planilhas)
+
+    preparar_sessoes_paralelas()
+    rss_inicial = rss_bytes()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessoes) as executor:
+        futuros = [
+            executor.submit(simular_sessao, i, ids[i % len(ids)], rodadas, timeout)
+            for i in range(sessoes)
+        ]
+        resultados = [f.result() for f in futuros]
+    duracao = time.perf_counter() - inicio
+    rss_final = rss_bytes()
+    servidor.shutdown()
+
+    latencias = [lat for lats, _ in resultados for lat in lats]
+    erros = [erro for _, errs in resultados for erro in errs]
+
+    print(f"Sessões simultâneas: {sessoes} • planilhas: {planilhas_distintas} • rodadas: {rodadas}")
+    print(f"Reruns: {len(latencias)} em {duracao:.2f} s → {len(latencias) / duracao:.1f} reruns/s")
+    print(f"Latência p50: {percentil(latencias, 50) * 1000:.1f} ms • p95: {percentil(latencias, 95) * 1000:.1f} ms"
+          f" • média: {statistics.fmean(latencias) * 1000:.1f} ms")
+    print(f"RSS: {rss_inicial / 2**20:.1f} MiB → {rss_final / 2**20:.1f} MiB"
+          f" • {(rss_final - rss_inicial) / sessoes / 2**20:.2f} MiB por sessão")
+    if erros:
+        print(f"Exceções no app: {len(erros)}")
+        for erro in erros[:5]:
+            print(f"  - {erro}")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga do app.py com sessões simultâneas via AppTest.")
+    parser.add_argument("--sessoes", type=int, default=8)
+    parser.add_argument("--rodadas", type=int, default=3)
+    parser.add_argument("--planilhas", type=int, default=1, help="Quantidade de planilhas distintas (inquilinos).")
+    parser.add_argument("--anos", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+    sys.exit(rodar(args.sessoes, args.rodadas, args.planilhas, args.anos, args.timeout))
@@ -0,0 +1,34 @@
+import unicodedata
+
+
+def formato_real(v):
+    try:
+        v = float(v)
+    except Exception:
+        v = 0.0
+    return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def normalizar_texto(txt):
+    txt = str(txt).strip().upper()
+    txt = unicodedata.normalize("NFKD", txt).encode("ascii", errors="ignore").decode("utf-8")
+    return txt
+
+
+MESES_PT = {
+    1: "JAN", 2: "FEV", 3: "MAR", 4: "ABR", 5: "MAI", 6: "JUN",
+    7: "JUL", 8: "AGO", 9: "SET", 10: "OUT", 11: "NOV", 12: "DEZ"
+}
+
+
+def mes_ano_pt(data):
+    if data is None or data != data:
+        return ""
+    return f"{MESES_PT.get(int(data.month), '')}/{data.year}"
+
+
+def format_pct(v):
+    try:
+        return f"{float(v):.1f}%".replace(".", ",")
+    except Exception:
+        return "0,0%"
@@ -0,0 +1,51 @@
+import functools
+
+
+SEPARADORES = ",."
+TEXTO_BRL = "R$ %{y:,.2f}"
+HOVER_BRL = "<b>%{x}</b><br>R$ %{y:,.2f}<extra></extra>"
+
+CHAVES_LAYOUT = (
+    "autotypenumbers", "colorway", "font", "hovermode", "hoverlabel", "paper_bgcolor", "plot_bgcolor",
+    "xaxis", "yaxis", "coloraxis", "shapedefaults", "annotationdefaults", "title",
+)
+TRACOS_TEMPLATE = ("bar", "scatter", "histogram", "heatmap")
+
+
+# =========================
+# TEMPLATE SÓ COM O QUE OS GRÁFICOS USAM
+# =========================
+@functools.lru_cache(maxsize=8)
+def template_compacto(nome):
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    base = pio.templates[nome]
+    layout = {chave: valor for chave, valor in base.layout.to_plotly_json().items() if chave in CHAVES_LAYOUT}
+    dados = {tipo: tracos for tipo, tracos in base.data.to_plotly_json().items() if tipo in TRACOS_TEMPLATE}
+    return go.layout.Template(layout=layout, data=dados)
+
+
+def _numerico(valores):
+    import numpy as np
+
+    if valores is None or isinstance(valores, (str, dict)):
+        return None
+    arr = np.asarray(valores)
+    if arr.dtype.kind == "f":
+        return np.round(arr, 2)
+    if arr.dtype.kind in "iu":
+        return arr
+    return None
+
+
+def compactar_figura(fig, tema="plotly_dark"):
+    fig.update_layout(template=template_compacto(tema), separators=SEPARADORES)
+    for traco in fig.data:
+        for eixo in ("x", "y", "z"):
+            if eixo not in traco:
+                continue
+            valores = _numerico(traco[eixo])
+            if valores is not None:
+                traco[eixo] = valores
+    return fig
@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+
+def ordinais_dia(datas):
+    return np.asarray(datas, dtype="datetime64[D]").astype(np.int64)
+
+
+def _ordinal(dia):
+    return int(np.datetime64(dia, "D").astype(np.int64))
+
+
+# =========================
+# SOMAS ACUMULADAS POR DIA
+# =========================
+class IndicePeriodos:
+    def __init__(self, series):
+        ordinais = {nome: ordinais_dia(datas) for nome, (datas, _) in series.items()}
+        preenchidos = [o for o in ordinais.values() if len(o)]
+        if preenchidos:
+            self.inicio = int(min(o.min() for o in preenchidos))
+            self.fim = int(max(o.max() for o in preenchidos))
+        else:
+            self.inicio = self.fim = _ordinal(date.today())
+        tamanho = self.fim - self.inicio + 1
+
+        self.acumulados = {}
+        for nome, (_, valores) in series.items():
+            por_dia = np.bincount(
+                ordinais[nome] - self.inicio,
+                weights=np.asarray(valores, dtype=np.float64),
+                minlength=tamanho,
+            )
+            self.acumulados[nome] = np.concatenate(([0.0], np.cumsum(por_dia)))
+
+    @property
+    def primeiro_dia(self):
+        return np.datetime64(self.inicio, "D").item()
+
+    @property
+    def ultimo_dia(self):
+        return np.datetime64(self.fim, "D").item()
+
+    def total(self, nome, de, ate):
+        i = max(_ordinal(de), self.inicio) - self.inicio
+        j = min(_ordinal(ate), self.fim) - self.inicio + 1
+        if j <= i:
+            return 0.0
+        acumulado = self.acumulados[nome]
+        return float(acumulado[j] - acumulado[i])
+
+    def totais(self, de, ate):
+        return {nome: self.total(nome, de, ate) for nome in self.acumulados}
+
+    def mes(self, nome, ano, mes):
+        return self.total(nome, *limites_mes(ano, mes))
+
+    def quinzena(self, nome, ano, mes, primeira=True):
+        de, ate = limites_mes(ano, mes)
+        if primeira:
+            return self.total(nome, de, date(ano, mes, 15))
+        return self.total(nome, date(ano, mes, 16), ate)
+
+    def ano(self, nome, ano, ate=None):
+        return self.total(nome, date(ano, 1, 1), ate or date(ano, 12, 31))
+
+
+def indicadores_ano(indice, investido, ano, mes):
+    # sem aba principal não há índice: tudo zerado, como um ano sem lançamentos
+    receita = despesa = saldo_restante = 0.0
+    if indice is not None:
+        receita = indice.ano("RECEITA", ano)
+        despesa = indice.ano("DESPESA", ano)
+        if mes < 12:
+            restante = (date(ano, mes + 1, 1), date(ano, 12, 31))
+            saldo_restante = indice.total("RECEITA", *restante) - indice.total("DESPESA", *restante)
+    return {
+        "receita_ano": receita,
+        "despesa_ano": despesa,
+        "saldo_ano": receita - despesa,
+        "saldo_restante": saldo_restante,
+        "investido": investido,
+        "patrimonio_em_construcao": saldo_restante + investido,
+    }
+
+
+def limites_mes(ano, mes):
+    proximo = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    return date(ano, mes, 1), proximo - timedelta(days=1)
+
+
+def mesmo_periodo_ano_anterior(de, ate):
+    def recuar(dia):
+        try:
+            return dia.replace(year=dia.year - 1)
+        except ValueError:
+            return dia.replace(year=dia.year - 1, day=28)
+    return recuar(de), recuar(ate)
+
+
+def montar_indice(receitas, despesas, gastos=None):
+    series = {
+        "RECEITA": (receitas["DATA"].to_numpy(), receitas["VALOR"].to_numpy()),
+        "DESPESA": (despesas["DATA"].to_numpy(), despesas["VALOR"].to_numpy()),
+    }
+    if gastos is not None and not gastos.empty:
+        series["GASTOS"] = (gastos["DATA"].to_numpy(), gastos["VALOR"].to_numpy())
+    return IndicePeriodos(series)
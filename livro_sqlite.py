@@ -0,0 +1,283 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dados import completar_resumo
+from ranking import TOP_N
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS lancamentos (
+    origem TEXT NOT NULL,
+    mes_chave INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    ano INTEGER NOT NULL,
+    mes_txt TEXT,
+    mes_ano TEXT,
+    quinzena TEXT,
+    descricao TEXT,
+    forma_pagamento TEXT,
+    classificacao TEXT,
+    mes_planilha TEXT,
+    valor REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_lancamentos_chave ON lancamentos (origem, mes_chave);
+CREATE INDEX IF NOT EXISTS ix_lancamentos_data ON lancamentos (origem, data);
+CREATE INDEX IF NOT EXISTS ix_lancamentos_mes ON lancamentos (origem, ano, mes_txt);
+CREATE INDEX IF NOT EXISTS ix_lancamentos_filtro ON lancamentos (origem, mes_ano, quinzena, classificacao);
+CREATE TABLE IF NOT EXISTS meses (
+    origem TEXT NOT NULL,
+    mes_chave INTEGER NOT NULL,
+    assinatura TEXT NOT NULL,
+    linhas INTEGER NOT NULL,
+    PRIMARY KEY (origem, mes_chave)
+);
+CREATE TABLE IF NOT EXISTS custo_vida (
+    categoria TEXT NOT NULL,
+    subcategoria TEXT NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (categoria, subcategoria)
+);
+"""
+
+COLUNAS = [
+    "origem", "mes_chave", "data", "ano", "mes_txt", "mes_ano", "quinzena",
+    "descricao", "forma_pagamento", "classificacao", "mes_planilha", "valor",
+]
+
+
+def _texto(df, coluna):
+    if coluna not in df.columns:
+        return pd.Series(None, index=df.index, dtype=object)
+    return df[coluna].astype(object).where(df[coluna].notna(), None)
+
+
+def normalizar_lancamentos(origem, df, coluna_descricao):
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUNAS)
+    datas = df["DATA"]
+    return pd.DataFrame({
+        "origem": origem,
+        "mes_chave": (datas.dt.year * 12 + datas.dt.month - 1).astype(np.int64),
+        "data": datas.dt.strftime("%Y-%m-%d"),
+        "ano": datas.dt.year.astype(np.int64),
+        "mes_txt": _texto(df, "MES_ABREV") if "MES_ABREV" in df.columns else _texto(df, "MES"),
+        "mes_ano": _texto(df, "MES_ANO"),
+        "quinzena": _texto(df, "QUINZENA"),
+        "descricao": _texto(df, coluna_descricao),
+        "forma_pagamento": _texto(df, "FORMA PAGAMENTO"),
+        "classificacao": _texto(df, "CLASSIFICACAO"),
+        "mes_planilha": _texto(df, "MES") if "MES_ABREV" in df.columns else None,
+        "valor": df["VALOR"].astype(np.float64).fillna(0.0),
+    }, columns=COLUNAS)
+
+
+def assinaturas_mensais(linhas):
+    if linhas.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(linhas, index=False).to_numpy()
+    grupos = pd.Series(hashes).groupby(linhas["mes_chave"].to_numpy())
+    return {
+        int(mes): (hashlib.sha1(np.sort(h.to_numpy()).tobytes()).hexdigest(), len(h))
+        for mes, h in grupos
+    }
+
+
+# =========================
+# LIVRO-RAZÃO EM SQLITE
+# =========================
+class LivroSQLite:
+    def __init__(self, caminho, timeout=30.0):
+        self.caminho = caminho
+        self.timeout = timeout
+        self._local = threading.local()
+        self._escrita = threading.Lock()
+
+    def _conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=self.timeout, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.executescript(ESQUEMA)
+            self._local.conexao = conexao
+        return conexao
+
+    # =========================
+    # IMPORTAÇÃO INCREMENTAL
+    # =========================
+    def _sincronizar_origem(self, conexao, origem, linhas):
+        novas = assinaturas_mensais(linhas)
+        gravadas = {
+            mes: assinatura
+            for mes, assinatura in conexao.execute(
+                "SELECT mes_chave, assinatura FROM meses WHERE origem = ?", (origem,)
+            )
+        }
+        mudaram = [mes for mes, (assinatura, _) in novas.items() if gravadas.get(mes) != assinatura]
+        removidos = [mes for mes in gravadas if mes not in novas]
+
+        conexao.executemany(
+            "DELETE FROM lancamentos WHERE origem = ? AND mes_chave = ?",
+            [(origem, mes) for mes in mudaram + removidos],
+        )
+        conexao.executemany("DELETE FROM meses WHERE origem = ? AND mes_chave = ?", [(origem, mes) for mes in removidos])
+
+        inserir = linhas[linhas["mes_chave"].isin(mudaram)]
+        conexao.executemany(
+            f"INSERT INTO lancamentos ({', '.join(COLUNAS)}) VALUES ({', '.join('?' * len(COLUNAS))})",
+            inserir.itertuples(index=False, name=None),
+        )
+        conexao.executemany(
+            "INSERT INTO meses (origem, mes_chave, assinatura, linhas) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(origem, mes_chave) DO UPDATE SET assinatura = excluded.assinatura, linhas = excluded.linhas",
+            [(origem, mes, *novas[mes]) for mes in mudaram],
+        )
+        return len(mudaram) + len(removidos), len(inserir)
+
+    def _sincronizar_custo_vida(self, conexao, projeto):
+        itens = projeto["df_itens"] if projeto else None
+        if itens is None or itens.empty:
+            conexao.execute("DELETE FROM custo_vida")
+            return
+        itens = itens.groupby(["CATEGORIA", "SUBCATEGORIA"], as_index=False)["VALOR"].sum()
+        conexao.executemany(
+            "INSERT INTO custo_vida (categoria, subcategoria, valor) VALUES (?, ?, ?) "
+            "ON CONFLICT(categoria, subcategoria) DO UPDATE SET valor = excluded.valor",
+            itens[["CATEGORIA", "SUBCATEGORIA", "VALOR"]].itertuples(index=False, name=None),
+        )
+        atuais = set(zip(itens["CATEGORIA"], itens["SUBCATEGORIA"]))
+        sobras = [c for c in conexao.execute("SELECT categoria, subcategoria FROM custo_vida") if c not in atuais]
+        conexao.executemany("DELETE FROM custo_vida WHERE categoria = ? AND subcategoria = ?", sobras)
+
+    def sincronizar(self, snapshot):
+        origens = {
+            "RECEITA": normalizar_lancamentos("RECEITA", snapshot["receitas"], "DESCRICAO"),
+            "DESPESA": normalizar_lancamentos("DESPESA", snapshot["despesas"], "DESCRICAO"),
+            "GASTO": normalizar_lancamentos("GASTO", snapshot["gastos"], "NOME"),
+        }
+        relatorio = {"meses": 0, "linhas": 0}
+        with self._escrita:
+            conexao = self._conexao()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                for origem, linhas in origens.items():
+                    meses, gravadas = self._sincronizar_origem(conexao, origem, linhas)
+                    relatorio["meses"] += meses
+                    relatorio["linhas"] += gravadas
+                self._sincronizar_custo_vida(conexao, snapshot.get("custo_vida"))
+                conexao.execute("COMMIT")
+            except Exception:
+                conexao.execute("ROLLBACK")
+                raise
+        return relatorio
+
+    # =========================
+    # CONSULTAS DO PAINEL
+    # =========================
+    def resumo_mes(self, ano, mes_txt):
+        totais = dict(self._conexao().execute(
+            "SELECT origem, SUM(valor) FROM lancamentos "
+            "WHERE origem IN ('RECEITA', 'DESPESA') AND ano = ? AND mes_txt = ? GROUP BY origem",
+            (int(ano), mes_txt),
+        ).fetchall())
+        receita, despesa = totais.get("RECEITA") or 0.0, totais.get("DESPESA") or 0.0
+        return {"RECEITA": receita, "DESPESA": despesa, "SALDO": receita - despesa}
+
+    def _top(self, filtro, parametros, k=None):
+        k = k or TOP_N
+        linhas = self._conexao().execute(
+            f"SELECT descricao, SUM(valor) AS total FROM lancamentos WHERE {filtro} "
+            "GROUP BY descricao ORDER BY total DESC",
+            parametros,
+        ).fetchall()
+        if not linhas:
+            return None
+        nomes = np.asarray([n for n, _ in linhas], dtype=object)
+        valores = np.asarray([v for _, v in linhas], dtype=np.float64)
+        total = float(valores.sum())
+        return {
+            "nomes": nomes[:k],
+            "valores": valores[:k],
+            "outros": total - float(valores[:k].sum()),
+            "qtd_outros": max(len(valores) - k, 0),
+            "total": total,
+        }
+
+    def top_despesas(self, ano, mes_txt, k=None):
+        return self._top("origem = 'DESPESA' AND ano = ? AND mes_txt = ?", (int(ano), mes_txt), k)
+
+    def _filtro_gastos(self, mes_ano, quinzena, classificacao):
+        filtro, parametros = ["origem = 'GASTO'", "mes_ano = ?"], [mes_ano]
+        if quinzena != "Todas":
+            filtro.append("quinzena = ?")
+            parametros.append(quinzena)
+        if classificacao != "Todos":
+            filtro.append("classificacao = ?")
+            parametros.append(classificacao)
+        return " AND ".join(filtro), parametros
+
+    def top_gastos(self, mes_ano, quinzena, classificacao, k=None):
+        return self._top(*self._filtro_gastos(mes_ano, quinzena, classificacao), k)
+
+    def meses_gastos(self):
+        return [m for (m,) in self._conexao().execute(
+            "SELECT DISTINCT mes_ano FROM lancamentos WHERE origem = 'GASTO' AND mes_ano IS NOT NULL"
+        )]
+
+    def gastos_filtrados(self, mes_ano, quinzena, classificacao):
+        filtro, parametros = self._filtro_gastos(mes_ano, quinzena, classificacao)
+        linhas = self._conexao().execute(
+            "SELECT data, mes_planilha, quinzena, descricao, forma_pagamento, classificacao, valor "
+            f"FROM lancamentos WHERE {filtro} ORDER BY data DESC, rowid",
+            parametros,
+        ).fetchall()
+        df = pd.DataFrame(linhas, columns=["DATA", "MES", "QUINZENA", "NOME", "FORMA PAGAMENTO", "CLASSIFICACAO", "VALOR"])
+        df["DATA"] = pd.to_datetime(df["DATA"], format="%Y-%m-%d")
+        return df
+
+    # =========================
+    # AGREGADOS DO PAINEL
+    # =========================
+    def resumo(self):
+        linhas = self._conexao().execute(
+            "SELECT ano, mes_chave % 12 + 1 AS mes_num, mes_txt, "
+            "COALESCE(SUM(CASE WHEN origem = 'RECEITA' THEN valor END), 0), "
+            "COALESCE(SUM(CASE WHEN origem = 'DESPESA' THEN valor END), 0) "
+            "FROM lancamentos WHERE origem IN ('RECEITA', 'DESPESA') AND mes_txt IS NOT NULL "
+            "GROUP BY ano, mes_num, mes_txt"
+        ).fetchall()
+        return completar_resumo(pd.DataFrame(linhas, columns=["ANO", "MES_NUM", "MES", "RECEITA", "DESPESA"]))
+
+    def totais_classificacao(self, mes_ano, quinzena, classificacao):
+        filtro, parametros = self._filtro_gastos(mes_ano, quinzena, classificacao)
+        linhas = self._conexao().execute(
+            f"SELECT classificacao, SUM(valor) AS total, COUNT(*) FROM lancamentos WHERE {filtro} "
+            "GROUP BY classificacao ORDER BY total DESC, classificacao",
+            parametros,
+        ).fetchall()
+        return pd.DataFrame(linhas, columns=["CLASSIFICACAO", "VALOR", "LANCAMENTOS"])
+
+    def custo_por_categoria(self):
+        linhas = self._conexao().execute(
+            "SELECT categoria, SUM(valor) FROM custo_vida GROUP BY categoria ORDER BY categoria"
+        ).fetchall()
+        return pd.DataFrame(linhas, columns=["CATEGORIA", "VALOR"])
+
+    def fechar(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is not None:
+            conexao.close()
+            self._local.conexao = None
+
+
+def abrir_livro(planilha_id, pasta=None):
+    pasta = pasta if pasta is not None else os.environ.get("ATLAS_LIVRO_DIR", "")
+    if not pasta:
+        return None
+    os.makedirs(pasta, exist_ok=True)
+    return LivroSQLite(os.path.join(pasta, f"{planilha_id}.db"))
@@ -0,0 +1,55 @@
+import contextlib
+import os
+import threading
+import tracemalloc
+
+
+ATIVO = os.environ.get("ATLAS_MEDIR_MEMORIA") == "1"
+QUADROS = int(os.environ.get("ATLAS_MEMORIA_QUADROS", "1"))
+
+_local = threading.local()
+
+
+def iniciar():
+    if ATIVO and not tracemalloc.is_tracing():
+        tracemalloc.start(QUADROS)
+    return tracemalloc.is_tracing()
+
+
+# =========================
+# PICO E RETIDO POR ETAPA
+# =========================
+# tracemalloc só tem um pico global: ao entrar numa etapa o pico da etapa de fora é
+# guardado na pilha antes do reset_peak, e ao sair o pico da de dentro sobe para ela.
+# O rastreio é do processo inteiro — com várias sessões ao mesmo tempo os números se
+# misturam, e o que roda no pool de processos do preparo não entra na conta.
+@contextlib.contextmanager
+def etapa(nome, destino):
+    if not tracemalloc.is_tracing():
+        yield
+        return
+
+    pilha = getattr(_local, "pilha", None)
+    if pilha is None:
+        pilha = _local.pilha = []
+    atual, pico = tracemalloc.get_traced_memory()
+    if pilha:
+        pilha[-1][1] = max(pilha[-1][1], pico)
+    tracemalloc.reset_peak()
+    pilha.append([atual, atual])
+    try:
+        yield
+    finally:
+        depois, pico = tracemalloc.get_traced_memory()
+        inicio, pico_dentro = pilha.pop()
+        pico = max(pico, pico_dentro)
+        if pilha:
+            pilha[-1][1] = max(pilha[-1][1], pico)
+        destino[nome] = {"pico": pico - inicio, "retido": depois - inicio}
+
+
+def maiores_alocacoes(limite=10):
+    if not tracemalloc.is_tracing():
+        return []
+    estatisticas = tracemalloc.take_snapshot().statistics("lineno")
+    return [(str(e.traceback[0]), e.size, e.count) for e in estatisticas[:limite]]
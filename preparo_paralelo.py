@@ -0,0 +1,344 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import pickle
+import zipfile
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cache_compartilhado import (
+    ERROS_BACKEND,
+    TTL_PADRAO,
+    arrendamento,
+    chave_texto,
+    guardar_sem_falhar,
+    obter_ou_construir,
+)
+from celulas_xlsx import impressoes_abas
+from dados import (
+    assinatura_cabecalho,
+    carregar_custo_vida_raw,
+    carregar_investimento,
+    encontrar_aba_custo_vida,
+    encontrar_aba_gastos,
+    extrair_projeto_morar_sozinho,
+    normalizar_texto,
+    preparar_gastos,
+    preparar_principal,
+)
+from indice_periodos import montar_indice
+from ranking import ranking_despesas, ranking_gastos
+from tabelas_arrow import (
+    desserializar,
+    ordenar_subcategorias,
+    serializar,
+    tabela_categorias,
+    tabela_gastos,
+    tabela_subcategorias,
+)
+
+
+# =========================
+# ABAS DO XLSX
+# =========================
+NS_PLANILHA = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def listar_abas(conteudo):
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as z:
+        raiz = ElementTree.fromstring(z.read("xl/workbook.xml"))
+    return [s.get("name") for s in raiz.iter(f"{NS_PLANILHA}sheet")]
+
+
+# =========================
+# EMPACOTAMENTO ENTRE PROCESSOS
+# =========================
+def empacotar_frame(df):
+    dados = {}
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+            codigos, categorias = pd.factorize(serie)
+            dados[col] = ("categorias", codigos.astype(np.int32), np.asarray(categorias, dtype=object))
+        else:
+            dados[col] = ("numpy", serie.to_numpy())
+    return {"colunas": list(df.columns), "indice": df.index.to_numpy(), "dados": dados}
+
+
+def desempacotar_frame(pacote):
+    colunas = {}
+    for col in pacote["colunas"]:
+        tipo, *partes = pacote["dados"][col]
+        if tipo == "categorias":
+            codigos, categorias = partes
+            valores = np.empty(len(codigos), dtype=object)
+            valores[:] = categorias.take(codigos, mode="clip") if len(categorias) else None
+            valores[codigos < 0] = np.nan
+            colunas[col] = valores
+        else:
+            colunas[col] = partes[0]
+    return pd.DataFrame(colunas, index=pacote["indice"], columns=pacote["colunas"])
+
+
+# DataFrames vão como stream Arrow IPC: no GASTOS de 20 anos (14,6 mil linhas) ida e
+# volta custam ~4 ms contra ~23 ms do empacotar_frame, com os mesmos dtypes. O pacote
+# NumPy fica para frames que o Arrow não tipa (colunas object com tipos misturados).
+def _empacotar(valor):
+    if isinstance(valor, pa.Table):
+        return ("arrow", serializar(valor))
+    if isinstance(valor, pd.DataFrame):
+        try:
+            return ("frame_arrow", serializar(pa.Table.from_pandas(valor, preserve_index=True)))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return ("frame", empacotar_frame(valor))
+    if isinstance(valor, dict):
+        return ("dict", {k: _empacotar(v) for k, v in valor.items()})
+    if isinstance(valor, tuple):
+        return ("tuple", [_empacotar(v) for v in valor])
+    return ("valor", valor)
+
+
+def _desempacotar(pacote):
+    tipo, valor = pacote
+    if tipo == "arrow":
+        return desserializar(valor)
+    if tipo == "frame_arrow":
+        return desserializar(valor).to_pandas()
+    if tipo == "frame":
+        return desempacotar_frame(valor)
+    if tipo == "dict":
+        return {k: _desempacotar(v) for k, v in valor.items()}
+    if tipo == "tuple":
+        return tuple(_desempacotar(v) for v in valor)
+    return valor
+
+
+# =========================
+# TAREFAS (UMA POR ABA)
+# =========================
+def _tarefa_principal(conteudo, nome_aba):
+    df = pd.read_excel(io.BytesIO(conteudo), sheet_name=nome_aba)
+    avisos = []
+    resultado = preparar_principal(df, avisos)
+    return _empacotar({
+        "resultado": resultado,
+        "ranking": ranking_despesas(resultado[1]),
+        "avisos": avisos,
+        "assinatura": assinatura_cabecalho(df.columns),
+    })
+
+
+def _tarefa_gastos(conteudo, nome_aba):
+    df = pd.read_excel(io.BytesIO(conteudo), sheet_name=nome_aba)
+    avisos = []
+    gastos = preparar_gastos(df, avisos)
+    return _empacotar({
+        "resultado": (gastos, tabela_gastos(gastos)),
+        "ranking": ranking_gastos(gastos),
+        "avisos": avisos,
+        "assinatura": assinatura_cabecalho(df.columns),
+    })
+
+
+def _tarefa_custo_vida(conteudo, nome_aba):
+    projeto = extrair_projeto_morar_sozinho(carregar_custo_vida_raw(conteudo, nome_aba))
+    if not projeto["df_itens"].empty:
+        projeto["df_sub"] = ordenar_subcategorias(projeto["df_itens"])
+        projeto["tabela_cat"] = tabela_categorias(projeto["df_cat"])
+        projeto["tabela_sub"] = tabela_subcategorias(projeto["df_sub"])
+    return _empacotar({"resultado": projeto})
+
+
+def _tarefa_investimento(conteudo, nome_aba):
+    avisos = []
+    return _empacotar({"resultado": carregar_investimento(conteudo, nome_aba, avisos), "avisos": avisos})
+
+
+def _tarefas(nomes_abas):
+    tarefas = {}
+    if nomes_abas:
+        tarefas["principal"] = (_tarefa_principal, nomes_abas[0])
+    aba_gastos = encontrar_aba_gastos(nomes_abas)
+    if aba_gastos:
+        tarefas["gastos"] = (_tarefa_gastos, aba_gastos)
+    aba_custo_vida = encontrar_aba_custo_vida(nomes_abas)
+    if aba_custo_vida:
+        tarefas["custo_vida"] = (_tarefa_custo_vida, aba_custo_vida)
+    aba_investimento = next((n for n in nomes_abas if normalizar_texto(n) == "INVESTIMENTO"), None)
+    if aba_investimento:
+        tarefas["investimento"] = (_tarefa_investimento, aba_investimento)
+    return tarefas
+
+
+def _executar(tarefas, conteudo, executor):
+    saidas, erros = {}, {}
+    if executor is not None:
+        try:
+            futuros = {nome: executor.submit(f, conteudo, aba) for nome, (f, aba) in tarefas.items()}
+            for nome, futuro in futuros.items():
+                try:
+                    saidas[nome] = futuro.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    erros[nome] = e
+            return saidas, erros, False
+        except BrokenProcessPool:
+            saidas, erros = {}, {}
+    for nome, (f, aba) in tarefas.items():
+        try:
+            saidas[nome] = f(conteudo, aba)
+        except Exception as e:
+            erros[nome] = e
+    return saidas, erros, executor is not None
+
+
+def _executar_compartilhado(tarefas, chaves, conteudo, executor, compartilhado):
+    pacotes, erros, alheias = {}, {}, {}
+    with ExitStack() as pilha:
+        minhas = {}
+        for nome, tarefa in tarefas.items():
+            chave = chave_texto(chaves[nome])
+            bruto = compartilhado.pegar(chave)
+            if bruto is None and pilha.enter_context(arrendamento(compartilhado, chave)):
+                bruto = compartilhado.pegar(chave)
+                if bruto is None:
+                    minhas[nome] = tarefa
+                    continue
+            if bruto is None:
+                alheias[nome] = tarefa
+            else:
+                pacotes[nome] = pickle.loads(bruto)
+
+        novos, erros, quebrado = _executar(minhas, conteudo, executor)
+        # as abas já foram preparadas: uma falha do backend aqui só custa o compartilhamento
+        for nome, pacote in novos.items():
+            guardar_sem_falhar(compartilhado, chave_texto(chaves[nome]), pickle.dumps(pacote, protocol=5), TTL_PADRAO)
+        pacotes.update(novos)
+
+    for nome, (f, aba) in alheias.items():
+        try:
+            bruto = obter_ou_construir(
+                compartilhado,
+                chave_texto(chaves[nome]),
+                lambda: pickle.dumps(f(conteudo, aba), protocol=5),
+                ttl=TTL_PADRAO,
+            )
+            pacotes[nome] = pickle.loads(bruto)
+        except Exception as e:
+            erros[nome] = e
+    return pacotes, erros, quebrado
+
+
+def _chaves_tarefas(tarefas, impressoes, impressao_nomes):
+    chaves = {}
+    for nome, (_, aba) in tarefas.items():
+        chave = ("aba", nome, aba, impressoes.get(aba))
+        if nome == "investimento":
+            chave += (impressao_nomes,)
+        chaves[nome] = chave
+    return chaves
+
+
+def resumir_mudancas(anteriores, atuais):
+    if anteriores is None:
+        return None
+    return {
+        "alteradas": [aba for aba, h in atuais.items() if aba in anteriores and anteriores[aba] != h],
+        "novas": [aba for aba in atuais if aba not in anteriores],
+        "removidas": [aba for aba in anteriores if aba not in atuais],
+    }
+
+
+def preparar_workbook(conteudo, executor=None, cache=None, compartilhado=None):
+    nomes_abas = listar_abas(conteudo)
+    tarefas = _tarefas(nomes_abas)
+    impressoes, impressao_nomes = impressoes_abas(conteudo)
+    chaves = _chaves_tarefas(tarefas, impressoes, impressao_nomes)
+
+    saidas = {}
+    if cache is not None:
+        for nome, chave in chaves.items():
+            saida = cache.pegar(chave)
+            if saida is not None:
+                saidas[nome] = saida
+    reaproveitadas = [tarefas[nome][1] for nome in saidas]
+
+    pendentes = {nome: tarefa for nome, tarefa in tarefas.items() if nome not in saidas}
+    pacotes = None
+    if compartilhado is not None:
+        try:
+            pacotes, erros, pool_quebrado = _executar_compartilhado(pendentes, chaves, conteudo, executor, compartilhado)
+        except ERROS_BACKEND:
+            pacotes = None
+    if pacotes is None:
+        pacotes, erros, pool_quebrado = _executar(pendentes, conteudo, executor)
+    novas = {nome: _desempacotar(pacote) for nome, pacote in pacotes.items()}
+    saidas.update(novas)
+    if cache is not None:
+        for nome, saida in novas.items():
+            cache.guardar(chaves[nome], saida)
+
+    mudancas = None
+    if cache is not None:
+        mudancas = resumir_mudancas(cache.pegar(("impressoes",)), impressoes)
+        cache.guardar(("impressoes",), impressoes)
+
+    resultados = {nome: saida["resultado"] for nome, saida in saidas.items()}
+    rankings = {nome: saida.get("ranking", {}) for nome, saida in saidas.items()}
+    avisos = [aviso for saida in saidas.values() for aviso in saida.get("avisos", [])]
+    esquemas = {
+        tarefas[nome][1]: saida["assinatura"]
+        for nome, saida in saidas.items()
+        if "assinatura" in saida
+    }
+    versoes = {
+        nome: hashlib.sha1(repr(chave).encode("utf-8")).hexdigest()[:16]
+        for nome, chave in chaves.items()
+        if nome in saidas
+    }
+
+    receitas, despesas, resumo = resultados.get("principal", (None, None, None))
+    gastos, tabela_gastos_exibicao = resultados.get("gastos", (None, None))
+    indice = montar_indice(receitas, despesas, gastos) if receitas is not None else None
+
+    return {
+        "nomes_abas": nomes_abas,
+        "receitas": receitas,
+        "despesas": despesas,
+        "resumo": resumo,
+        "indice": indice,
+        "aba_gastos": tarefas["gastos"][1] if "gastos" in tarefas else None,
+        "gastos": gastos,
+        "tabela_gastos": tabela_gastos_exibicao,
+        "ranking_despesas": rankings.get("principal", {}),
+        "ranking_gastos": rankings.get("gastos", {}),
+        "aba_custo_vida": tarefas["custo_vida"][1] if "custo_vida" in tarefas else None,
+        "custo_vida": resultados.get("custo_vida"),
+        "investimento": resultados.get("investimento", 0.0),
+        "erros": erros,
+        "avisos": avisos,
+        "esquemas": esquemas,
+        "impressoes": impressoes,
+        "versoes": versoes,
+        "versao": hashlib.sha1(repr(sorted(versoes.items())).encode("utf-8")).hexdigest()[:16],
+        "reaproveitadas": reaproveitadas,
+        "mudancas": mudancas,
+        # o pool caiu no meio e o preparo terminou em série: quem criou o pool troca por outro
+        "pool_quebrado": pool_quebrado,
+    }
+
+
+def criar_pool(processos=None):
+    if processos is None:
+        processos = int(os.environ.get("ATLAS_PREPARO_PROCESSOS", str(min(4, os.cpu_count() or 1))))
+    if processos <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
@@ -0,0 +1,69 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from formatos import mes_ano_pt
+
+
+SIMULACOES = int(os.environ.get("ATLAS_MC_SIMULACOES", "10000"))
+LOTE = int(os.environ.get("ATLAS_MC_LOTE", "2000"))
+MESES_MINIMOS = 3
+
+
+# =========================
+# HISTÓRICO DOS GASTOS VARIÁVEIS
+# =========================
+def historico_mensal(gastos, antes_de):
+    if gastos is None or gastos.empty:
+        return np.empty((0, 0))
+    base = gastos[gastos["DATA"] < pd.Timestamp(antes_de)]
+    if base.empty:
+        return np.empty((0, 0))
+    meses = base["DATA"].dt.to_period("M")
+    tabela = base.pivot_table(index=meses, columns="CLASSIFICACAO", values="VALOR", aggfunc="sum", fill_value=0.0)
+    tabela = tabela.reindex(pd.period_range(meses.min(), meses.max(), freq="M"), fill_value=0.0)
+    return tabela.to_numpy(dtype=np.float64)
+
+
+# =========================
+# SIMULAÇÃO EM LOTES
+# =========================
+def simular(planejado, historico, simulacoes=None, lote=None, semente=42):
+    simulacoes = simulacoes or SIMULACOES
+    lote = lote or LOTE
+    planejado = np.asarray(planejado, dtype=np.float64)
+    qtd_meses, (qtd_hist, qtd_cat) = len(planejado), historico.shape
+
+    desvios = historico - historico.mean(axis=0)
+    categorias = np.arange(qtd_cat)
+    rng = np.random.default_rng(semente)
+
+    saldos = np.empty((simulacoes, qtd_meses), dtype=np.float64)
+    for inicio in range(0, simulacoes, lote):
+        n = min(lote, simulacoes - inicio)
+        sorteio = rng.integers(0, qtd_hist, size=(n, qtd_meses, qtd_cat))
+        saldos[inicio:inicio + n] = planejado - desvios[sorteio, categorias].sum(axis=2)
+    return saldos
+
+
+def projetar(indice, gastos, ano, mes, percentis=(10, 50, 90), simulacoes=None, lote=None):
+    if indice is None or mes >= 12:
+        return None
+    historico = historico_mensal(gastos, datetime(ano, mes, 1))
+    if len(historico) < MESES_MINIMOS:
+        return None
+
+    meses = list(range(mes + 1, 13))
+    planejado = [indice.mes("RECEITA", ano, m) - indice.mes("DESPESA", ano, m) for m in meses]
+    saldos = simular(planejado, historico, simulacoes, lote)
+
+    return {
+        "meses": [mes_ano_pt(datetime(ano, m, 1)) for m in meses],
+        "planejado": np.asarray(planejado),
+        "mensal": dict(zip(percentis, np.percentile(saldos, percentis, axis=0))),
+        "acumulado": dict(zip(percentis, np.percentile(saldos.sum(axis=1), percentis))),
+        "simulacoes": len(saldos),
+        "meses_historico": len(historico),
+    }
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+
+TOP_N = int(os.environ.get("ATLAS_TOP_N", "12"))
+
+QUINZENAS = ["Todas", "1ª quinzena", "2ª quinzena"]
+CLASSIFICACOES = ["Todos", "INDISPENSAVEL", "DISPENSAVEL"]
+
+
+def _top_k(nomes, valores, k):
+    if len(valores) > k:
+        idx = np.argpartition(-valores, k - 1)[:k]
+    else:
+        idx = np.arange(len(valores))
+    idx = idx[np.argsort(-valores[idx], kind="stable")]
+    total = float(valores.sum())
+    top = valores[idx]
+    return {
+        "nomes": nomes[idx],
+        "valores": top,
+        "outros": total - float(top.sum()),
+        "qtd_outros": len(valores) - len(idx),
+        "total": total,
+    }
+
+
+def ranking_por_grupo(somas, k=None):
+    k = k or TOP_N
+    niveis = list(range(somas.index.nlevels - 1))
+    ranking = {}
+    for chave, grupo in somas.groupby(level=niveis, sort=False):
+        chave = chave[0] if isinstance(chave, tuple) and len(chave) == 1 else chave
+        ranking[chave] = _top_k(
+            grupo.index.get_level_values(-1).to_numpy(dtype=object),
+            grupo.to_numpy(dtype=np.float64),
+            k,
+        )
+    return ranking
+
+
+# =========================
+# RANKINGS POR SNAPSHOT
+# =========================
+def ranking_despesas(despesas, k=None):
+    if despesas.empty:
+        return {}
+    somas = despesas.groupby(["ANO", "MES", "DESCRICAO"], sort=False)["VALOR"].sum()
+    return ranking_por_grupo(somas, k)
+
+
+def ranking_gastos(gastos, k=None):
+    if gastos.empty:
+        return {}
+    base = gastos.groupby(["MES_ANO", "QUINZENA", "CLASSIFICACAO", "NOME"], sort=False)["VALOR"].sum()
+    quinzenas = base.index.get_level_values("QUINZENA")
+    classificacoes = base.index.get_level_values("CLASSIFICACAO")
+
+    ranking = {}
+    for quinzena in QUINZENAS:
+        for classificacao in CLASSIFICACOES:
+            mascara = np.ones(len(base), dtype=bool)
+            if quinzena != "Todas":
+                mascara &= quinzenas == quinzena
+            if classificacao != "Todos":
+                mascara &= classificacoes == classificacao
+            if not mascara.any():
+                continue
+            somas = base[mascara].groupby(level=["MES_ANO", "NOME"], sort=False).sum()
+            for mes, top in ranking_por_grupo(somas, k).items():
+                ranking[(mes, quinzena, classificacao)] = top
+    return ranking
+
+
+def com_outros(top, rotulo="Outros"):
+    nomes = list(top["nomes"])
+    valores = list(top["valores"])
+    if top["qtd_outros"] > 0 and top["outros"] > 0:
+        nomes.append(f"{rotulo} ({top['qtd_outros']})")
+        valores.append(top["outros"])
+    return nomes, valores
+
+
+def totais_classificacao(gastos):
+    somas = gastos.groupby("CLASSIFICACAO", dropna=False)["VALOR"].agg(VALOR="sum", LANCAMENTOS="size").reset_index()
+    return somas.sort_values(["VALOR", "CLASSIFICACAO"], ascending=[False, True], ignore_index=True)
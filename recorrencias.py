@@ -0,0 +1,165 @@
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from cache_atlas import estimar_bytes
+from formatos import MESES_PT, normalizar_texto
+
+
+RE_TOKEN = re.compile(r"[A-Z]{2,}")
+PALAVRAS_VAZIAS = {
+    "DE", "DA", "DO", "DAS", "DOS", "EM", "NO", "NA", "COM", "BR", "WWW", "LTDA", "SA", "ME",
+    "PAG", "PAGTO", "PAGAMENTO", "COMPRA", "PARC", "PARCELA", "FATURA", "DEBITO", "CREDITO",
+}
+UFS = {
+    "AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+    "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO",
+}
+SIMILARIDADE_MINIMA = 0.75
+CADENCIAS = {1: "Mensal", 2: "Bimestral", 3: "Trimestral", 6: "Semestral", 12: "Anual"}
+
+
+def tokens_descricao(descricao):
+    return frozenset(t for t in RE_TOKEN.findall(normalizar_texto(descricao)) if t not in PALAVRAS_VAZIAS and t not in UFS)
+
+
+def similaridade(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def ordinal_mes(ano, mes):
+    return int(ano) * 12 + int(mes) - 1
+
+
+def inicio_mes(ordinal):
+    return np.datetime64(f"{ordinal // 12:04d}-{ordinal % 12 + 1:02d}-01")
+
+
+def rotulo_mes(ordinal):
+    return f"{MESES_PT[ordinal % 12 + 1]}/{ordinal // 12}"
+
+
+# =========================
+# DETECTOR INCREMENTAL
+# =========================
+class DetectorRecorrencias:
+    def __init__(self, similaridade_minima=SIMILARIDADE_MINIMA):
+        self.similaridade_minima = similaridade_minima
+        self.grupos = {}
+        self.indice_tokens = {}
+        self.grupo_da_descricao = {}
+        self.aberto_desde = None
+        self.versao = None
+        self._trava = threading.Lock()
+
+    @property
+    def nbytes(self):
+        with self._trava:
+            return estimar_bytes(self.grupos) + estimar_bytes(self.indice_tokens) + estimar_bytes(self.grupo_da_descricao)
+
+    def _grupo(self, descricao):
+        grupo_id = self.grupo_da_descricao.get(descricao)
+        if grupo_id is not None:
+            return grupo_id
+
+        tokens = tokens_descricao(descricao)
+        candidatos = Counter(g for t in tokens for g in self.indice_tokens.get(hash(t), ()))
+        melhor, melhor_sim = None, 0.0
+        for candidato, _ in candidatos.most_common(8):
+            sim = similaridade(tokens, self.grupos[candidato]["tokens"])
+            if sim > melhor_sim:
+                melhor, melhor_sim = candidato, sim
+
+        if melhor is not None and melhor_sim >= self.similaridade_minima:
+            grupo_id = melhor
+        else:
+            grupo_id = len(self.grupos)
+            self.grupos[grupo_id] = {"tokens": tokens, "rotulo": str(descricao).strip(), "meses": {}, "origens": set()}
+            for t in tokens:
+                self.indice_tokens.setdefault(hash(t), set()).add(grupo_id)
+        self.grupo_da_descricao[descricao] = grupo_id
+        return grupo_id
+
+    def _esquecer_a_partir(self, ordinal):
+        for grupo in self.grupos.values():
+            for mes in [m for m in grupo["meses"] if m >= ordinal]:
+                del grupo["meses"][mes]
+
+    def atualizar(self, lancamentos, mes_aberto, versao=None):
+        with self._trava:
+            if versao is not None and versao == self.versao:
+                return self
+            corte = self.aberto_desde
+            if corte is not None:
+                self._esquecer_a_partir(corte)
+
+            for origem, df, coluna in lancamentos:
+                if df is None or df.empty:
+                    continue
+                parte = df[[coluna, "VALOR", "DATA"]]
+                if corte is not None:
+                    parte = parte[df["DATA"].to_numpy() >= inicio_mes(corte)]
+                if parte.empty:
+                    continue
+                datas = parte["DATA"].dt
+                parte = parte.assign(ORDINAL=datas.year * 12 + datas.month - 1)
+                somas = parte.groupby(["ORDINAL", coluna], sort=True)["VALOR"].sum()
+                for (ordinal, descricao), valor in somas.items():
+                    grupo = self.grupos[self._grupo(descricao)]
+                    grupo["meses"][int(ordinal)] = grupo["meses"].get(int(ordinal), 0.0) + float(valor)
+                    grupo["origens"].add(origem)
+
+            self.aberto_desde = ordinal_mes(*mes_aberto)
+            self.versao = versao
+            return self
+
+    # =========================
+    # LEITURA
+    # =========================
+    def recorrentes(self, referencia, ocorrencias_minimas=3, regularidade_minima=0.6):
+        ref = ordinal_mes(*referencia)
+        linhas = []
+        # o detector é um só por planilha: leitura sob a mesma trava do atualizar
+        with self._trava:
+            for grupo in self.grupos.values():
+                meses = sorted(m for m in grupo["meses"] if m <= ref)
+                if len(meses) < ocorrencias_minimas:
+                    continue
+                passos = np.diff(meses)
+                cadencia, vezes = Counter(passos.tolist()).most_common(1)[0]
+                if cadencia not in CADENCIAS or vezes / len(passos) < regularidade_minima:
+                    continue
+
+                proxima = meses[-1] + cadencia
+                if meses[-1] == ref or proxima > ref:
+                    situacao = "Em dia"
+                elif proxima == ref:
+                    situacao = "Esperada no mês"
+                else:
+                    situacao = "Sumiu?"
+                valores = [grupo["meses"][m] for m in meses]
+                linhas.append({
+                    "DESCRICAO": grupo["rotulo"],
+                    "ORIGEM": " + ".join(sorted(grupo["origens"])),
+                    "CADENCIA": CADENCIAS[cadencia],
+                    "OCORRENCIAS": len(meses),
+                    "VALOR_MEDIO": float(np.mean(valores)),
+                    "ULTIMO_VALOR": valores[-1],
+                    "ULTIMA": rotulo_mes(meses[-1]),
+                    "PROXIMA": rotulo_mes(proxima),
+                    "SITUACAO": situacao,
+                })
+        return linhas
+
+    def novas(self, referencia):
+        ref = ordinal_mes(*referencia)
+        with self._trava:
+            return [
+                {"DESCRICAO": g["rotulo"], "VALOR": g["meses"][ref], "ORIGEM": " + ".join(sorted(g["origens"]))}
+                for g in self.grupos.values()
+                if g["meses"] and min(g["meses"]) == ref
+            ]
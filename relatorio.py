@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from urllib.parse import urlsplit
+
+from formatos import mes_ano_pt
+
+
+CACHE_PADRAO = "sqlite://" + os.path.join(os.path.expanduser("~"), ".cache", "atlas", "snapshots.db")
+COLUNAS_RESUMO = ["ANO", "MES_NUM", "MES_ANO", "RECEITA", "DESPESA", "SALDO"]
+COLUNAS_ITENS = ["CATEGORIA", "SUBCATEGORIA", "VALOR", "PCT_RENDA"]
+
+
+def nome_relatorio(origem):
+    if "://" in origem:
+        partes = [p for p in urlsplit(origem).path.split("/") if p]
+        base = partes[partes.index("d") + 1] if "d" in partes[:-1] else (partes[-1] if partes else "planilha")
+    else:
+        base = os.path.basename(origem)
+    return re.sub(r"[^\w.-]+", "_", os.path.splitext(base)[0]) or "planilha"
+
+
+# =========================
+# RELATÓRIO A PARTIR DO SNAPSHOT
+# =========================
+def _custo_vida(projeto):
+    if not projeto:
+        return None
+    relatorio = {
+        "renda_total": projeto["renda_total"],
+        "custos_totais": projeto["custos_totais"],
+        "sobra_mes": projeto["sobra_mes"],
+        "pct_sobra": None,
+        "categorias": [],
+        "itens": [],
+    }
+    # aba sem itens: o projeto vem só com os totais, sem percentuais nem faixas
+    if projeto["df_itens"].empty:
+        return relatorio
+
+    categorias = projeto["df_cat"][projeto["df_cat"]["CATEGORIA"] != "RENDA"]
+    relatorio["pct_sobra"] = projeto["pct_sobra"]
+    relatorio["categorias"] = categorias[["CATEGORIA", "VALOR", "PCT_RENDA", "FAIXA"]].to_dict("records")
+    relatorio["itens"] = projeto["df_itens"][COLUNAS_ITENS].to_dict("records")
+    return relatorio
+
+
+def montar_relatorio(snapshot, ano, mes, com_projecao=False):
+    from indice_periodos import indicadores_ano
+
+    relatorio = {
+        "versao": snapshot["versao"],
+        "ano": ano,
+        "mes": mes,
+        "erros": {nome: str(erro) for nome, erro in snapshot["erros"].items()},
+        "indicadores": None,
+        "mes_referencia": None,
+        "resumo": [],
+        "custo_vida": _custo_vida(snapshot["custo_vida"]),
+    }
+    if snapshot["indice"] is None:
+        return relatorio
+
+    resumo = snapshot["resumo"]
+    relatorio["indicadores"] = indicadores_ano(snapshot["indice"], snapshot["investimento"], ano, mes)
+    relatorio["resumo"] = resumo[COLUNAS_RESUMO].to_dict("records")
+
+    mes_ref = mes_ano_pt(datetime(ano, mes, 1))
+    linha = resumo[resumo["MES_ANO"] == mes_ref]
+    if not linha.empty:
+        relatorio["mes_referencia"] = {"MES_ANO": mes_ref, **linha.iloc[0][["RECEITA", "DESPESA", "SALDO"]].to_dict()}
+
+    if com_projecao:
+        from projecao import projetar
+
+        projecao = projetar(snapshot["indice"], snapshot["gastos"], ano, mes)
+        if projecao:
+            relatorio["projecao_saldo_restante"] = {f"p{p}": valor for p, valor in projecao["acumulado"].items()}
+    return relatorio
+
+
+def processar(origem, url_cache, ano, mes, com_projecao):
+    from busca_planilhas import criar_buscador
+    from cache_compartilhado import baixar_compartilhado, criar_backend
+    from preparo_paralelo import preparar_workbook
+
+    backend = None
+    if url_cache:
+        caminho = urlsplit(url_cache).path if url_cache.startswith("sqlite://") else None
+        if caminho:
+            os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        backend = criar_backend(url_cache)
+
+    buscador = criar_buscador()
+    try:
+        conteudo = baixar_compartilhado(buscador, origem, backend)
+        snapshot = preparar_workbook(conteudo, compartilhado=backend)
+    finally:
+        buscador.fechar()
+    return montar_relatorio(snapshot, ano, mes, com_projecao)
+
+
+def processar_varias(origens, url_cache, ano, mes, com_projecao=False, processos=None):
+    processos = min(processos or os.cpu_count() or 1, len(origens))
+    resultados = {}
+    if processos <= 1:
+        for origem in origens:
+            try:
+                resultados[origem] = processar(origem, url_cache, ano, mes, com_projecao)
+            except Exception as e:
+                resultados[origem] = {"erro": str(e)}
+        return resultados
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = {origem: executor.submit(processar, origem, url_cache, ano, mes, com_projecao) for origem in origens}
+        for origem, futuro in futuros.items():
+            try:
+                resultados[origem] = futuro.result()
+            except Exception as e:
+                resultados[origem] = {"erro": str(e)}
+    return resultados
+
+
+# =========================
+# SAÍDA JSON / CSV
+# =========================
+def _para_json(valor):
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    if hasattr(valor, "item"):
+        return valor.item()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def escrever_json(resultados, destino):
+    documento = {nome_relatorio(origem): {"origem": origem, **relatorio} for origem, relatorio in resultados.items()}
+    texto = json.dumps(documento, ensure_ascii=False, indent=2, default=_para_json)
+    if destino:
+        os.makedirs(destino, exist_ok=True)
+        caminho = os.path.join(destino, "relatorio.json")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(texto)
+        return [caminho]
+    sys.stdout.write(texto + "\n")
+    return []
+
+
+def escrever_csv(resultados, destino):
+    import pandas as pd
+
+    destino = destino or "."
+    os.makedirs(destino, exist_ok=True)
+    escritos = []
+    for origem, relatorio in resultados.items():
+        if "erro" in relatorio:
+            continue
+        nome = nome_relatorio(origem)
+        tabelas = {
+            "indicadores": pd.DataFrame(list((relatorio["indicadores"] or {}).items()), columns=["INDICADOR", "VALOR"]),
+            "resumo": pd.DataFrame(relatorio["resumo"], columns=COLUNAS_RESUMO),
+        }
+        if relatorio["custo_vida"]:
+            tabelas["custo_vida"] = pd.DataFrame(relatorio["custo_vida"]["itens"], columns=COLUNAS_ITENS)
+        for sufixo, tabela in tabelas.items():
+            caminho = os.path.join(destino, f"{nome}_{sufixo}.csv")
+            tabela.to_csv(caminho, index=False)
+            escritos.append(caminho)
+    return escritos
+
+
+def main(argv=None):
+    hoje = date.today()
+    parser = argparse.ArgumentParser(description="Gera os números do painel (indicadores, resumo, custo de vida) sem abrir o navegador.")
+    parser.add_argument("origens", nargs="+", help="Caminhos ou URLs das planilhas (.xlsx).")
+    parser.add_argument("--formato", choices=["json", "csv"], default="json")
+    parser.add_argument("--saida", default=None, help="Pasta de saída (padrão: JSON no stdout, CSV na pasta atual).")
+    parser.add_argument("--ano", type=int, default=hoje.year)
+    parser.add_argument("--mes", type=int, default=hoje.month)
+    parser.add_argument("--projecao", action="store_true", help="Inclui a faixa p10–p90 do saldo restante.")
+    parser.add_argument("--processos", type=int, default=None, help="Planilhas processadas em paralelo (padrão: núcleos).")
+    parser.add_argument(
+        "--cache",
+        default=os.environ.get("ATLAS_CACHE_COMPARTILHADO") or CACHE_PADRAO,
+        help="Cache de snapshots em disco (sqlite:///caminho ou redis://…).",
+    )
+    parser.add_argument("--sem-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    resultados = processar_varias(
+        args.origens,
+        None if args.sem_cache else args.cache,
+        args.ano,
+        args.mes,
+        args.projecao,
+        args.processos,
+    )
+    escrever = escrever_json if args.formato == "json" else escrever_csv
+    for caminho in escrever(resultados, args.saida):
+        print(caminho, file=sys.stderr)
+    for origem, relatorio in resultados.items():
+        if "erro" in relatorio:
+            print(f"Falha em {origem}: {relatorio['erro']}", file=sys.stderr)
+    return 1 if any("erro" in r for r in resultados.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import numpy as np
+import pyarrow as pa
+
+from dados import formato_real
+
+
+ROTULOS_CLASSIFICACAO = {
+    "INDISPENSAVEL": "👍 Indispensável",
+    "DISPENSAVEL": "👎 Dispensável",
+    "SEM CLASSIFICACAO": "Sem classificação",
+}
+
+ORDEM_CATEGORIAS = {"MORADIA": 1, "ALIMENTAÇÃO": 2, "TRANSPORTE": 3, "OUTROS": 4}
+
+
+def _texto(serie):
+    return pa.array(serie.fillna("").astype(str).to_numpy(dtype=object), type=pa.string())
+
+
+# =========================
+# TABELAS DE EXIBIÇÃO
+# =========================
+def tabela_gastos(gastos):
+    return pa.table({
+        "Data": _texto(gastos["DATA"].dt.strftime("%d/%m/%Y")),
+        "Mês": _texto(gastos["MES"]),
+        "Quinzena": _texto(gastos["QUINZENA"]),
+        "Nome": _texto(gastos["NOME"]),
+        "Forma pagamento": _texto(gastos["FORMA PAGAMENTO"]),
+        "Classificação": _texto(gastos["CLASSIFICACAO"].replace(ROTULOS_CLASSIFICACAO)),
+        "Valor": _texto(gastos["VALOR"].map(formato_real)),
+    })
+
+
+def ordenar_subcategorias(df_itens):
+    df_sub = df_itens[df_itens["CATEGORIA"] != "RENDA"].copy()
+    df_sub["ORDEM"] = df_sub["CATEGORIA"].map(ORDEM_CATEGORIAS).fillna(99)
+    return df_sub.sort_values(["ORDEM", "PCT_RENDA"], ascending=[True, False])
+
+
+def tabela_categorias(df_cat):
+    tabela_cat = df_cat[df_cat["CATEGORIA"] != "RENDA"]
+    return pa.table({
+        "Categoria": _texto(tabela_cat["CATEGORIA"]),
+        "Total": _texto(tabela_cat["VALOR_FMT"]),
+        "% da renda": _texto(tabela_cat["PCT_RENDA_FMT"]),
+        "Peso": _texto(tabela_cat["FAIXA"]),
+    })
+
+
+def tabela_subcategorias(df_sub):
+    return pa.table({
+        "Categoria": _texto(df_sub["CATEGORIA"]),
+        "Subcategoria": _texto(df_sub["SUBCATEGORIA"]),
+        "Valor": _texto(df_sub["VALOR_FMT"]),
+        "% da renda": _texto(df_sub["PCT_RENDA_FMT"]),
+        "% da categoria": _texto(df_sub["PCT_CATEGORIA_FMT"]),
+        "Peso": _texto(df_sub["FAIXA"]),
+        "Análise": _texto(df_sub["ANALISE"]),
+    })
+
+
+def fatiar(tabela, mascara):
+    mascara = np.asarray(mascara, dtype=bool)
+    if mascara.all():
+        return tabela
+    return tabela.filter(pa.array(mascara))
+
+
+# =========================
+# TRANSPORTE ENTRE PROCESSOS
+# =========================
+def serializar(tabela):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return sink.getvalue()
+
+
+def desserializar(buffer):
+    return pa.ipc.open_stream(buffer).read_all()
@@ -0,0 +1,30 @@
+import io
+import os
+
+import openpyxl
+from streamlit.testing.v1 import AppTest
+
+from planilha_sintetica import gerar_planilha
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_erro_na_aba_principal_nao_bloqueia_o_projeto_morar_sozinho(tmp_path, monkeypatch):
+    # cabeçalho na linha 2, como na VIRADA FINANCEIRA.xlsx: a aba principal não fecha o esquema
+    livro = openpyxl.load_workbook(io.BytesIO(gerar_planilha(anos=1)))
+    livro["FINANCEIRO"].insert_rows(1)
+    caminho = tmp_path / "cabecalho_deslocado.xlsx"
+    livro.save(caminho)
+    monkeypatch.setenv("ATLAS_PLANILHA_URL_MODELO", str(caminho))
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.query_params["planilha"] = "cabecalhodeslocado"
+    at.run()
+    assert not at.exception
+    assert any("aba principal" in e.value for e in at.error)
+
+    navegacao = next(r for r in at.radio if r.label == "Navegação")
+    navegacao.set_value("🏠 Projeto Morar Sozinho").run()
+    assert not at.exception
+    assert not at.error
+    assert "💰 Renda total" in [m.label for m in at.metric]
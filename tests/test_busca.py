@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from busca import IndiceBusca
+
+
+@pytest.fixture
+def indice():
+    despesas = pd.DataFrame({
+        "DATA": pd.to_datetime(["2025-01-10", "2025-02-10", "2025-03-05"]),
+        "DESCRICAO": ["Aluguel", "Aluguel", "Internet"],
+        "VALOR": [1500.0, 1500.0, 99.9],
+    })
+    gastos = pd.DataFrame({
+        "DATA": pd.to_datetime(["2025-01-12", "2025-03-20"]),
+        "NOME": ["iFood almoço", "Uber"],
+        "VALOR": [42.5, 18.0],
+    })
+    return IndiceBusca([("Despesa fixa", despesas, "DESCRICAO"), ("Gasto variável", gastos, "NOME")])
+
+
+def test_busca_encontra_por_trecho(indice):
+    achados = indice.buscar("alug")
+    assert len(achados["linhas"]) == 2
+    assert achados["total"] == pytest.approx(3000.0)
+    assert achados["por_mes"].tolist() == [1500.0, 1500.0, 0.0]
+
+
+@pytest.mark.parametrize("termo", ["😀", "!!! ???", "   "])
+def test_termo_que_normaliza_para_vazio_devolve_resultado_vazio(indice, termo):
+    achados = indice.buscar(termo)
+    assert achados is not None
+    assert len(achados["linhas"]) == 0
+    assert len(achados["descricoes"]) == 0
+    assert achados["total"] == 0.0
+    assert len(achados["por_mes"]) == len(achados["meses"]) == 3
+    assert not achados["por_mes"].any()
+    assert indice.tabela(achados["linhas"]).empty
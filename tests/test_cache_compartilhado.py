@@ -0,0 +1,107 @@
+import socket
+import threading
+
+import pytest
+
+from cache_compartilhado import LIBERAR_SE_DONO, BackendRedis, BackendSQLite, arrendamento, baixar_compartilhado
+from servidor_resp import iniciar
+
+
+class Buscador:
+    def __init__(self, falha=None):
+        self.falha = falha
+        self.chamadas = 0
+
+    def baixar(self, url):
+        self.chamadas += 1
+        if self.falha is not None:
+            raise self.falha
+        return b"conteudo de " + url.encode()
+
+
+class BackendQuebrado(BackendSQLite):
+    def __init__(self, caminho, quebrar):
+        super().__init__(caminho)
+        self.quebrar = quebrar
+
+    def pegar(self, chave):
+        if "pegar" in self.quebrar:
+            raise OSError("backend fora do ar")
+        return super().pegar(chave)
+
+    def guardar(self, chave, valor, ttl=None):
+        if "guardar" in self.quebrar:
+            raise OSError("backend fora do ar")
+        return super().guardar(chave, valor, ttl)
+
+
+def test_erro_do_download_sobe_sem_segunda_tentativa(tmp_path):
+    buscador = Buscador(falha=OSError("rede caiu"))
+    with pytest.raises(OSError, match="rede caiu"):
+        baixar_compartilhado(buscador, "https://exemplo/planilha", BackendSQLite(str(tmp_path / "c.db")))
+    assert buscador.chamadas == 1
+
+
+def test_backend_fora_do_ar_antes_do_download_cai_no_download_direto(tmp_path):
+    buscador = Buscador()
+    backend = BackendQuebrado(str(tmp_path / "c.db"), {"pegar"})
+    assert baixar_compartilhado(buscador, "u", backend) == b"conteudo de u"
+    assert buscador.chamadas == 1
+
+
+def test_falha_ao_guardar_devolve_o_que_ja_foi_baixado(tmp_path):
+    buscador = Buscador()
+    backend = BackendQuebrado(str(tmp_path / "c.db"), {"guardar"})
+    assert baixar_compartilhado(buscador, "u", backend) == b"conteudo de u"
+    assert baixar_compartilhado(buscador, "u", backend, forcar=True) == b"conteudo de u"
+    assert buscador.chamadas == 2
+
+
+def test_liberar_no_redis_compara_e_apaga_num_comando_so():
+    servidor = socket.create_server(("127.0.0.1", 0))
+    recebidos = []
+
+    def atender():
+        conexao, _ = servidor.accept()
+        with conexao, conexao.makefile("rb") as leitor:
+            while True:
+                cabecalho = leitor.readline()
+                if not cabecalho:
+                    return
+                partes = []
+                for _ in range(int(cabecalho[1:])):
+                    tamanho = int(leitor.readline()[1:])
+                    partes.append(leitor.read(tamanho + 2)[:-2].decode())
+                recebidos.append(partes)
+                conexao.sendall(b":1\r\n")
+
+    fio = threading.Thread(target=atender, daemon=True)
+    fio.start()
+    backend = BackendRedis("127.0.0.1", servidor.getsockname()[1])
+    try:
+        backend.liberar("atlas:x:lease", "dono-1")
+    finally:
+        backend.fechar()
+        fio.join(timeout=5)
+        servidor.close()
+    assert recebidos == [["EVAL", LIBERAR_SE_DONO, "1", "atlas:x:lease", "dono-1"]]
+
+
+def test_arrendamento_liberado_no_servidor_resp_pode_ser_retomado():
+    servidor = iniciar()
+    backend = BackendRedis("127.0.0.1", servidor.server_address[1])
+    try:
+        with arrendamento(backend, "atlas:x") as primeiro:
+            assert primeiro
+            with arrendamento(backend, "atlas:x") as concorrente:
+                assert not concorrente
+        with arrendamento(backend, "atlas:x") as de_novo:
+            assert de_novo
+        # liberar com outro dono não apaga o arrendamento de ninguém
+        assert backend.adquirir("atlas:y:lease", "dono-1", 60)
+        backend.liberar("atlas:y:lease", "dono-2")
+        assert not backend.adquirir("atlas:y:lease", "dono-3", 60)
+    finally:
+        backend.fechar()
+        servidor.shutdown()
+        servidor.server_close()
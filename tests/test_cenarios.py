@@ -0,0 +1,15 @@
+import warnings
+
+import numpy as np
+
+from cenarios import avaliar, resumo_cenarios, sortear_choques
+
+
+def test_resumo_sem_renda_nao_avisa():
+    base = {"categorias": np.array(["CASA"], dtype=object), "valores": np.array([1500.0]), "aluguel": 1200.0, "renda": 0.0, "custos": 1500.0}
+    renda, custos, sobra = avaliar(base, sortear_choques(200, 1), incerteza_custos=0.1, incerteza_renda=0.1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        resumo = resumo_cenarios(custos, sobra)
+    assert resumo["pct_negativos"] == 100.0
+    assert resumo["meses_reserva"][50] == np.inf
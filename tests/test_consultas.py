@@ -0,0 +1,74 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from consultas_duckdb import ConsultasDuckDB
+from livro_sqlite import LivroSQLite
+from planilha_sintetica import gerar_planilha
+from preparo_paralelo import preparar_workbook
+from ranking import totais_classificacao
+
+COLUNAS_RESUMO = ["ANO", "MES_NUM", "MES", "RECEITA", "DESPESA", "SALDO", "DATA_CHAVE", "MES_ANO"]
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return preparar_workbook(gerar_planilha(anos=1))
+
+
+@pytest.fixture(params=["duckdb", "sqlite"])
+def consultas(request, snapshot, tmp_path):
+    if request.param == "duckdb":
+        return ConsultasDuckDB(snapshot, threads=1)
+    livro = LivroSQLite(str(tmp_path / "livro.db"))
+    livro.sincronizar(snapshot)
+    return livro
+
+
+def test_agregados_batem_com_o_pandas(consultas, snapshot):
+    pd.testing.assert_frame_equal(
+        consultas.resumo()[COLUNAS_RESUMO].reset_index(drop=True),
+        snapshot["resumo"][COLUNAS_RESUMO].reset_index(drop=True),
+        check_dtype=False,
+    )
+
+    gastos = snapshot["gastos"]
+    mes_ano = gastos["MES_ANO"].iloc[0]
+    for quinzena, classificacao in [("Todas", "Todos"), ("1ª quinzena", "DISPENSAVEL")]:
+        mascara = gastos["MES_ANO"] == mes_ano
+        if quinzena != "Todas":
+            mascara &= gastos["QUINZENA"] == quinzena
+        if classificacao != "Todos":
+            mascara &= gastos["CLASSIFICACAO"] == classificacao
+        pd.testing.assert_frame_equal(
+            consultas.totais_classificacao(mes_ano, quinzena, classificacao),
+            totais_classificacao(gastos[mascara]),
+            check_dtype=False,
+        )
+
+    pd.testing.assert_frame_equal(
+        consultas.custo_por_categoria(),
+        snapshot["custo_vida"]["df_cat"][["CATEGORIA", "VALOR"]].reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+def test_consultas_preparadas_ficam_no_cursor_de_cada_thread(snapshot):
+    consultas = ConsultasDuckDB(snapshot, threads=1)
+    consultas.resumo()
+    preparada = consultas._local.preparadas["resumo"]
+    consultas.resumo()
+    assert consultas._local.preparadas["resumo"] is preparada
+
+    outra = {}
+
+    def em_outra_thread():
+        consultas.resumo()
+        outra.update(consultas._local.preparadas)
+
+    fio = threading.Thread(target=em_outra_thread)
+    fio.start()
+    fio.join(timeout=30)
+    assert not fio.is_alive()
+    assert outra["resumo"] is not preparada
@@ -0,0 +1,22 @@
+import os
+
+import perfil_inicializacao as perfil
+
+ORCAMENTO_MS = float(os.environ.get("ATLAS_ORCAMENTO_IMPORTS_MS", "30"))
+
+
+def _topo():
+    return perfil.separar_streamlit(perfil.imports_de_topo(os.path.join(perfil.RAIZ, "app.py")))
+
+
+def test_imports_antes_da_topbar_nao_puxam_modulos_pesados():
+    streamlit, proprios = _topo()
+    ja_do_streamlit = set(perfil.adiados_carregados([], streamlit))
+    assert set(perfil.adiados_carregados(proprios, streamlit)) - ja_do_streamlit == set()
+
+
+def test_orcamento_de_imports_antes_da_topbar():
+    streamlit, proprios = _topo()
+    custos = perfil.medir_imports(proprios, streamlit)
+    total_ms = sum(custos.values()) / 1000
+    assert total_ms <= ORCAMENTO_MS, f"{total_ms:.1f} ms > {ORCAMENTO_MS:.1f} ms: {custos}"
@@ -0,0 +1,53 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import preparo_paralelo
+from cache_compartilhado import BackendSQLite
+from planilha_sintetica import gerar_planilha
+from preparo_paralelo import criar_pool, preparar_workbook
+
+
+@pytest.fixture(scope="module")
+def conteudo():
+    return gerar_planilha(anos=1)
+
+
+def test_preparo_em_serie_nao_marca_pool_quebrado(conteudo):
+    snapshot = preparar_workbook(conteudo)
+    assert not snapshot["pool_quebrado"]
+    assert not snapshot["gastos"].empty
+
+
+def test_pool_quebrado_e_reportado_e_o_preparo_termina_em_serie(conteudo):
+    pool = criar_pool(2) or ProcessPoolExecutor(max_workers=1)
+    try:
+        # derruba um worker: o executor passa a levantar BrokenProcessPool
+        pool.submit(os._exit, 1).exception()
+        snapshot = preparar_workbook(conteudo, pool)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    assert snapshot["pool_quebrado"]
+    assert not snapshot["erros"]
+    assert not snapshot["gastos"].empty
+
+
+class BackendSemEscrita(BackendSQLite):
+    def guardar(self, chave, valor, ttl=None):
+        raise OSError("backend fora do ar")
+
+
+def test_falha_ao_guardar_no_compartilhado_nao_prepara_de_novo(conteudo, tmp_path, monkeypatch):
+    chamadas = []
+    executar = preparo_paralelo._executar
+
+    def contando(tarefas, *args):
+        chamadas.append(sorted(tarefas))
+        return executar(tarefas, *args)
+
+    monkeypatch.setattr(preparo_paralelo, "_executar", contando)
+    snapshot = preparar_workbook(conteudo, compartilhado=BackendSemEscrita(str(tmp_path / "c.db")))
+    assert len(chamadas) == 1
+    assert not snapshot["erros"]
+    assert not snapshot["gastos"].empty
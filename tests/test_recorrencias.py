@@ -0,0 +1,61 @@
+import threading
+
+import pandas as pd
+
+from recorrencias import DetectorRecorrencias
+
+AVULSAS = ["Padaria Central", "Farmácia Popular", "Cinema Shopping", "Livraria Cultura"]
+
+
+def _despesas(meses, extras=0):
+    datas = pd.to_datetime([f"2025-{m:02d}-05" for m in meses])
+    linhas = [("Netflix", d, 55.9) for d in datas] + [("Aluguel", d, 1500.0) for d in datas]
+    linhas += [(f"{AVULSAS[i % len(AVULSAS)]} {i}", datas[-1], 10.0 + i) for i in range(extras)]
+    return pd.DataFrame(linhas, columns=["DESCRICAO", "DATA", "VALOR"])
+
+
+def test_detecta_mensal_e_novas():
+    detector = DetectorRecorrencias()
+    detector.atualizar([("Despesa fixa", _despesas(range(1, 7), extras=2), "DESCRICAO")], (2025, 6), versao=1)
+
+    recorrentes = {linha["DESCRICAO"]: linha for linha in detector.recorrentes((2025, 6))}
+    assert recorrentes["Netflix"]["CADENCIA"] == "Mensal"
+    assert recorrentes["Netflix"]["OCORRENCIAS"] == 6
+    assert recorrentes["Aluguel"]["SITUACAO"] == "Em dia"
+    assert {linha["DESCRICAO"] for linha in detector.novas((2025, 6))} == {"Padaria Central 0", "Farmácia Popular 1"}
+
+
+def test_leitura_concorrente_com_atualizacao():
+    detector = DetectorRecorrencias()
+    bases = [_despesas(range(1, 13), extras=n) for n in (50, 400)]
+    erros = []
+    parar = threading.Event()
+
+    def atualizar():
+        try:
+            for i in range(40):
+                detector.atualizar([("Despesa fixa", bases[i % 2], "DESCRICAO")], (2025, 12), versao=i)
+        except Exception as e:
+            erros.append(e)
+        finally:
+            parar.set()
+
+    def ler():
+        try:
+            while not parar.is_set():
+                detector.recorrentes((2025, 12))
+                detector.novas((2025, 12))
+        except Exception as e:
+            erros.append(e)
+
+    # daemon: se travar, o teste falha no is_alive em vez de segurar o pytest na saída
+    leitores = [threading.Thread(target=ler, daemon=True) for _ in range(3)]
+    escritor = threading.Thread(target=atualizar, daemon=True)
+    for t in leitores + [escritor]:
+        t.start()
+    for t in leitores + [escritor]:
+        t.join(timeout=60)
+        assert not t.is_alive(), f"{t.name} não terminou: possível deadlock"
+
+    assert not erros
+    assert {linha["DESCRICAO"] for linha in detector.recorrentes((2025, 12))} >= {"Netflix", "Aluguel"}
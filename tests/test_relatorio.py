@@ -0,0 +1,31 @@
+import io
+import json
+
+import openpyxl
+import pandas as pd
+
+import relatorio
+from planilha_sintetica import gerar_planilha
+
+
+def _planilha_sem_itens_de_custo(caminho):
+    livro = openpyxl.load_workbook(io.BytesIO(gerar_planilha(anos=1)))
+    aba = livro["CUSTO DE VIDA"]
+    aba.delete_rows(2, aba.max_row)
+    aba.append(["RENDA TOTAL", "", 6800])
+    livro.save(caminho)
+
+
+def test_cli_com_custo_de_vida_sem_itens(tmp_path, capsys):
+    origem = tmp_path / "sem_itens.xlsx"
+    _planilha_sem_itens_de_custo(origem)
+
+    assert relatorio.main([str(origem), "--sem-cache"]) == 0
+    documento = json.loads(capsys.readouterr().out)
+    custo_vida = documento["sem_itens"]["custo_vida"]
+    assert custo_vida["renda_total"] == 6800
+    assert custo_vida["itens"] == [] and custo_vida["pct_sobra"] is None
+
+    saida = tmp_path / "csv"
+    assert relatorio.main([str(origem), "--sem-cache", "--formato", "csv", "--saida", str(saida)]) == 0
+    assert list(pd.read_csv(saida / "sem_itens_custo_vida.csv").columns) == relatorio.COLUNAS_ITENS